@@ -1,4 +1,7 @@
 from .codex_kg import *
 from .grakn_functions import *
+from .codex_ingest import *
+from .codex_cache import *
+from .codex_pool import *
 from .codex_query import *
 from .codex_query_builder import *
\ No newline at end of file
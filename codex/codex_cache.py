@@ -0,0 +1,510 @@
+import hashlib
+import json
+import logging
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .grakn_functions import make_find_queries
+
+
+logging.basicConfig(
+    format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO
+)
+
+# seconds a query result is kept in redis
+RESULT_TTL = 3600
+
+# query actions whose answers are cached
+CACHED_ACTIONS = ["Find", "Compute", "Cluster"]
+
+# redis hashes of the concept maps of a keyspace, a field per concept
+CONCEPT_MAPS = ["entity_map", "rel_map", "rules_map"]
+# value of the keyspace key once its concept maps are hashes
+KEYSPACE_MARKER = "concept_hashes"
+
+# keyspace version the result was read at, before the encoded answers
+VERSION_HEADER = struct.Struct(">Q")
+# key of the json objects that stand for values json has no type for
+RESULT_TAG = "__codex__"
+
+# limits of the in process tier, sizes are of the serialized values
+LOCAL_MAX_ENTRIES = 256
+LOCAL_MAX_BYTES = 64 * 1024 * 1024
+# larger answers are only kept in redis
+LOCAL_MAX_ITEM_BYTES = 1024 * 1024
+
+
+def normalize_graql(graql_query: str) -> str:
+    """
+    Purpose:
+       Collapse the whitespace of a graql query so the same query made
+       with different spacing has one fingerprint
+    Args:
+        graql_query: the query
+    Returns:
+        graql_query: the normalized query
+    """
+    return " ".join(str(graql_query).split())
+
+
+def query_fingerprint(query_object) -> str:
+    """
+    Purpose:
+       Hash what a query asks Grakn for, the compiled graql of a find, the
+       compute and cluster requests and the query options
+    Args:
+        query_object: the query object
+    Returns:
+        fingerprint: sha256 hex digest
+    """
+    parts = {"action": query_object.action, "options": repr(query_object.options)}
+
+    if query_object.action == "Find":
+        concept_queries, _ = make_find_queries(query_object)
+        parts["graql"] = [normalize_graql(query) for query in concept_queries]
+        parts["return_attrs"] = query_object.return_attrs
+        parts["offset"] = query_object.offset
+        parts["limit"] = query_object.limit
+    elif query_object.action == "Compute":
+        # compute graql is made from these when the query runs
+        parts["queries"] = query_object.queries
+    elif query_object.action == "Cluster":
+        parts["query"] = query_object.query
+        if "query_string" in query_object.query:
+            parts["graql"] = normalize_graql(query_object.query["query_string"])
+
+    text = json.dumps(parts, sort_keys=True, default=str)
+
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def merge_concept(saved, concept):
+    """
+    Purpose:
+       Merge a concept into the version saved by another writer. The concept
+       replaces the saved one, only the rels of an entity are merged since
+       writers of other relationships add to them
+    Args:
+        saved: the concept in redis
+        concept: the concept to save
+    Returns:
+        merged: the concept to write back
+    """
+    if not isinstance(saved, dict) or not isinstance(concept, dict):
+        return concept
+
+    merged = dict(concept)
+    if isinstance(saved.get("rels"), dict) and isinstance(concept.get("rels"), dict):
+        merged["rels"] = {**saved["rels"], **concept["rels"]}
+
+    return merged
+
+
+def encode_value(value: Any) -> Any:
+    """
+    Purpose:
+       Turn answers into plain json data, dataframes and the values json has
+       no type for become tagged objects
+    Args:
+        value: answers or a part of them
+    Returns:
+        data: json data
+    """
+    if isinstance(value, pd.DataFrame):
+        return {
+            RESULT_TAG: "DataFrame",
+            "columns": [encode_value(column) for column in value.columns],
+            "dtypes": [str(dtype) for dtype in value.dtypes],
+            "index": encode_value(value.index.tolist()),
+            "data": [encode_value(value[column].tolist()) for column in value],
+        }
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, np.generic):
+        return encode_value(value.item())
+    if isinstance(value, datetime):
+        return {RESULT_TAG: "datetime", "value": value.isoformat()}
+    if isinstance(value, date):
+        return {RESULT_TAG: "date", "value": value.isoformat()}
+    if isinstance(value, list):
+        return [encode_value(item) for item in value]
+    if isinstance(value, (tuple, set)):
+        return {
+            RESULT_TAG: type(value).__name__,
+            "items": [encode_value(item) for item in value],
+        }
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value) and RESULT_TAG not in value:
+            return {key: encode_value(item) for key, item in value.items()}
+
+        return {
+            RESULT_TAG: "dict",
+            "items": [
+                [encode_value(key), encode_value(item)] for key, item in value.items()
+            ],
+        }
+
+    raise TypeError(f"Can not cache a {type(value).__name__}")
+
+
+def decode_value(data: Any) -> Any:
+    """
+    Purpose:
+       Turn json data made by encode_value back into answers
+    Args:
+        data: json data
+    Returns:
+        value: answers or a part of them
+    """
+    if isinstance(data, list):
+        return [decode_value(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    tag = data.get(RESULT_TAG)
+
+    if tag is None:
+        return {key: decode_value(item) for key, item in data.items()}
+    if tag == "DataFrame":
+        columns = decode_value(data["columns"])
+        df = pd.DataFrame(
+            {
+                position: decode_value(values)
+                for position, values in enumerate(data["data"])
+            },
+            index=decode_value(data["index"]),
+        )
+        for position, dtype in enumerate(data["dtypes"]):
+            if dtype != "object":
+                df[position] = df[position].astype(dtype)
+        df.columns = columns
+        return df
+    if tag == "datetime":
+        return datetime.fromisoformat(data["value"])
+    if tag == "date":
+        return date.fromisoformat(data["value"])
+    if tag == "tuple":
+        return tuple(decode_value(data["items"]))
+    if tag == "set":
+        return set(decode_value(data["items"]))
+    if tag == "dict":
+        return {decode_value(key): decode_value(item) for key, item in data["items"]}
+
+    raise ValueError(f"Unknown cached value {tag}")
+
+
+def pack_result(result: Any, version: int) -> bytes:
+    """
+    Purpose:
+       Serialize answers as the keyspace version then compressed json, no
+       code runs when they are read back
+    Args:
+        result: answers to a query
+        version: keyspace version the answers were read at
+    Returns:
+        data: bytes to keep in redis
+    """
+    payload = zlib.compress(json.dumps(encode_value(result)).encode("utf-8"))
+
+    return VERSION_HEADER.pack(version) + payload
+
+
+def unpack_result(data: bytes) -> Tuple[Any, int]:
+    """
+    Purpose:
+       Read answers written by pack_result
+    Args:
+        data: bytes from redis
+    Returns:
+        result: answers to the query
+        version: keyspace version the answers were read at
+    """
+    (version,) = VERSION_HEADER.unpack_from(data)
+    result = decode_value(json.loads(zlib.decompress(data[VERSION_HEADER.size :])))
+
+    return result, version
+
+
+class LocalCache:
+    def __init__(
+        self, max_entries=LOCAL_MAX_ENTRIES, max_bytes=LOCAL_MAX_BYTES
+    ) -> None:
+        """
+        Purpose:
+            Bounded LRU of values in this process, each kept with the
+            redis version it was read at. A value is only returned for the
+            version it was stored with
+        Args:
+            max_entries: most values kept
+            max_bytes: most serialized bytes kept
+        Returns:
+            N/A
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # {key: (version, value, size)}, least recently used first
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: str, version: int) -> Any:
+        """
+        Purpose:
+            Get a value stored at a version, values of other versions are
+            dropped
+        Args:
+            key: key of the value
+            version: current redis version of the value
+        Returns:
+            value: the value, None on a miss
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self.entries[key]
+                    self.size -= entry[2]
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+            return entry[1]
+
+    def version(self, key: str) -> Any:
+        """
+        Purpose:
+            Get the version a value is kept at, without counting a hit
+        Args:
+            key: key of the value
+        Returns:
+            version: the version of the value, None when it is not kept
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+
+            return entry[0] if entry is not None else None
+
+    def put(self, key: str, value: Any, version: int, size: int) -> None:
+        """
+        Purpose:
+            Keep a value, the least recently used values are dropped to
+            stay in the limits
+        Args:
+            key: key of the value
+            value: the value
+            version: redis version the value was read or written at
+            size: serialized size of the value
+        Returns:
+            N/A
+        """
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[2]
+
+            self.entries[key] = (version, value, size)
+            self.size += size
+
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, _, dropped_size) = self.entries.popitem(last=False)
+                self.size -= dropped_size
+
+    def stats(self) -> dict:
+        """
+        Purpose:
+            Get the hit and miss counts and the size of the tier
+        Args:
+            N/A
+        Returns:
+            stats: {"hits", "misses", "entries", "bytes"}
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "bytes": self.size,
+            }
+
+
+# in process tier shared by the CodexKg of this process
+shared_local_cache = LocalCache()
+
+
+class CodexResultCache:
+    def __init__(
+        self, cache, key_prefix: str, ttl=RESULT_TTL, local=None, local_prefix=""
+    ) -> None:
+        """
+        Purpose:
+            Cache the answers of the reads of a keyspace in redis. Every
+            write bumps the keyspace version, answers read at an older
+            version are misses. Small answers are also kept serialized in a
+            LocalCache in front of redis, each hit decodes its own copy
+        Args:
+            cache: redis client, or anything with its interface
+            key_prefix: redis key of the keyspace
+            ttl: seconds a result is kept
+            local: LocalCache of this process, None for redis only
+            local_prefix: where the redis server is, keeps the local keys
+                of different servers apart
+        Returns:
+            N/A
+        """
+        self.cache = cache
+        self.key_prefix = key_prefix
+        self.ttl = ttl
+        self.local = local
+        self.local_prefix = local_prefix
+        # kept when the keyspace is deleted so old answers stay stale
+        self.version_key = f"{key_prefix}_version"
+        self.stats_key = f"{key_prefix}_result_stats"
+
+    def result_key(self, query_object) -> str:
+        """
+        Purpose:
+            Get the redis key of the answers of a query
+        Args:
+            query_object: the query object
+        Returns:
+            key: redis key under the keyspace key
+        """
+        return f"{self.key_prefix}_result_{query_fingerprint(query_object)}"
+
+    def keep_local(self, key: str, data: bytes, version: int) -> None:
+        """
+        Purpose:
+            Keep small answers in the in process tier
+        Args:
+            key: redis key of the answers
+            data: the serialized answers
+            version: keyspace version of the answers
+        Returns:
+            N/A
+        """
+        if self.local is not None and len(data) <= LOCAL_MAX_ITEM_BYTES:
+            self.local.put(self.local_prefix + key, data, version, len(data))
+
+    def get(self, query_object) -> Tuple[Any, int]:
+        """
+        Purpose:
+            Get the cached answers of a query. Answers of the current
+            version in the in process tier are decoded without reading them
+            from redis, otherwise the version and the answers are read in
+            one round trip
+        Args:
+            query_object: the query object
+        Returns:
+            result: answers to the query, None on a miss
+            version: keyspace version to cache a fresh answer at
+        """
+        key = self.result_key(query_object)
+        local_key = self.local_prefix + key
+        local_version = None
+        if self.local is not None:
+            local_version = self.local.version(local_key)
+
+        if local_version is None:
+            pipe = self.cache.pipeline(transaction=False)
+            pipe.get(self.version_key)
+            pipe.get(key)
+            version, data = pipe.execute()
+        else:
+            # the answers are likely kept here, only read the version
+            version = self.cache.get(self.version_key)
+            data = None
+        version = int(version) if version is not None else 0
+
+        if self.local is not None:
+            local_data = self.local.get(local_key, version)
+            if local_data is not None:
+                return unpack_result(local_data)[0], version
+
+            if local_version is not None:
+                # the kept answers are stale or were dropped
+                data = self.cache.get(key)
+
+        if data is not None:
+            result, result_version = unpack_result(data)
+
+            if result_version == version:
+                self.cache.hincrby(self.stats_key, "hits", 1)
+                self.keep_local(key, data, version)
+                return result, version
+
+        self.cache.hincrby(self.stats_key, "misses", 1)
+
+        return None, version
+
+    def set(self, query_object, result: Any, version: int) -> None:
+        """
+        Purpose:
+            Cache the answers of a query
+        Args:
+            query_object: the query object
+            result: answers to the query
+            version: keyspace version from get, before the query ran
+        Returns:
+            N/A
+        """
+        key = self.result_key(query_object)
+
+        try:
+            data = pack_result(result, version)
+        except TypeError as error:
+            logging.warning(f"Answers are not cached: {error}")
+            return
+
+        self.cache.set(key, data, ex=self.ttl)
+        self.keep_local(key, data, version)
+
+    def bump(self) -> int:
+        """
+        Purpose:
+            Move the keyspace to a new version after a write, every cached
+            answer of the keyspace is then a miss
+        Args:
+            N/A
+        Returns:
+            version: the new keyspace version
+        """
+        return self.cache.incr(self.version_key)
+
+    def stats(self) -> dict:
+        """
+        Purpose:
+            Get the redis hit and miss counts, the version of the keyspace
+            and the stats of the in process tier
+        Args:
+            N/A
+        Returns:
+            stats: {"hits", "misses", "version", "local"}
+        """
+        pipe = self.cache.pipeline(transaction=False)
+        pipe.hgetall(self.stats_key)
+        pipe.get(self.version_key)
+        counts, version = pipe.execute()
+
+        return {
+            "hits": int(counts.get(b"hits", 0)),
+            "misses": int(counts.get(b"misses", 0)),
+            "version": int(version) if version is not None else 0,
+            "local": self.local.stats() if self.local is not None else {},
+        }
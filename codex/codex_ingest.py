@@ -0,0 +1,893 @@
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+from grakn.client import GraknClient
+
+from .grakn_functions import (
+    STATEMENT_BLOCK_SIZE,
+    add_entities_into_grakn,
+    add_phase,
+    add_relationship_data,
+    add_unresolved_stats,
+    commit_rows,
+    define_schema,
+    format_rows,
+    insert_in_batches,
+    make_entity_queries,
+    make_load_stats,
+    make_relationship_queries,
+    merge_load_stats,
+    report_unresolved,
+    resolve_relationship_keys,
+)
+
+
+logging.basicConfig(
+    format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO
+)
+
+
+def source_paths(source) -> list:
+    """
+    Purpose:
+        Get the csv files for a source
+    Args:
+        source: csv path, glob of csv shards or list of them
+    Returns:
+        paths: sorted list of csv paths
+    """
+    if isinstance(source, str):
+        source = [source]
+
+    paths = []
+    for pattern in source:
+        # a file named with glob characters does not match itself
+        if os.path.isfile(pattern):
+            paths.append(pattern)
+            continue
+
+        matches = sorted(glob.glob(pattern))
+
+        if len(matches) == 0:
+            raise FileNotFoundError(f"No csv files match {pattern}")
+
+        paths.extend(matches)
+
+    return paths
+
+
+def read_source(source, chunksize: int = 100000):
+    """
+    Purpose:
+        Read a source as a stream of dataframe chunks
+    Args:
+        source: DataFrame, csv path, glob of csv shards, list of them,
+            a chunked csv reader, an iterator of dataframes or of dicts
+        chunksize: number of rows per chunk
+    Returns:
+        chunks: generator of dataframes
+    """
+    if isinstance(source, pd.DataFrame):
+        for chunk_start in range(0, len(source), chunksize):
+            yield source.iloc[chunk_start : chunk_start + chunksize]
+
+    elif isinstance(source, str) or (
+        isinstance(source, (list, tuple))
+        and all(isinstance(path, str) for path in source)
+    ):
+        for path in source_paths(source):
+            logging.info(f"Reading {path}")
+            # gzip, bz2, zip and xz files are decompressed as they stream
+            for chunk in pd.read_csv(path, chunksize=chunksize):
+                yield chunk
+
+    else:
+        # dicts are gathered into chunks of rows
+        rows = []
+
+        for item in source:
+            if isinstance(item, pd.DataFrame):
+                if len(rows) > 0:
+                    yield pd.DataFrame(rows)
+                    rows = []
+                yield item
+            else:
+                rows.append(item)
+                if len(rows) == chunksize:
+                    yield pd.DataFrame(rows)
+                    rows = []
+
+        if len(rows) > 0:
+            yield pd.DataFrame(rows)
+
+
+def source_fingerprint(source) -> str:
+    """
+    Purpose:
+        Fingerprint a source, so a checkpoint is only resumed on the same data
+    Args:
+        source: DataFrame, csv path, glob of csv shards or list of them
+    Returns:
+        fingerprint: hex digest of the source
+    """
+    digest = hashlib.sha1()
+
+    if isinstance(source, pd.DataFrame):
+        digest.update(str(list(source.columns)).encode())
+        row_hashes = pd.util.hash_pandas_object(source, index=False)
+        digest.update(row_hashes.to_numpy().tobytes())
+
+    elif isinstance(source, (str, list, tuple)):
+        # files are not read, a changed file gets a new size or mtime
+        for path in source_paths(source):
+            stat = os.stat(path)
+            digest.update(
+                f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+            )
+
+    else:
+        raise TypeError(f"Can not fingerprint a {type(source).__name__} source")
+
+    return digest.hexdigest()
+
+
+def skip_rows(chunks, rows: int):
+    """
+    Purpose:
+        Skip the first rows of a stream of chunks
+    Args:
+        chunks: iterable of dataframes
+        rows: number of rows to skip
+    Returns:
+        chunks: generator of the remaining dataframes
+    """
+    for chunk in chunks:
+        if rows >= len(chunk):
+            rows -= len(chunk)
+            continue
+
+        yield chunk.iloc[rows:]
+        rows = 0
+
+
+def load_chunks(
+    chunks,
+    load_chunk,
+    save_checkpoint=None,
+    offset: int = 0,
+    checkpoint_interval: float = 0.0,
+) -> dict:
+    """
+    Purpose:
+        Load a stream of chunks one at a time, so only one chunk is held
+        in memory
+    Args:
+        chunks: iterable of dataframes
+        load_chunk: function of a dataframe and a batch callback, that loads
+            the dataframe and returns its load stats
+        save_checkpoint: function called with the number of source rows done,
+            after each committed batch and each chunk
+        offset: number of source rows already loaded, these are skipped
+        checkpoint_interval: least seconds between checkpoints of batches,
+            0 saves one after every batch. Batches committed after the last
+            checkpoint are loaded again on resume, so a longer interval
+            makes resume at least once
+    Returns:
+        load_stats: details of the whole load
+    """
+    start = time.perf_counter()
+    stats_list = []
+    position = offset
+    last_saved = time.monotonic()
+    saved_position = offset
+
+    def save(rows_done: int) -> None:
+        nonlocal last_saved, saved_position
+
+        if rows_done != saved_position:
+            save_checkpoint(rows_done)
+            last_saved = time.monotonic()
+            saved_position = rows_done
+
+    def save_batch(rows: int, chunk_start: int) -> None:
+        if time.monotonic() - last_saved >= checkpoint_interval:
+            save(chunk_start + rows)
+
+    for chunk in skip_rows(chunks, offset):
+        if save_checkpoint is None:
+            on_batch = None
+        else:
+            on_batch = lambda rows, chunk_start=position: save_batch(rows, chunk_start)
+
+        stats_list.append(load_chunk(chunk, on_batch))
+        position += len(chunk)
+
+        if save_checkpoint is not None:
+            save(position)
+
+    load_stats = merge_load_stats(stats_list, time.perf_counter() - start)
+    load_stats["resumed_from"] = offset
+
+    return load_stats
+
+
+def partition_rows(df: pd.DataFrame, key: str, parts: int) -> list:
+    """
+    Purpose:
+        Partition rows by a hash of the key column, so the same key
+        always lands in the same partition
+    Args:
+        df: The data to partition
+        key: column to hash on
+        parts: number of partitions
+    Returns:
+        frames: one dataframe per partition
+    """
+    hashes = pd.util.hash_pandas_object(df[key], index=False).to_numpy() % parts
+
+    return [df[hashes == part] for part in range(parts)]
+
+
+def load_partition(
+    uri: str,
+    credentials,
+    keyspace: str,
+    partition_queue,
+    concept_type: str,
+    concept: str,
+    concept_map: dict,
+    batch_size: int,
+    dead_letter=None,
+) -> dict:
+    """
+    Purpose:
+        Worker process, load the chunks of one partition with its own session
+    Args:
+        uri: grakn url
+        credentials: grakn credentials
+        keyspace: the keyspace to load into
+        partition_queue: queue of dataframes, None marks the end
+        concept_type: Entity or Relationship
+        concept: name of the entity or relationship
+        concept_map: the entity map or the relationship map
+        batch_size: number of rows to commit per write transaction
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        load_stats: details of the load
+    """
+    start = time.perf_counter()
+    stats_list = []
+    # concept ids of role players, resolved once per worker
+    key_ids = {}
+
+    with GraknClient(uri=uri, credentials=credentials) as client:
+        with client.session(keyspace=keyspace) as session:
+            while True:
+                chunk = partition_queue.get()
+                if chunk is None:
+                    break
+
+                if concept_type == "Entity":
+                    stats_list.append(
+                        add_entities_into_grakn(
+                            session,
+                            chunk,
+                            concept,
+                            concept_map,
+                            batch_size,
+                            dead_letter=dead_letter,
+                        )
+                    )
+                else:
+                    stats_list.append(
+                        add_relationship_data(
+                            chunk,
+                            concept_map,
+                            concept,
+                            session,
+                            batch_size,
+                            key_ids=key_ids,
+                            dead_letter=dead_letter,
+                        )
+                    )
+
+    return merge_load_stats(stats_list, time.perf_counter() - start)
+
+
+def put_partition(partition_queue, chunk, future) -> None:
+    """
+    Purpose:
+        Put a chunk on a worker queue, without blocking forever on a dead worker
+    Args:
+        partition_queue: the worker queue
+        chunk: dataframe or None to mark the end
+        future: the worker future
+    Returns:
+        N/A
+    """
+    put_work(partition_queue, chunk, [future])
+
+
+def stop_partitions(queues: list, futures: list) -> None:
+    """
+    Purpose:
+        Put the end marker on the queue of each worker still running
+    Args:
+        queues: the worker queues
+        futures: the worker futures, one per queue
+    Returns:
+        N/A
+    """
+    for partition_queue, future in zip(queues, futures):
+        if not future.done():
+            put_partition(partition_queue, None, future)
+
+
+def put_work(work_queue, item, futures: list) -> None:
+    """
+    Purpose:
+        Put an item on a queue, waiting while it is full, without blocking
+        forever when the workers draining it have stopped
+    Args:
+        work_queue: the queue
+        item: the item to put
+        futures: futures of the workers draining the queue
+    Returns:
+        N/A
+    """
+    while True:
+        try:
+            work_queue.put(item, timeout=1)
+            return
+        except queue.Full:
+            for future in futures:
+                if future.done():
+                    # raises the error of the worker
+                    future.result()
+                    raise RuntimeError("Loader worker stopped early")
+
+
+def load_with_processes(
+    uri: str,
+    credentials,
+    keyspace: str,
+    chunks,
+    concept_type: str,
+    concept: str,
+    concept_map: dict,
+    key: str,
+    batch_size: int = 100,
+    workers: int = 2,
+    queue_size: int = 4,
+    dead_letter=None,
+) -> dict:
+    """
+    Purpose:
+        Load a stream of chunks into Grakn from a pool of processes. Rows
+        are partitioned on a hash of the key, each worker owns a partition
+    Args:
+        uri: grakn url
+        credentials: grakn credentials
+        keyspace: the keyspace to load into
+        chunks: iterable of dataframes
+        concept_type: Entity or Relationship
+        concept: name of the entity or relationship
+        concept_map: the entity map or the relationship map
+        key: column to partition rows on
+        batch_size: number of rows to commit per write transaction
+        workers: number of processes to load with
+        queue_size: number of chunks each worker can have waiting
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        load_stats: details of the load
+    """
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1 not {workers}")
+
+    start = time.perf_counter()
+
+    # spawn so workers do not inherit grpc state from this process
+    mp_context = multiprocessing.get_context("spawn")
+
+    with mp_context.Manager() as manager:
+        queues = [manager.Queue(maxsize=queue_size) for _ in range(workers)]
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+            futures = [
+                pool.submit(
+                    load_partition,
+                    uri,
+                    credentials,
+                    keyspace,
+                    partition_queue,
+                    concept_type,
+                    concept,
+                    concept_map,
+                    batch_size,
+                    dead_letter,
+                )
+                for partition_queue in queues
+            ]
+
+            try:
+                for chunk in chunks:
+                    for part, part_df in enumerate(partition_rows(chunk, key, workers)):
+                        if len(part_df) > 0:
+                            put_partition(queues[part], part_df, futures[part])
+            except Exception:
+                # stop the workers, without hiding why the load failed
+                try:
+                    stop_partitions(queues, futures)
+                except Exception as error:
+                    logging.error(f"Could not stop the workers: {error}")
+                raise
+
+            stop_partitions(queues, futures)
+
+            stats_list = [future.result() for future in futures]
+
+    load_stats = merge_load_stats(stats_list, time.perf_counter() - start)
+    load_stats["workers"] = workers
+    logging.info(
+        f"Loaded {load_stats['committed_rows']} {concept} rows with {workers} processes"
+    )
+
+    return load_stats
+
+
+def escape_statement(graql_query: str) -> str:
+    """
+    Purpose:
+        Escape a graql statement to fit on one line of a .gql file
+    Args:
+        graql_query: the statement
+    Returns:
+        line: the escaped statement
+    """
+    return graql_query.replace("\\", "\\\\").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def unescape_statement(line: str) -> str:
+    """
+    Purpose:
+        Turn a line of a .gql file back into the graql statement
+    Args:
+        line: the escaped statement
+    Returns:
+        graql_query: the statement
+    """
+    return re.sub(
+        r"\\(.)",
+        lambda match: {"n": "\n", "r": "\r"}.get(match.group(1), match.group(1)),
+        line,
+    )
+
+
+def write_graql_file(path: str, queries: list) -> None:
+    """
+    Purpose:
+        Write graql statements to a .gql file, one statement per line
+    Args:
+        path: the file to write
+        queries: the statements
+    Returns:
+        N/A
+    """
+    with open(path, "w") as graql_file:
+        graql_file.write("".join(escape_statement(query) + "\n" for query in queries))
+
+
+def read_graql_file(path: str) -> list:
+    """
+    Purpose:
+        Read the graql statements of a .gql file
+    Args:
+        path: the file to read
+    Returns:
+        queries: the statements
+    """
+    with open(path) as graql_file:
+        return [
+            unescape_statement(line.rstrip("\n"))
+            for line in graql_file
+            if len(line.strip()) > 0
+        ]
+
+
+def export_graql(
+    export_dir: str,
+    concept_type: str,
+    concept: str,
+    schema_query: str,
+    chunks,
+    make_queries,
+    file_rows: int = STATEMENT_BLOCK_SIZE,
+) -> list:
+    """
+    Purpose:
+        Compile a load to .gql files without a Grakn connection. The define
+        goes to <concept>.schema.gql and the statements to numbered
+        <concept>.<entity|relationship>.<part>.gql files
+    Args:
+        export_dir: folder to write the files to
+        concept_type: Entity or Relationship
+        concept: name of the entity or relationship
+        schema_query: the define query of the concept
+        chunks: iterable of dataframes
+        make_queries: function that turns a dataframe into graql queries
+        file_rows: number of statements per file
+    Returns:
+        paths: the files written, schema first
+    """
+    os.makedirs(export_dir, exist_ok=True)
+
+    schema_path = os.path.join(export_dir, f"{concept}.schema.gql")
+    write_graql_file(schema_path, [schema_query])
+    paths = [schema_path]
+
+    part = 0
+    for chunk in chunks:
+        for file_start in range(0, len(chunk), file_rows):
+            path = os.path.join(
+                export_dir, f"{concept}.{concept_type.lower()}.{part:05d}.gql"
+            )
+            write_graql_file(
+                path, make_queries(chunk.iloc[file_start : file_start + file_rows])
+            )
+            paths.append(path)
+            part += 1
+
+    logging.info(f"Exported {concept} to {len(paths)} files in {export_dir}")
+
+    return paths
+
+
+def graql_file_kind(path: str) -> str:
+    """
+    Purpose:
+        Get what a .gql file written by export_graql holds
+    Args:
+        path: the file
+    Returns:
+        kind: schema, entity or relationship
+    """
+    name = os.path.basename(path)
+
+    if name.endswith(".schema.gql"):
+        return "schema"
+
+    if ".relationship." in name:
+        return "relationship"
+
+    return "entity"
+
+
+def load_graql_files(
+    client,
+    keyspace: str,
+    paths: list,
+    batch_size: int = 100,
+    workers: int = 1,
+    dead_letter=None,
+) -> dict:
+    """
+    Purpose:
+        Replay .gql files into Grakn. Schema files run first as one define,
+        then entity files and then relationship files, the files of each
+        kind are loaded in parallel
+    Args:
+        client: The Grakn client
+        keyspace: the keyspace to load into
+        paths: .gql files or globs of them
+        batch_size: number of statements to commit per write transaction
+        workers: number of threads to load with, each file gets its own session
+        dead_letter: csv or json lines file to write failed statements to
+    Returns:
+        load_stats: details of the load
+    """
+    start = time.perf_counter()
+    paths = source_paths(paths)
+
+    schema_queries = []
+    for path in paths:
+        if graql_file_kind(path) == "schema":
+            schema_queries.extend(read_graql_file(path))
+
+    if len(schema_queries) > 0:
+        with client.session(keyspace=keyspace) as session:
+            define_schema(session, schema_queries)
+
+    def load_file(path: str) -> dict:
+        statements = pd.DataFrame({"graql": read_graql_file(path)})
+
+        with client.session(keyspace=keyspace) as session:
+            return insert_in_batches(
+                session,
+                statements,
+                lambda df: df["graql"].tolist(),
+                batch_size,
+                os.path.basename(path),
+                dead_letter,
+            )
+
+    stats_list = []
+    # relationships match entities, so every entity file goes in first
+    for kind in ["entity", "relationship"]:
+        kind_paths = [path for path in paths if graql_file_kind(path) == kind]
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            stats_list.extend(executor.map(load_file, kind_paths))
+
+    load_stats = merge_load_stats(stats_list, time.perf_counter() - start)
+    load_stats["workers"] = workers
+    logging.info(
+        f"Loaded {load_stats['committed_rows']} statements from {len(paths)} files"
+    )
+
+    return load_stats
+
+
+def stop_workers(work_queue, futures: list) -> None:
+    """
+    Purpose:
+        Put one end marker on a shared queue for each worker, giving up once
+        every worker has stopped
+    Args:
+        work_queue: the queue
+        futures: futures of the workers draining the queue
+    Returns:
+        N/A
+    """
+    for _ in futures:
+        while not all(future.done() for future in futures):
+            try:
+                work_queue.put(None, timeout=1)
+                break
+            except queue.Full:
+                continue
+
+
+def format_stats(rows: int, rows_df: pd.DataFrame, phases=None) -> dict:
+    """
+    Purpose:
+        Count the rows of a chunk that could not be formatted as failed rows
+    Args:
+        rows: number of rows in the chunk
+        rows_df: the rows that were formatted
+        phases: seconds spent in each phase
+    Returns:
+        load_stats: the load stats of rows left out
+    """
+    failed_rows = rows - len(rows_df)
+
+    return make_load_stats(failed_rows, failed_rows, [], 0.0, failed_rows, phases)
+
+
+def entity_formatter(entity_name: str, entity_map: dict, dead_letter=None):
+    """
+    Purpose:
+        Make the format stage of an entity pipeline
+    Args:
+        entity_name: the entity name
+        entity_map: the entity map
+        dead_letter: csv or json lines file to write rows that could not be
+            formatted to
+    Returns:
+        format_chunk: function that turns a dataframe into the rows to
+            insert, their queries and the load stats of rows left out
+    """
+
+    def format_chunk(chunk: pd.DataFrame) -> tuple:
+        rows_df, queries, _ = format_rows(
+            chunk,
+            lambda df: make_entity_queries(df, entity_name, entity_map),
+            entity_name,
+            dead_letter,
+        )
+
+        return rows_df, queries, format_stats(len(chunk), rows_df)
+
+    return format_chunk
+
+
+def relationship_formatter(session, rel_name: str, rel_map: dict, dead_letter=None):
+    """
+    Purpose:
+        Make the format stage of a relationship pipeline, role players are
+        resolved to concept ids with the session of the format stage
+    Args:
+        session: The Grakn session
+        rel_name: the relationship name
+        rel_map: the relationship map
+        dead_letter: csv or json lines file to write rows that could not be
+            formatted to
+    Returns:
+        format_chunk: function that turns a dataframe into the rows to
+            insert, their queries and the load stats of rows left out
+    """
+    if rel_map["rel1"]["key"] is None or rel_map["rel2"]["key"] is None:
+        # nothing to resolve on, the statements match the role players
+        def format_chunk(chunk: pd.DataFrame) -> tuple:
+            rows_df, queries, _ = format_rows(
+                chunk,
+                lambda df: make_relationship_queries(df, rel_name, rel_map),
+                rel_name,
+                dead_letter,
+            )
+
+            return rows_df, queries, format_stats(len(chunk), rows_df)
+
+        return format_chunk
+
+    # concept ids of role players, resolved once per pipeline
+    key_ids = {}
+
+    def format_chunk(chunk: pd.DataFrame) -> tuple:
+        resolve_start = time.perf_counter()
+        resolved, unresolved, missing_keys = resolve_relationship_keys(
+            session, chunk, rel_map, key_ids
+        )
+        resolve_time = time.perf_counter() - resolve_start
+        report_unresolved(rel_name, unresolved, missing_keys)
+
+        rows_df, queries, _ = format_rows(
+            resolved,
+            lambda df: make_relationship_queries(df, rel_name, rel_map, by_id=True),
+            rel_name,
+            dead_letter,
+        )
+
+        return (
+            rows_df,
+            queries,
+            add_unresolved_stats(
+                format_stats(len(resolved), rows_df, phases={"resolve": resolve_time}),
+                unresolved,
+                missing_keys,
+            ),
+        )
+
+    return format_chunk
+
+
+def commit_from_queue(
+    client, keyspace: str, batch_queue, concept: str, dead_letter=None
+) -> dict:
+    """
+    Purpose:
+        Committer thread, drain batches from the queue with its own session
+    Args:
+        client: The Grakn client
+        keyspace: the keyspace to load into
+        batch_queue: queue of (rows, queries) batches, None marks the end
+        concept: the concept being loaded
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        load_stats: details of the batches this committer loaded
+    """
+    start = time.perf_counter()
+    rows = 0
+    failed_rows = 0
+    batch_latencies = []
+    phases = {}
+
+    with client.session(keyspace=keyspace) as session:
+        while True:
+            wait_start = time.perf_counter()
+            batch = batch_queue.get()
+            add_phase(phases, "consumer_wait", time.perf_counter() - wait_start)
+            if batch is None:
+                break
+
+            batch_df, queries = batch
+            latencies, batch_failed = commit_rows(
+                session, batch_df, queries, concept, dead_letter, phases
+            )
+            rows += len(queries)
+            failed_rows += batch_failed
+            batch_latencies.extend(latencies)
+
+    return make_load_stats(
+        rows,
+        failed_rows,
+        batch_latencies,
+        time.perf_counter() - start,
+        failed_rows,
+        phases,
+    )
+
+
+def load_pipeline(
+    client,
+    keyspace: str,
+    chunks,
+    format_chunk,
+    concept: str,
+    batch_size: int = 100,
+    workers: int = 2,
+    queue_size: int = 8,
+    dead_letter=None,
+) -> dict:
+    """
+    Purpose:
+        Load a stream of chunks through a producer and consumer pipeline.
+        This thread reads and formats rows into batches on a bounded queue,
+        committer threads each with their own session drain it. A full queue
+        holds the reader back, so memory stays flat whatever the source speed
+    Args:
+        client: The Grakn client
+        keyspace: the keyspace to load into
+        chunks: iterable of dataframes
+        format_chunk: function that turns a dataframe into the rows to
+            insert, their queries and the load stats of rows left out
+        concept: the concept being loaded
+        batch_size: number of rows to commit per write transaction
+        workers: number of committer threads
+        queue_size: number of batches that can wait on the queue
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        load_stats: details of the load
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1 not {batch_size}")
+    if workers < 1:
+        raise ValueError(f"workers must be at least 1 not {workers}")
+
+    start = time.perf_counter()
+    batch_queue = queue.Queue(maxsize=queue_size)
+    stats_list = []
+    phases = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                commit_from_queue, client, keyspace, batch_queue, concept, dead_letter
+            )
+            for _ in range(workers)
+        ]
+
+        try:
+            for chunk in chunks:
+                format_start = time.perf_counter()
+                rows_df, queries, skipped_stats = format_chunk(chunk)
+                format_time = time.perf_counter() - format_start
+                stats_list.append(skipped_stats)
+
+                # resolving keys is counted in its own phase
+                add_phase(
+                    phases,
+                    "format",
+                    format_time - skipped_stats["phases"].get("resolve", 0.0),
+                )
+
+                put_start = time.perf_counter()
+                for batch_start in range(0, len(queries), batch_size):
+                    batch = (
+                        rows_df.iloc[batch_start : batch_start + batch_size],
+                        queries[batch_start : batch_start + batch_size],
+                    )
+                    put_work(batch_queue, batch, futures)
+                # time the reader is held back by a full queue
+                add_phase(phases, "producer_wait", time.perf_counter() - put_start)
+        finally:
+            stop_workers(batch_queue, futures)
+
+        stats_list.extend(future.result() for future in futures)
+
+    stats_list.append(make_load_stats(0, 0, [], 0.0, phases=phases))
+    load_stats = merge_load_stats(stats_list, time.perf_counter() - start)
+    load_stats["workers"] = workers
+    logging.info(
+        f"Loaded {load_stats['committed_rows']} {concept} rows with a pipeline "
+        f"of {workers} committers"
+    )
+
+    return load_stats
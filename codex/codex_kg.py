@@ -1,24 +1,38 @@
+import copy
 import logging
 import json
+import time
+from contextlib import contextmanager
+from itertools import chain
 from typing import Any, Dict, List, Tuple
 
 import pandas as pd
-from grakn.client import GraknClient
 import redis
 
-from .grakn_functions import load_entity_into_grakn
-from .grakn_functions import add_entities_into_grakn
+from .grakn_functions import TYPE_SAMPLE_SIZE, define_schema
+from .grakn_functions import make_entity_schema, make_relationship_schema
+from .grakn_functions import add_entities_into_grakn, add_entities_with_workers
 from .grakn_functions import (
-    load_relationship_into_grakn,
     add_relationship_data,
+    add_relationship_data_with_workers,
+    find_pages,
     get_all_entities,
     get_all_rels,
+    prefetch_pages,
     query_grakn,
     raw_query_read_grakn,
     raw_query_write_grakn,
 )
 
-from .codex_query import CodexQuery, CodexQueryRule
+from .codex_pool import acquire_pool, release_pool
+from .codex_cache import CACHED_ACTIONS, RESULT_TTL, CodexResultCache
+from .codex_cache import CONCEPT_MAPS, KEYSPACE_MARKER, merge_concept
+from .codex_cache import shared_local_cache
+from .codex_ingest import read_source, load_chunks, load_with_processes
+from .codex_ingest import source_fingerprint, export_graql, load_graql_files
+from .codex_ingest import load_pipeline, entity_formatter, relationship_formatter
+from .grakn_functions import make_entity_queries, make_relationship_queries
+from .codex_query import CodexFindResult, CodexQuery, CodexQueryRule, QueryOptions
 from .codex_query_builder import (
     find_action,
     compute_action,
@@ -38,6 +52,15 @@ class CodexKg:
         redis_db=0,
         redis_password=None,
         use_redis=True,
+        dead_letter=None,
+        checkpoint_interval=0.0,
+        save_load_stats=False,
+        pool_size=4,
+        share_pool=True,
+        query_options=None,
+        cache_results=True,
+        result_ttl=RESULT_TTL,
+        use_local_cache=True,
     ):
         """
         Purpose:
@@ -49,6 +72,23 @@ class CodexKg:
             redis_port: redis port
             redis_db: redis db
             redis_password: redis credentials
+            use_redis: keep the concept maps in redis
+            dead_letter: csv or json lines file to write rows that fail to load,
+                a .csv path is written as one file per concept, path_concept.csv
+            checkpoint_interval: least seconds between the checkpoints of a
+                resumable load, 0 saves one after every committed batch. With
+                a longer interval a resumed load can insert the batches
+                committed since the last checkpoint again
+            save_load_stats: keep the load stats of each concept in redis
+            pool_size: number of idle grakn sessions kept per keyspace
+            share_pool: share the grakn client and sessions with other
+                CodexKg of the same uri
+            query_options: QueryOptions of every read, calls can override them
+            cache_results: keep the answers of find, compute and cluster in
+                redis until the keyspace is written to
+            result_ttl: seconds the answers are kept
+            use_local_cache: keep the decoded concept maps and small answers
+                in this process, checked against their redis version
         Returns:
             N/A
         """
@@ -59,7 +99,24 @@ class CodexKg:
         self.rel_map = {}
         self.rkey = ""
         self.rules_map = {}
+        # names of the concepts changed since the maps were saved
+        self.changed = {map_name: set() for map_name in CONCEPT_MAPS}
         self.use_redis = use_redis
+        self.load_stats = {}
+        self.dead_letter = dead_letter
+        self.checkpoint_interval = checkpoint_interval
+        self.save_load_stats = save_load_stats
+        self.pool_size = pool_size
+        self.share_pool = share_pool
+        self.pool = None
+        self.query_options = query_options if query_options else QueryOptions()
+        self.cache_results = cache_results
+        self.result_ttl = result_ttl
+        # result cache of the keyspace, made by create_db
+        self.results = None
+        self.local_cache = shared_local_cache if use_redis and use_local_cache else None
+        # local keys of different redis servers are kept apart
+        self.redis_location = f"{redis_host}:{redis_port}/{redis_db}/"
 
         # new stuff who dis
         # self.lookup = {}
@@ -78,352 +135,1588 @@ class CodexKg:
                 logging.error("Couldnt connect to cache:" + str(error))
                 raise
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, tb):
+        self.close()
+
+    @contextmanager
+    def grakn_client(self, write=False):
+        """
+        Purpose:
+            Get the session pool for a with block, it stands in for a
+            GraknClient and is opened on first use
+        Args:
+            write: the block writes to the keyspace, cached answers are
+                dropped when it ends, even when it fails part way
+        Returns:
+            client: the session pool of the grakn uri
+        """
+        if self.pool is None:
+            self.pool = acquire_pool(
+                self.uri, self.creds, self.pool_size, self.share_pool
+            )
+
+        try:
+            yield self.pool
+        finally:
+            if write and self.results is not None:
+                self.results.bump()
+
+    def close(self) -> None:
+        """
+        Purpose:
+            Give back the grakn client and sessions, they are closed when no
+            other CodexKg shares them
+        Args:
+            N/A
+        Returns:
+            N/A
+        """
+        if self.pool is not None:
+            release_pool(self.pool)
+            self.pool = None
+
     def get_concepts_grakn(self):
         """
         Purpose:
-            Get all concept in current keyspace
+            Get all concept in current keyspace
+        Args:
+            N/A
+        Returns:
+            entity_map: Entity concepts
+            rel_map: Relation concepts
+        """
+        logging.info("get all concepts")
+
+        try:
+            with self.grakn_client() as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    entity_map = get_all_entities(session)
+                    rel_map = get_all_rels(session, entity_map)
+
+                    return entity_map, rel_map
+        except Exception as error:
+            logging.error(error)
+            return -1
+
+    def get_keyspaces(self) -> list:
+        """
+        Purpose:
+            Get all Grakn keyspaces
+        Args:
+            N/A
+        Returns:
+            List of keyspaces
+        """
+        try:
+            with self.grakn_client() as client:
+                return client.keyspaces().retrieve()
+        except Exception as error:
+            logging.error(error)
+            return []
+
+    def create_db(self, db_name: str, check_grakn=False, concepts=None) -> int:
+        """
+        Purpose:
+            Connect to Grakn keyspace
+        Args:
+            db_name: keyspace
+            check_grakn: read the concepts of a keyspace not in redis from grakn
+            concepts: entities and relationships to load from redis, all
+                when None
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        logging.info("creating new keyspace " + db_name)
+        logging.info("Connecting to grakn at " + self.uri)
+        # start session create new db
+        try:
+            with self.grakn_client() as client:
+                # logging.info(f"making key space...{db_name}")
+                with client.session(keyspace=str(db_name)):
+                    pass
+                self.keyspace = db_name
+
+                # logging.info("key space made")
+
+                # check if keyspace exists in redis
+                key_prefix = "grakn_keyspace_"
+                rkey = key_prefix + db_name
+                self.rkey = rkey
+
+                if self.use_redis and self.cache_results:
+                    self.results = CodexResultCache(
+                        self.cache,
+                        rkey,
+                        self.result_ttl,
+                        self.local_cache,
+                        self.redis_location,
+                    )
+
+                self.changed = {map_name: set() for map_name in CONCEPT_MAPS}
+                curr_keyspace = (
+                    self.load_concept_maps(concepts) if self.use_redis else None
+                )
+
+                if curr_keyspace is not None:
+                    # load data
+                    logging.info("Loading data from redis")
+
+                    self.entity_map = curr_keyspace["entity_map"]
+                    self.rel_map = curr_keyspace["rel_map"]
+                    self.rules_map = curr_keyspace["rules_map"]
+                    # self.query_map = {}
+                    # self.lookup_map = {}
+
+                    # logging.info(self.rkey)
+                    # logging.info(self.rel_map)
+                    # self.query_map = curr_keyspace["query_map"]
+                    # self.lookup_map = curr_keyspace["lookup_map"]
+
+                else:
+                    logging.info("Creating new keypsace in redis")
+
+                    # check the db if there is data first
+
+                    # make sure we use grakn if not using redis
+                    if not self.use_redis:
+                        check_grakn = True
+
+                    if check_grakn:
+                        logging.info("Checking grakn for concepts")
+                        ent_map, rel_map = self.get_concepts_grakn()
+                    else:
+                        ent_map = {}
+                        rel_map = {}
+
+                    # TODO someother time for nl queries
+                    # blank_keyspace["lookup_map"] = {}
+                    # blank_keyspace["lookup_map"]["Find"] = {}
+                    # blank_keyspace["lookup_map"]["Compute"] = {}
+                    # blank_keyspace["lookup_map"]["Cluster"] = {}
+                    # blank_keyspace["lookup_map"]["Reason"] = {}
+                    # blank_keyspace["lookup_map"]["Center"] = {}
+                    # blank_keyspace["query_map"] = {}
+                    self.entity_map = ent_map
+                    self.rel_map = rel_map
+                    self.rules_map = {}
+
+                    if self.use_redis:
+                        self.changed["entity_map"].update(ent_map)
+                        self.changed["rel_map"].update(rel_map)
+                        self.save_concept_maps()
+
+                return 0
+        except Exception as error:
+            logging.error(error)
+            return -1
+
+    def delete_db(self, db_name: str) -> int:
+        """
+        Purpose:
+            Delete Grakn keyspace
+        Args:
+            db_name: keyspace
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        logging.info("Connecting to grakn at " + self.uri)
+        logging.info("Deleteing keyspace " + db_name)
+
+        # start session create new db
+        try:
+            with self.grakn_client(write=True) as client:
+                client.close_keyspace(self.keyspace)
+                client.keyspaces().delete(self.keyspace)
+
+                # delete redis key as well
+                if self.use_redis:
+                    pipe = self.cache.pipeline()
+                    pipe.delete(self.rkey)
+                    for map_name in CONCEPT_MAPS:
+                        pipe.delete(self.concept_map_key(map_name))
+                    pipe.incr(self.schema_version_key())
+                    pipe.execute()
+                    for key in self.cache.scan_iter(self.checkpoint_key("*")):
+                        self.cache.delete(key)
+                self.entity_map = {}
+                self.rel_map = {}
+
+                return 0
+        except Exception as error:
+            logging.error(error)
+            return -1
+
+    @contextmanager
+    def staged_schema(self):
+        """
+        Purpose:
+            Keep the changes the with block makes to the concept maps only
+            when it ends without an error, so concepts that failed to define
+            are never saved to redis
+        Args:
+            N/A
+        Returns:
+            N/A
+        """
+        # the schema methods change copies, the old maps are left as they were
+        saved = (self.entity_map, self.rel_map, copy.deepcopy(self.changed))
+
+        try:
+            yield
+        except Exception:
+            self.entity_map, self.rel_map, self.changed = saved
+            raise
+
+    def entity_schema(
+        self,
+        df: pd.DataFrame,
+        entity_name: str,
+        entity_key=None,
+        sample_size=TYPE_SAMPLE_SIZE,
+    ) -> str:
+        """
+        Purpose:
+            Add the entity to the entity map and make its define query.
+            Defines run it inside staged_schema, a failed define leaves the
+            maps as they were
+        Args:
+            df: Entity data to infer the schema from
+            entity_name: name for the entity
+            entity_key: key for the entity
+            sample_size: number of rows sampled to infer each column type
+        Returns:
+            graql_insert_query: define query for the entity
+        """
+        cols, graql_insert_query = make_entity_schema(
+            df, entity_name, entity_key, sample_size
+        )
+
+        # the maps can be shared with the local cache, change a copy
+        self.entity_map = copy.deepcopy(self.entity_map)
+        self.changed["entity_map"].add(entity_name)
+        self.entity_map[entity_name] = {}  # TODO do we want to check if key exisits?
+        self.entity_map[entity_name]["key"] = entity_key
+        self.entity_map[entity_name]["cols"] = cols
+
+        # {Productize} = {plays : produces, with_ent: Company}
+        # create rels array here rels [  {plays: produces, in_rel: Productize. with_ent: Company}
+        self.entity_map[entity_name]["rels"] = {}
+
+        return graql_insert_query
+
+    def define_entity(
+        self,
+        session,
+        df: pd.DataFrame,
+        entity_name: str,
+        entity_key=None,
+        sample_size=TYPE_SAMPLE_SIZE,
+    ) -> None:
+        """
+        Purpose:
+            Define the entity schema in Grakn and the entity map
+        Args:
+            session: The Grakn session
+            df: Entity data to infer the schema from
+            entity_name: name for the entity
+            entity_key: key for the entity
+            sample_size: number of rows sampled to infer each column type
+        Returns:
+            N/A
+        """
+        with self.staged_schema():
+            define_schema(
+                session, [self.entity_schema(df, entity_name, entity_key, sample_size)]
+            )
+
+    def relationship_schema(
+        self,
+        df: pd.DataFrame,
+        rel_name: str,
+        rel1: str,
+        rel2: str,
+        sample_size=TYPE_SAMPLE_SIZE,
+    ) -> str:
+        """
+        Purpose:
+            Add the relationship to the relationship map and make its define
+            query. Defines run it inside staged_schema, a failed define
+            leaves the maps as they were
+        Args:
+            df: Relationship data to infer the schema from
+            rel_name: relationship name
+            rel1: first relationship
+            rel2: second relationship
+            sample_size: number of rows sampled to infer each column type
+        Returns:
+            graql_insert_query: define query for the relationship
+        """
+        # the maps can be shared with the local cache, change a copy
+        self.entity_map = copy.deepcopy(self.entity_map)
+        self.rel_map = copy.deepcopy(self.rel_map)
+        self.changed["entity_map"].update([rel1, rel2])
+        self.changed["rel_map"].add(rel_name)
+        self.rel_map[rel_name] = {}  # TODO do we want to check if key exisits?
+
+        cols = df.columns
+        attrs = cols[2:]
+
+        self.rel_map[rel_name]["rel1"] = {}
+        self.rel_map[rel_name]["rel1"]["role"] = cols[0]
+        self.rel_map[rel_name]["rel1"]["entity"] = rel1
+        ent_key = self.entity_map[rel1]["key"]
+        self.rel_map[rel_name]["rel1"]["key"] = ent_key
+
+        if self.rel_map[rel_name]["rel1"]["key"] is not None:
+            self.rel_map[rel_name]["rel1"]["key_type"] = self.entity_map[rel1]["cols"][
+                ent_key
+            ]["type"]
+        else:
+            self.rel_map[rel_name]["rel1"]["key_type"] = None
+
+        self.rel_map[rel_name]["rel2"] = {}
+        self.rel_map[rel_name]["rel2"]["role"] = cols[1]
+        self.rel_map[rel_name]["rel2"]["entity"] = rel2
+        ent_key = self.entity_map[rel2]["key"]
+        self.rel_map[rel_name]["rel2"]["key"] = ent_key
+
+        if self.rel_map[rel_name]["rel2"]["key"] is not None:
+            self.rel_map[rel_name]["rel2"]["key_type"] = self.entity_map[rel2]["cols"][
+                ent_key
+            ]["type"]
+        else:
+            self.rel_map[rel_name]["rel2"]["key_type"] = None
+
+        self.rel_map[rel_name]["cols"], graql_insert_query = make_relationship_schema(
+            df, attrs, rel_name, self.rel_map[rel_name], sample_size
+        )
+
+        # {Productize} = {plays : produces, with_ent: Company}
+        self.entity_map[rel1]["rels"][rel_name] = {}
+        self.entity_map[rel1]["rels"][rel_name]["plays"] = cols[0]
+        self.entity_map[rel1]["rels"][rel_name]["with_ent"] = rel2
+
+        # {Productize} = {plays : produces, with_ent: Company}
+        self.entity_map[rel2]["rels"][rel_name] = {}
+        self.entity_map[rel2]["rels"][rel_name]["plays"] = cols[1]
+        self.entity_map[rel2]["rels"][rel_name]["with_ent"] = rel1
+
+        return graql_insert_query
+
+    def define_relationship(
+        self,
+        session,
+        df: pd.DataFrame,
+        rel_name: str,
+        rel1: str,
+        rel2: str,
+        sample_size=TYPE_SAMPLE_SIZE,
+    ) -> None:
+        """
+        Purpose:
+            Define the relationship schema in Grakn and the relationship map
+        Args:
+            session: The Grakn session
+            df: Relationship data to infer the schema from
+            rel_name: relationship name
+            rel1: first relationship
+            rel2: second relationship
+            sample_size: number of rows sampled to infer each column type
+        Returns:
+            N/A
+        """
+        with self.staged_schema():
+            define_schema(
+                session,
+                [self.relationship_schema(df, rel_name, rel1, rel2, sample_size)],
+            )
+
+    def define_schema(
+        self, entities=None, relationships=None, sample_size=TYPE_SAMPLE_SIZE
+    ) -> Tuple[int, str]:
+        """
+        Purpose:
+            Define many entities and relationships in one write transaction,
+            entities are defined before the relationships that use them
+        Args:
+            entities: {entity_name: (df, entity_key)}
+            relationships: {rel_name: (df, rel1, rel2)}
+            sample_size: number of rows sampled to infer each column type
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        if entities is None:
+            entities = {}
+        if relationships is None:
+            relationships = {}
+
+        logging.info(
+            f"Defining {len(entities)} entities and {len(relationships)} relationships"
+        )
+
+        try:
+            with self.staged_schema():
+                queries = []
+
+                for entity_name, (df, entity_key) in entities.items():
+                    queries.append(
+                        self.entity_schema(df, entity_name, entity_key, sample_size)
+                    )
+
+                for rel_name, (df, rel1, rel2) in relationships.items():
+                    queries.append(
+                        self.relationship_schema(df, rel_name, rel1, rel2, sample_size)
+                    )
+
+                with self.grakn_client(write=True) as client:
+                    with client.session(keyspace=self.keyspace) as session:
+                        define_schema(session, queries)
+
+            # add to redis
+            self.save_concept_maps()
+
+            return 0, "good"
+        except Exception as error:
+            logging.error(error)
+            return -1, str(error)
+
+    def save_concept_maps(self) -> None:
+        """
+        Purpose:
+            Save the changed concepts to their redis hashes. Each concept
+            replaces what is in redis, the rels of an entity are merged so
+            writers of other relationships are kept. A write between the
+            read and the MULTI retries it
+        Args:
+            N/A
+        Returns:
+            N/A
+        """
+        if not self.use_redis:
+            return
+
+        changed = {
+            map_name: sorted(names) for map_name, names in self.changed.items() if names
+        }
+        hash_keys = [self.concept_map_key(map_name) for map_name in CONCEPT_MAPS]
+
+        with self.cache.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(self.schema_version_key(), *hash_keys)
+
+                    updates = {}
+                    for map_name, names in changed.items():
+                        concept_map = getattr(self, map_name)
+                        saved = pipe.hmget(self.concept_map_key(map_name), names)
+
+                        updates[map_name] = {}
+                        for name, data in zip(names, saved):
+                            concept = concept_map[name]
+                            if data is not None:
+                                concept = merge_concept(json.loads(data), concept)
+                            updates[map_name][name] = concept
+
+                    pipe.multi()
+                    for map_name, concepts in updates.items():
+                        pipe.hset(
+                            self.concept_map_key(map_name),
+                            mapping={
+                                name: json.dumps(concept)
+                                for name, concept in concepts.items()
+                            },
+                        )
+                    pipe.set(self.rkey, KEYSPACE_MARKER)
+                    pipe.incr(self.schema_version_key())
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    logging.info(f"Concept maps of {self.keyspace} changed, retrying")
+
+        # the maps can be shared with the local cache, change copies
+        for map_name, concepts in updates.items():
+            concept_map = dict(getattr(self, map_name))
+            concept_map.update(concepts)
+            setattr(self, map_name, concept_map)
+            self.changed[map_name] = set()
+
+    def concept_map_key(self, map_name: str) -> str:
+        """
+        Purpose:
+            Get the redis key of the hash of a concept map, a field per
+            concept
+        Args:
+            map_name: entity_map, rel_map or rules_map
+        Returns:
+            key: redis key under the keyspace key
+        """
+        return f"{self.rkey}_{map_name}"
+
+    def schema_version_key(self) -> str:
+        """
+        Purpose:
+            Get the redis key of the version of the concept maps, it is
+            bumped on every write of them
+        Args:
+            N/A
+        Returns:
+            key: redis key under the keyspace key
+        """
+        return f"{self.rkey}_schema_version"
+
+    def load_concept_maps(self, concepts=None) -> dict:
+        """
+        Purpose:
+            Get the concept maps of the keyspace from redis. They are
+            decoded once per version and kept in the local cache, later
+            reads only get the version. The maps are shared, copy them
+            before changing them
+        Args:
+            concepts: entities and relationships to load, all when None.
+                Every rule is loaded
+        Returns:
+            concept_maps: {entity_map, rel_map, rules_map}, None when the
+                keyspace is not in redis
+        """
+        # version first, a write in between makes the next read miss
+        version = self.cache.get(self.schema_version_key())
+        version = int(version) if version is not None else 0
+
+        names = sorted(concepts) if concepts is not None else None
+        local_key = f"{self.redis_location}{self.rkey}/{names}"
+
+        if self.local_cache is not None:
+            concept_maps = self.local_cache.get(local_key, version)
+            if concept_maps is not None:
+                return dict(concept_maps)
+
+        # the version and the maps as of one point in time
+        pipe = self.cache.pipeline()
+        pipe.get(self.schema_version_key())
+        pipe.get(self.rkey)
+        for map_name in CONCEPT_MAPS:
+            if names is None or map_name == "rules_map":
+                pipe.hgetall(self.concept_map_key(map_name))
+            else:
+                pipe.hmget(self.concept_map_key(map_name), names)
+        version, marker, *saved_maps = pipe.execute()
+        version = int(version) if version is not None else 0
+
+        if marker is None:
+            return None
+
+        if marker != KEYSPACE_MARKER.encode("utf-8"):
+            return self.migrate_keyspace(marker, names)
+
+        concept_maps = {}
+        size = 0
+        for map_name, saved in zip(CONCEPT_MAPS, saved_maps):
+            if isinstance(saved, dict):
+                saved = {name.decode("utf-8"): data for name, data in saved.items()}
+            else:
+                saved = {name: data for name, data in zip(names, saved) if data}
+
+            concept_maps[map_name] = {
+                name: json.loads(data) for name, data in saved.items()
+            }
+            size += sum(len(data) for data in saved.values())
+
+        if self.local_cache is not None:
+            self.local_cache.put(local_key, concept_maps, version, size)
+
+        return dict(concept_maps)
+
+    def migrate_keyspace(self, data: bytes, names=None) -> dict:
+        """
+        Purpose:
+            Move a keyspace saved as one json string to concept hashes
+        Args:
+            data: the saved json string
+            names: entities and relationships to return, all when None
+        Returns:
+            concept_maps: {entity_map, rel_map, rules_map}
+        """
+        logging.info(f"Moving the concept maps of {self.keyspace} to hashes")
+
+        curr_keyspace = json.loads(data)
+
+        pipe = self.cache.pipeline()
+        for map_name in CONCEPT_MAPS:
+            concept_map = curr_keyspace.get(map_name, {})
+            if concept_map:
+                pipe.hset(
+                    self.concept_map_key(map_name),
+                    mapping={
+                        name: json.dumps(concept)
+                        for name, concept in concept_map.items()
+                    },
+                )
+        pipe.set(self.rkey, KEYSPACE_MARKER)
+        pipe.incr(self.schema_version_key())
+        pipe.execute()
+
+        concept_maps = {}
+        for map_name in CONCEPT_MAPS:
+            concept_map = curr_keyspace.get(map_name, {})
+            if names is not None and map_name != "rules_map":
+                concept_map = {
+                    name: concept
+                    for name, concept in concept_map.items()
+                    if name in names
+                }
+            concept_maps[map_name] = concept_map
+
+        return concept_maps
+
+    def checkpoint_key(self, concept: str) -> str:
+        """
+        Purpose:
+            Get the redis key of the load checkpoint for a concept
+        Args:
+            concept: name of the entity or relationship
+        Returns:
+            key: redis key under the keyspace key
+        """
+        return f"{self.rkey}_checkpoint_{concept}"
+
+    def report_load(self, concept: str) -> None:
+        """
+        Purpose:
+            Log the telemetry of the last load and keep it in redis when
+            save_load_stats is set
+        Args:
+            concept: name of the entity or relationship loaded
+        Returns:
+            N/A
+        """
+        self.load_stats["concept"] = concept
+        self.load_stats["keyspace"] = self.keyspace
+        self.load_stats["finished"] = time.time()
+
+        latency = self.load_stats["batch_latency"]
+        phases = ", ".join(
+            f"{phase} {seconds:.3f}s"
+            for phase, seconds in self.load_stats["phases"].items()
+        )
+        logging.info(
+            f"Loaded {self.load_stats['committed_rows']} {concept} rows at "
+            f"{self.load_stats['rows_per_sec']:,.0f} rows/sec, batch p50 "
+            f"{latency['p50']:.3f}s p99 {latency['p99']:.3f}s, phases: {phases}"
+        )
+
+        if self.use_redis and self.save_load_stats:
+            self.cache.set(
+                f"{self.rkey}_load_{concept}", json.dumps(self.load_stats, default=str)
+            )
+
+    def get_checkpoint(self, source, concept: str, resume: bool) -> Tuple[Any, int]:
+        """
+        Purpose:
+            Get where to start loading a source and how to checkpoint it
+        Args:
+            source: DataFrame, csv path, glob of csv shards or list of them
+            concept: name of the entity or relationship
+            resume: checkpoint the load and continue from the checkpoint of
+                an earlier load, the source is only fingerprinted when set
+        Returns:
+            save_checkpoint: function that saves the number of rows done,
+                None when not resuming
+            offset: number of rows already loaded
+        """
+        if not resume:
+            return None, 0
+
+        if not self.use_redis:
+            raise ValueError("Resuming a load needs redis for the checkpoints")
+
+        key = self.checkpoint_key(concept)
+        fingerprint = source_fingerprint(source)
+        offset = 0
+
+        if self.cache.exists(key):
+            checkpoint = json.loads(self.cache.get(key))
+
+            if checkpoint["fingerprint"] == fingerprint:
+                offset = checkpoint["rows"]
+                logging.info(f"Resuming {concept} load from row {offset}")
+            else:
+                logging.info(f"Source of {concept} changed, loading from the start")
+
+        def save_checkpoint(rows: int) -> None:
+            self.cache.set(key, json.dumps({"fingerprint": fingerprint, "rows": rows}))
+
+        return save_checkpoint, offset
+
+    def entity_loader(self, client, session, entity_name: str, batch_size, workers):
+        """
+        Purpose:
+            Make the function that loads a chunk of entity rows
+        Args:
+            client: The Grakn client
+            session: The Grakn session
+            entity_name: name for the entity
+            batch_size: number of rows to commit per write transaction
+            workers: number of threads to load with, each with its own session
+        Returns:
+            load_chunk: function of a dataframe and a batch callback
+        """
+        if workers > 1:
+            # batches finish out of order, the chunk is checkpointed when done
+            return lambda chunk, on_batch: add_entities_with_workers(
+                client,
+                self.keyspace,
+                chunk,
+                entity_name,
+                self.entity_map,
+                batch_size,
+                workers,
+                self.dead_letter,
+            )
+
+        return lambda chunk, on_batch: add_entities_into_grakn(
+            session,
+            chunk,
+            entity_name,
+            self.entity_map,
+            batch_size,
+            on_batch,
+            self.dead_letter,
+        )
+
+    def relationship_loader(self, client, session, rel_name: str, batch_size, workers):
+        """
+        Purpose:
+            Make the function that loads a chunk of relationship rows
+        Args:
+            client: The Grakn client
+            session: The Grakn session
+            rel_name: relationship name
+            batch_size: number of rows to commit per write transaction
+            workers: number of threads to load with, each with its own session
+        Returns:
+            load_chunk: function of a dataframe and a batch callback
+        """
+        # concept ids of role players, resolved once per load
+        key_ids = {}
+
+        if workers > 1:
+            # batches finish out of order, the chunk is checkpointed when done
+            return lambda chunk, on_batch: add_relationship_data_with_workers(
+                client,
+                self.keyspace,
+                chunk,
+                self.rel_map[rel_name],
+                rel_name,
+                batch_size,
+                workers,
+                key_ids,
+                self.dead_letter,
+            )
+
+        return lambda chunk, on_batch: add_relationship_data(
+            chunk,
+            self.rel_map[rel_name],
+            rel_name,
+            session,
+            batch_size,
+            on_batch,
+            key_ids,
+            self.dead_letter,
+        )
+
+    def create_entity(
+        self,
+        df: pd.DataFrame,
+        entity_name: str,
+        entity_key=None,
+        batch_size=1,
+        workers=1,
+        resume=False,
+        export_dir=None,
+    ) -> Tuple[int, str]:
+        """
+        Purpose:
+            Create new entity, details of the load are kept in load_stats
+        Args:
+            df: Relationship data
+            entity_name: name for the entity
+            entity_key: key for the entity
+            batch_size: number of rows to commit per write transaction
+            workers: number of threads to load with, each with its own session
+            resume: checkpoint the load, continuing from the checkpoint of an
+                earlier load of df
+            export_dir: compile only, write the graql to .gql files in this
+                folder instead of loading into Grakn
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        if export_dir is not None:
+            return self.export_entity(df, entity_name, entity_key, export_dir)
+
+        logging.info(f"Creating entity {entity_name}")
+
+        try:
+            save_checkpoint, offset = self.get_checkpoint(df, entity_name, resume)
+
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    self.define_entity(session, df, entity_name, entity_key)
+
+                    # logging.info(self.entity_map)
+                    self.load_stats = load_chunks(
+                        read_source(df),
+                        self.entity_loader(
+                            client, session, entity_name, batch_size, workers
+                        ),
+                        save_checkpoint,
+                        offset,
+                        self.checkpoint_interval,
+                    )
+
+                    # add to redis
+                    self.save_concept_maps()
+
+                    self.report_load(entity_name)
+
+                    return 0, "good"
+        except Exception as error:
+            logging.error(error)
+            return -1, str(error)
+
+    def add_entities(
+        self, df: pd.DataFrame, entity_name: str, batch_size=1, workers=1, resume=False
+    ) -> Tuple[int, str]:
+        """
+        Purpose:
+            Add entites, details of the load are kept in load_stats
+        Args:
+            df: Relationship data
+            entity_name: name for the entity
+            batch_size: number of rows to commit per write transaction
+            workers: number of threads to load with, each with its own session
+            resume: checkpoint the load, continuing from the checkpoint of an
+                earlier load of df
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        logging.info(f"Adding to entity {entity_name}")
+
+        try:
+            save_checkpoint, offset = self.get_checkpoint(df, entity_name, resume)
+
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+
+                    # logging.info(self.entity_map)
+                    self.load_stats = load_chunks(
+                        read_source(df),
+                        self.entity_loader(
+                            client, session, entity_name, batch_size, workers
+                        ),
+                        save_checkpoint,
+                        offset,
+                        self.checkpoint_interval,
+                    )
+
+                    self.report_load(entity_name)
+
+                    return 0, "good"
+        except Exception as error:
+            logging.error(error)
+            return -1, str(error)
+
+    def create_relationship(
+        self,
+        df: pd.DataFrame,
+        rel_name: str,
+        rel1: str,
+        rel2: str,
+        batch_size=1,
+        workers=1,
+        resume=False,
+        export_dir=None,
+    ) -> Tuple[int, str]:
+        """
+        Purpose:
+            Create Relationship, details of the load are kept in load_stats
+        Args:
+            df: Relationship data
+            rel_name: relationship name
+            rel1: first relationship
+            rel2: second relationship
+            batch_size: number of rows to commit per write transaction
+            workers: number of threads to load with, each with its own session
+            resume: checkpoint the load, continuing from the checkpoint of an
+                earlier load of df
+            export_dir: compile only, write the graql to .gql files in this
+                folder instead of loading into Grakn
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        if export_dir is not None:
+            return self.export_relationship(df, rel_name, rel1, rel2, export_dir)
+
+        logging.info(f"Creating relationship {rel_name}")
+        try:
+            save_checkpoint, offset = self.get_checkpoint(df, rel_name, resume)
+
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    self.define_relationship(session, df, rel_name, rel1, rel2)
+
+                    # logging.info(self.rel_map)
+                    self.load_stats = load_chunks(
+                        read_source(df),
+                        self.relationship_loader(
+                            client, session, rel_name, batch_size, workers
+                        ),
+                        save_checkpoint,
+                        offset,
+                        self.checkpoint_interval,
+                    )
+
+                    # add to redis
+                    self.save_concept_maps()
+
+                    self.report_load(rel_name)
+
+                    return 0, "good"
+        except Exception as error:
+            logging.error(error)
+            return -1, str(error)
+
+    def add_relationships(
+        self,
+        df: pd.DataFrame,
+        rel_name: str,
+        batch_size=1,
+        workers=1,
+        resume=False,
+    ) -> Tuple[int, str]:
+        """
+        Purpose:
+            Add relationships, details of the load are kept in load_stats
+        Args:
+            df: Relationship data
+            rel_name: name for the relationship
+            batch_size: number of rows to commit per write transaction
+            workers: number of threads to load with, each with its own session
+            resume: checkpoint the load, continuing from the checkpoint of an
+                earlier load of df
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        logging.info(f"Adding to relationship {rel_name}")
+
+        try:
+            save_checkpoint, offset = self.get_checkpoint(df, rel_name, resume)
+
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+
+                    self.load_stats = load_chunks(
+                        read_source(df),
+                        self.relationship_loader(
+                            client, session, rel_name, batch_size, workers
+                        ),
+                        save_checkpoint,
+                        offset,
+                        self.checkpoint_interval,
+                    )
+
+                    self.report_load(rel_name)
+
+                    return 0, "good"
+        except Exception as error:
+            logging.error(error)
+            return -1, str(error)
+
+    def export_entity(
+        self, source, entity_name: str, entity_key, export_dir: str
+    ) -> Tuple[int, str]:
+        """
+        Purpose:
+            Compile an entity load to .gql files without a Grakn connection,
+            the written files are kept in load_stats. The entity is added to
+            the maps of this CodexKg only, redis gets it from load_graql_files
+        Args:
+            source: DataFrame, csv path, glob of csv shards or list of them
+            entity_name: name for the entity
+            entity_key: key for the entity
+            export_dir: folder to write the files to
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        logging.info(f"Exporting entity {entity_name} to {export_dir}")
+        changed = copy.deepcopy(self.changed)
+
+        try:
+            chunks = read_source(source)
+            first_chunk = next(chunks)
+            schema_query = self.entity_schema(first_chunk, entity_name, entity_key)
+
+            paths = export_graql(
+                export_dir,
+                "Entity",
+                entity_name,
+                schema_query,
+                chain([first_chunk], chunks),
+                lambda df: make_entity_queries(df, entity_name, self.entity_map),
+            )
+            self.load_stats = {"exported_files": paths}
+
+            return 0, "good"
+        except Exception as error:
+            logging.error(error)
+            return -1, str(error)
+        finally:
+            # nothing is in the keyspace until the files are loaded, keep
+            # the exported concepts out of redis
+            self.changed = changed
+
+    def export_relationship(
+        self, source, rel_name: str, rel1: str, rel2: str, export_dir: str
+    ) -> Tuple[int, str]:
+        """
+        Purpose:
+            Compile a relationship load to .gql files without a Grakn
+            connection, role players are matched on their keys. The written
+            files are kept in load_stats. The relationship is added to the
+            maps of this CodexKg only, redis gets it from load_graql_files
+        Args:
+            source: DataFrame, csv path, glob of csv shards or list of them
+            rel_name: relationship name
+            rel1: first relationship
+            rel2: second relationship
+            export_dir: folder to write the files to
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        logging.info(f"Exporting relationship {rel_name} to {export_dir}")
+        changed = copy.deepcopy(self.changed)
+
+        try:
+            chunks = read_source(source)
+            first_chunk = next(chunks)
+            schema_query = self.relationship_schema(first_chunk, rel_name, rel1, rel2)
+
+            paths = export_graql(
+                export_dir,
+                "Relationship",
+                rel_name,
+                schema_query,
+                chain([first_chunk], chunks),
+                lambda df: make_relationship_queries(
+                    df, rel_name, self.rel_map[rel_name]
+                ),
+            )
+            self.load_stats = {"exported_files": paths}
+
+            return 0, "good"
+        except Exception as error:
+            logging.error(error)
+            return -1, str(error)
+        finally:
+            # nothing is in the keyspace until the files are loaded, keep
+            # the exported concepts out of redis
+            self.changed = changed
+
+    def load_graql_files(self, paths, batch_size=100, workers=1) -> Tuple[int, str]:
+        """
+        Purpose:
+            Replay .gql files made by export_entity and export_relationship,
+            details of the load are kept in load_stats
+        Args:
+            paths: .gql files, globs of them or a list of both
+            batch_size: number of statements to commit per write transaction
+            workers: number of threads to load with, each file gets its own session
+        Returns:
+            status: 0 if pass, -1 if fail
+        """
+        logging.info(f"Loading graql files {paths}")
+
+        try:
+            with self.grakn_client(write=True) as client:
+                self.load_stats = load_graql_files(
+                    client, self.keyspace, paths, batch_size, workers, self.dead_letter
+                )
+
+            # the schema came from the files, read the concept maps back
+            concept_maps = self.get_concepts_grakn()
+            if concept_maps == -1:
+                raise ValueError(
+                    "Loaded the graql files, but could not read their concepts "
+                    "back from Grakn"
+                )
+
+            self.entity_map, self.rel_map = concept_maps
+            self.changed["entity_map"].update(self.entity_map)
+            self.changed["rel_map"].update(self.rel_map)
+            self.save_concept_maps()
+
+            self.report_load("graql_files")
+
+            return 0, "good"
+        except Exception as error:
+            logging.error(error)
+            return -1, str(error)
+
+    def create_entity_from_csv(
+        self,
+        path: str,
+        entity_name: str,
+        entity_key=None,
+        chunksize=10000,
+        batch_size=100,
+        workers=1,
+        resume=False,
+    ) -> Tuple[int, str]:
+        """
+        Purpose:
+            Create new entity by streaming a csv in chunks, the schema comes
+            from the first chunk. Details of the load are kept in load_stats
         Args:
-            N/A
+            path: csv path or glob of csv shards, can be compressed
+            entity_name: name for the entity
+            entity_key: key for the entity
+            chunksize: number of rows to read at a time
+            batch_size: number of rows to commit per write transaction
+            workers: number of threads to load with, each with its own session
+            resume: checkpoint the load, continuing from the checkpoint of an
+                earlier load of path
         Returns:
-            entity_map: Entity concepts
-            rel_map: Relation concepts
+            status: 0 if pass, -1 if fail
         """
-        logging.info("get all concepts")
+        logging.info(f"Creating entity {entity_name} from {path}")
 
         try:
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
+            save_checkpoint, offset = self.get_checkpoint(path, entity_name, resume)
+            chunks = read_source(path, chunksize)
+            first_chunk = next(chunks)
+
+            with self.grakn_client(write=True) as client:
                 with client.session(keyspace=self.keyspace) as session:
-                    entity_map = get_all_entities(session)
-                    rel_map = get_all_rels(session, entity_map)
+                    self.define_entity(session, first_chunk, entity_name, entity_key)
 
-                    return entity_map, rel_map
+                    # add to redis
+                    self.save_concept_maps()
+
+                    self.load_stats = load_chunks(
+                        chain([first_chunk], chunks),
+                        self.entity_loader(
+                            client, session, entity_name, batch_size, workers
+                        ),
+                        save_checkpoint,
+                        offset,
+                        self.checkpoint_interval,
+                    )
+
+                    self.report_load(entity_name)
+
+                    return 0, "good"
         except Exception as error:
             logging.error(error)
-            return -1
+            return -1, str(error)
 
-    def get_keyspaces(self) -> list:
+    def create_relationship_from_csv(
+        self,
+        path: str,
+        rel_name: str,
+        rel1: str,
+        rel2: str,
+        chunksize=10000,
+        batch_size=100,
+        workers=1,
+        resume=False,
+    ) -> Tuple[int, str]:
         """
         Purpose:
-            Get all Grakn keyspaces
+            Create Relationship by streaming a csv in chunks, the schema comes
+            from the first chunk. Details of the load are kept in load_stats
         Args:
-            N/A
+            path: csv path or glob of csv shards, can be compressed
+            rel_name: relationship name
+            rel1: first relationship
+            rel2: second relationship
+            chunksize: number of rows to read at a time
+            batch_size: number of rows to commit per write transaction
+            workers: number of threads to load with, each with its own session
+            resume: checkpoint the load, continuing from the checkpoint of an
+                earlier load of path
         Returns:
-            List of keyspaces
+            status: 0 if pass, -1 if fail
         """
+        logging.info(f"Creating relationship {rel_name} from {path}")
+
         try:
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
-                return client.keyspaces().retrieve()
+            save_checkpoint, offset = self.get_checkpoint(path, rel_name, resume)
+            chunks = read_source(path, chunksize)
+            first_chunk = next(chunks)
+
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    self.define_relationship(session, first_chunk, rel_name, rel1, rel2)
+
+                    # add to redis
+                    self.save_concept_maps()
+
+                    self.load_stats = load_chunks(
+                        chain([first_chunk], chunks),
+                        self.relationship_loader(
+                            client, session, rel_name, batch_size, workers
+                        ),
+                        save_checkpoint,
+                        offset,
+                        self.checkpoint_interval,
+                    )
+
+                    self.report_load(rel_name)
+
+                    return 0, "good"
         except Exception as error:
             logging.error(error)
-            return []
+            return -1, str(error)
 
-    def create_db(self, db_name: str, check_grakn=False) -> int:
+    def create_entity_sharded(
+        self,
+        source,
+        entity_name: str,
+        entity_key=None,
+        batch_size=100,
+        workers=2,
+        chunksize=100000,
+    ) -> Tuple[int, str]:
         """
         Purpose:
-            Connect to Grakn keyspace
+            Create new entity from a large source with a pool of processes,
+            details of the load are kept in load_stats
         Args:
-            db_name: keyspace
+            source: DataFrame, csv path, glob of csv shards or list of them
+            entity_name: name for the entity
+            entity_key: key for the entity
+            batch_size: number of rows to commit per write transaction
+            workers: number of processes to load with, each with its own session
+            chunksize: number of rows to read at a time
         Returns:
             status: 0 if pass, -1 if fail
         """
-        logging.info("creating new keyspace " + db_name)
-        logging.info("Connecting to grakn at " + self.uri)
-        # start session create new db
-        try:
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
-                # logging.info(f"making key space...{db_name}")
-                client.session(keyspace=str(db_name))
-                self.keyspace = db_name
-
-                # logging.info("key space made")
-
-                # check if keyspace exists in redis
-                key_prefix = "grakn_keyspace_"
-                rkey = key_prefix + db_name
-                self.rkey = rkey
-
-                if self.use_redis and self.cache.exists(rkey):
-                    # load data
-                    logging.info("Loading data from redis")
-
-                    curr_keyspace = json.loads(self.cache.get(self.rkey))
-                    self.entity_map = curr_keyspace["entity_map"]
-                    self.rel_map = curr_keyspace["rel_map"]
-                    self.rules_map = curr_keyspace["rules_map"]
-                    # self.query_map = {}
-                    # self.lookup_map = {}
-
-                    # logging.info(self.rkey)
-                    # logging.info(self.rel_map)
-                    # self.query_map = curr_keyspace["query_map"]
-                    # self.lookup_map = curr_keyspace["lookup_map"]
-
-                else:
-                    logging.info("Creating new keypsace in redis")
-                    blank_keyspace = {}
+        logging.info(f"Creating entity {entity_name} with {workers} processes")
 
-                    # check the db if there is data first
-
-                    # make sure we use grakn if not using redis
-                    if not self.use_redis:
-                        check_grakn = True
-
-                    if check_grakn:
-                        logging.info("Checking grakn for concepts")
-                        ent_map, rel_map = self.get_concepts_grakn()
-                    else:
-                        ent_map = {}
-                        rel_map = {}
-
-                    blank_keyspace["entity_map"] = ent_map
-                    blank_keyspace["rel_map"] = rel_map
-                    blank_keyspace["rules_map"] = {}
+        try:
+            chunks = read_source(source, chunksize)
+            first_chunk = next(chunks)
 
-                    # TODO someother time for nl queries
-                    # blank_keyspace["lookup_map"] = {}
-                    # blank_keyspace["lookup_map"]["Find"] = {}
-                    # blank_keyspace["lookup_map"]["Compute"] = {}
-                    # blank_keyspace["lookup_map"]["Cluster"] = {}
-                    # blank_keyspace["lookup_map"]["Reason"] = {}
-                    # blank_keyspace["lookup_map"]["Center"] = {}
-                    # blank_keyspace["query_map"] = {}
-                    if self.use_redis:
-                        self.cache.set(rkey, json.dumps(blank_keyspace))
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    self.define_entity(session, first_chunk, entity_name, entity_key)
 
-                    self.entity_map = ent_map
-                    self.rel_map = rel_map
+            # add to redis
+            self.save_concept_maps()
 
-                return 0
+            return self.add_sharded(
+                chain([first_chunk], chunks), entity_name, batch_size, workers
+            )
         except Exception as error:
             logging.error(error)
-            return -1
+            return -1, str(error)
 
-    def delete_db(self, db_name: str) -> int:
+    def create_relationship_sharded(
+        self,
+        source,
+        rel_name: str,
+        rel1: str,
+        rel2: str,
+        batch_size=100,
+        workers=2,
+        chunksize=100000,
+    ) -> Tuple[int, str]:
         """
         Purpose:
-            Delete Grakn keyspace
+            Create Relationship from a large source with a pool of processes,
+            details of the load are kept in load_stats
         Args:
-            db_name: keyspace
+            source: DataFrame, csv path, glob of csv shards or list of them
+            rel_name: relationship name
+            rel1: first relationship
+            rel2: second relationship
+            batch_size: number of rows to commit per write transaction
+            workers: number of processes to load with, each with its own session
+            chunksize: number of rows to read at a time
         Returns:
             status: 0 if pass, -1 if fail
         """
-        logging.info("Connecting to grakn at " + self.uri)
-        logging.info("Deleteing keyspace " + db_name)
+        logging.info(f"Creating relationship {rel_name} with {workers} processes")
 
-        # start session create new db
         try:
-            with GraknClient(uri=self.uri) as client:
-                client.keyspaces().delete(self.keyspace)
+            chunks = read_source(source, chunksize)
+            first_chunk = next(chunks)
 
-                # delete redis key as well
-                if self.use_redis:
-                    self.cache.delete(self.rkey)
-                self.entity_map = {}
-                self.rel_map = {}
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    self.define_relationship(session, first_chunk, rel_name, rel1, rel2)
 
-                return 0
+            # add to redis
+            self.save_concept_maps()
+
+            return self.add_sharded(
+                chain([first_chunk], chunks), rel_name, batch_size, workers
+            )
         except Exception as error:
             logging.error(error)
-            return -1
+            return -1, str(error)
 
-    def create_entity(
-        self, df: pd.DataFrame, entity_name: str, entity_key=None
+    def add_sharded(
+        self, source, concept: str, batch_size=100, workers=2, chunksize=100000
     ) -> Tuple[int, str]:
         """
         Purpose:
-            Create new entity
+            Add entities or relationships from a large source with a pool of
+            processes. Rows are partitioned on the entity key, so the same
+            entity always goes to the same worker. Details of the load are
+            kept in load_stats
         Args:
-            df: Relationship data
-            entity_name: name for the entity
-            entity_key: key for the entity
+            source: DataFrame, csv path, glob of csv shards or list of them
+            concept: name of an existing entity or relationship
+            batch_size: number of rows to commit per write transaction
+            workers: number of processes to load with, each with its own session
+            chunksize: number of rows to read at a time
         Returns:
             status: 0 if pass, -1 if fail
         """
-        logging.info(f"Creating entity {entity_name}")
+        logging.info(f"Adding to {concept} with {workers} processes")
 
         try:
-            # df = pd.read_csv(csv_path)
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
-                with client.session(keyspace=self.keyspace) as session:
-                    self.entity_map[
-                        entity_name
-                    ] = {}  # TODO do we want to check if key exisits?
-                    self.entity_map[entity_name]["key"] = entity_key
-                    self.entity_map[entity_name]["cols"] = load_entity_into_grakn(
-                        session, df, entity_name, entity_key
-                    )
+            chunks = read_source(source, chunksize)
 
-                    # {Productize} = {plays : produces, with_ent: Company}
-                    # create rels array here rels [  {plays: produces, in_rel: Productize. with_ent: Company}
-                    self.entity_map[entity_name]["rels"] = {}
+            if concept in self.entity_map:
+                concept_type = "Entity"
+                concept_map = self.entity_map
+                key = self.entity_map[concept]["key"]
 
-                    # logging.info(self.entity_map)
-                    add_entities_into_grakn(session, df, entity_name, self.entity_map)
+                if key is None:
+                    key = list(self.entity_map[concept]["cols"].keys())[0]
 
-                    # add to redis
-                    # get current key space
-                    if self.use_redis:
-                        curr_keyspace = json.loads(self.cache.get(self.rkey))
-                        # update entity map
-                        curr_keyspace["entity_map"] = self.entity_map
-                        # update redis
-                        self.cache.set(self.rkey, json.dumps(curr_keyspace))
+            elif concept in self.rel_map:
+                concept_type = "Relationship"
+                concept_map = self.rel_map[concept]
+                key = self.rel_map[concept]["rel1"]["role"]
 
-                    return 0, "good"
+            else:
+                raise ValueError(f"{concept} is not an entity or a relationship")
+
+            try:
+                self.load_stats = load_with_processes(
+                    self.uri,
+                    self.creds,
+                    self.keyspace,
+                    chunks,
+                    concept_type,
+                    concept,
+                    concept_map,
+                    key,
+                    batch_size,
+                    workers,
+                    dead_letter=self.dead_letter,
+                )
+            finally:
+                # the worker processes write with their own clients, drop the
+                # cached answers even when the load fails part way
+                if self.results is not None:
+                    self.results.bump()
+
+            self.report_load(concept)
+
+            return 0, "good"
         except Exception as error:
             logging.error(error)
             return -1, str(error)
 
-    def add_entities(self, df: pd.DataFrame, entity_name: str) -> Tuple[int, str]:
+    def create_entity_pipeline(
+        self,
+        source,
+        entity_name: str,
+        entity_key=None,
+        batch_size=100,
+        workers=2,
+        queue_size=8,
+        chunksize=10000,
+    ) -> Tuple[int, str]:
         """
         Purpose:
-            Add entites
+            Create new entity through a bounded pipeline, the schema comes
+            from the first chunk. Details of the load are kept in load_stats
         Args:
-            df: Relationship data
+            source: DataFrame, csv path, chunked csv reader or iterator of dicts
             entity_name: name for the entity
+            entity_key: key for the entity
+            batch_size: number of rows to commit per write transaction
+            workers: number of committer threads, each with its own session
+            queue_size: number of batches that can wait for a committer
+            chunksize: number of rows to read at a time
         Returns:
             status: 0 if pass, -1 if fail
         """
-        logging.info(f"Adding to entity {entity_name}")
+        logging.info(f"Creating entity {entity_name} with a pipeline")
 
         try:
-            # df = pd.read_csv(csv_path)
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
-                with client.session(keyspace=self.keyspace) as session:
-
-                    # logging.info(self.entity_map)
-                    add_entities_into_grakn(session, df, entity_name, self.entity_map)
+            chunks = read_source(source, chunksize)
+            first_chunk = next(chunks)
 
-                    return 0, "good"
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    self.define_entity(session, first_chunk, entity_name, entity_key)
+
+            # add to redis
+            self.save_concept_maps()
+
+            return self.add_pipeline(
+                chain([first_chunk], chunks),
+                entity_name,
+                batch_size,
+                workers,
+                queue_size,
+                chunksize,
+            )
         except Exception as error:
             logging.error(error)
             return -1, str(error)
 
-    def create_relationship(
-        self, df: pd.DataFrame, rel_name: str, rel1: str, rel2: str
+    def create_relationship_pipeline(
+        self,
+        source,
+        rel_name: str,
+        rel1: str,
+        rel2: str,
+        batch_size=100,
+        workers=2,
+        queue_size=8,
+        chunksize=10000,
     ) -> Tuple[int, str]:
         """
         Purpose:
-            Create Relationship
+            Create Relationship through a bounded pipeline, the schema comes
+            from the first chunk. Details of the load are kept in load_stats
         Args:
-            df: Relationship data
+            source: DataFrame, csv path, chunked csv reader or iterator of dicts
             rel_name: relationship name
             rel1: first relationship
             rel2: second relationship
+            batch_size: number of rows to commit per write transaction
+            workers: number of committer threads, each with its own session
+            queue_size: number of batches that can wait for a committer
+            chunksize: number of rows to read at a time
         Returns:
             status: 0 if pass, -1 if fail
         """
-        logging.info(f"Creating relationship {rel_name}")
-        try:
-            # df = pd.read_csv(csv_path)
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
-                with client.session(keyspace=self.keyspace) as session:
-                    self.rel_map[
-                        rel_name
-                    ] = {}  # TODO do we want to check if key exisits?
-
-                    cols = df.columns
-                    attrs = cols[2:]
-
-                    self.rel_map[rel_name]["rel1"] = {}
-                    self.rel_map[rel_name]["rel1"]["role"] = cols[0]
-                    self.rel_map[rel_name]["rel1"]["entity"] = rel1
-                    ent_key = self.entity_map[rel1]["key"]
-                    self.rel_map[rel_name]["rel1"]["key"] = ent_key
-
-                    if self.rel_map[rel_name]["rel1"]["key"] is not None:
-                        self.rel_map[rel_name]["rel1"]["key_type"] = self.entity_map[
-                            rel1
-                        ]["cols"][ent_key]["type"]
-                    else:
-                        self.rel_map[rel_name]["rel1"]["key_type"] = None
-
-                    self.rel_map[rel_name]["rel2"] = {}
-                    self.rel_map[rel_name]["rel2"]["role"] = cols[1]
-                    self.rel_map[rel_name]["rel2"]["entity"] = rel2
-                    ent_key = self.entity_map[rel2]["key"]
-                    self.rel_map[rel_name]["rel2"]["key"] = ent_key
-
-                    if self.rel_map[rel_name]["rel2"]["key"] is not None:
-                        self.rel_map[rel_name]["rel2"]["key_type"] = self.entity_map[
-                            rel2
-                        ]["cols"][ent_key]["type"]
-                    else:
-                        self.rel_map[rel_name]["rel2"]["key_type"] = None
-
-                    self.rel_map[rel_name]["cols"] = load_relationship_into_grakn(
-                        session, df, attrs, rel_name, self.rel_map[rel_name]
-                    )
-
-                    # {Productize} = {plays : produces, with_ent: Company}
-                    self.entity_map[rel1]["rels"][rel_name] = {}
-                    self.entity_map[rel1]["rels"][rel_name]["plays"] = cols[0]
-                    self.entity_map[rel1]["rels"][rel_name]["with_ent"] = rel2
-
-                    # {Productize} = {plays : produces, with_ent: Company}
-                    self.entity_map[rel2]["rels"][rel_name] = {}
-                    self.entity_map[rel2]["rels"][rel_name]["plays"] = cols[1]
-                    self.entity_map[rel2]["rels"][rel_name]["with_ent"] = rel1
-
-                    # logging.info(self.rel_map)
-                    add_relationship_data(df, self.rel_map[rel_name], rel_name, session)
+        logging.info(f"Creating relationship {rel_name} with a pipeline")
 
-                    # get current key space
-                    if self.use_redis:
-                        curr_keyspace = json.loads(self.cache.get(self.rkey))
-                        # update both maps
-                        curr_keyspace["rel_map"] = self.rel_map
-                        curr_keyspace["entity_map"] = self.entity_map
-                        # update redis
-                        self.cache.set(self.rkey, json.dumps(curr_keyspace))
+        try:
+            chunks = read_source(source, chunksize)
+            first_chunk = next(chunks)
 
-                    return 0, "good"
+            with self.grakn_client(write=True) as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    self.define_relationship(session, first_chunk, rel_name, rel1, rel2)
+
+            # add to redis
+            self.save_concept_maps()
+
+            return self.add_pipeline(
+                chain([first_chunk], chunks),
+                rel_name,
+                batch_size,
+                workers,
+                queue_size,
+                chunksize,
+            )
         except Exception as error:
             logging.error(error)
             return -1, str(error)
 
-    def add_relationships(
+    def add_pipeline(
         self,
-        df: pd.DataFrame,
-        rel_name: str,
+        source,
+        concept: str,
+        batch_size=100,
+        workers=2,
+        queue_size=8,
+        chunksize=10000,
     ) -> Tuple[int, str]:
         """
         Purpose:
-            Add entites
+            Add entities or relationships through a bounded pipeline. This
+            thread formats rows into batches, committer threads load them.
+            Details of the load are kept in load_stats
         Args:
-            df: Relationship data
-            rel_name: name for the relationship
+            source: DataFrame, csv path, chunked csv reader or iterator of dicts
+            concept: name of an existing entity or relationship
+            batch_size: number of rows to commit per write transaction
+            workers: number of committer threads, each with its own session
+            queue_size: number of batches that can wait for a committer
+            chunksize: number of rows to read at a time
         Returns:
             status: 0 if pass, -1 if fail
         """
-        logging.info(f"Adding to relationship {rel_name}")
+        logging.info(f"Adding to {concept} with a pipeline of {workers} committers")
 
         try:
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
+            chunks = read_source(source, chunksize)
+
+            with self.grakn_client(write=True) as client:
                 with client.session(keyspace=self.keyspace) as session:
+                    if concept in self.entity_map:
+                        format_chunk = entity_formatter(
+                            concept, self.entity_map, self.dead_letter
+                        )
+                    elif concept in self.rel_map:
+                        format_chunk = relationship_formatter(
+                            session, concept, self.rel_map[concept], self.dead_letter
+                        )
+                    else:
+                        raise ValueError(
+                            f"{concept} is not an entity or a relationship"
+                        )
+
+                    self.load_stats = load_pipeline(
+                        client,
+                        self.keyspace,
+                        chunks,
+                        format_chunk,
+                        concept,
+                        batch_size,
+                        workers,
+                        queue_size,
+                        self.dead_letter,
+                    )
 
-                    add_relationship_data(df, self.rel_map[rel_name], rel_name, session)
+            self.report_load(concept)
 
-                    return 0, "good"
+            return 0, "good"
         except Exception as error:
             logging.error(error)
             return -1, str(error)
 
-    def raw_graql(self, graql_string: str, mode: str) -> dict:
+    def raw_graql(self, graql_string: str, mode: str, options=None) -> dict:
         """
         Purpose:
             Run raw graql queries
         Args:
             query_object: the query object
+            options: QueryOptions of a read, over the ones of the CodexKg
         Returns:
             answers: answers to the query
         """
         try:
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
+            with self.grakn_client(write=mode != "read") as client:
                 with client.session(keyspace=self.keyspace) as session:
 
                     if mode == "read":
-                        return raw_query_read_grakn(session, graql_string)
+                        return raw_query_read_grakn(
+                            session, graql_string, self.query_options.override(options)
+                        )
                     else:
                         return raw_query_write_grakn(session, graql_string)
 
@@ -442,30 +1735,65 @@ class CodexKg:
         """
         logging.info(f"{query_object}")
         try:
-            with GraknClient(uri=self.uri, credentials=self.creds) as client:
+            cached = self.results is not None and query_object.action in CACHED_ACTIONS
+            if cached:
+                answers, version = self.results.get(query_object)
+                if answers is not None:
+                    return answers
+
+            with self.grakn_client(write=query_object.action == "Rule") as client:
                 with client.session(keyspace=self.keyspace) as session:
 
                     if query_object.action == "Rule":
 
                         rule_name = query_object.rule["name"]
+                        self.rules_map = dict(self.rules_map)
                         self.rules_map[rule_name] = query_grakn(session, query_object)
 
-                        # get current key space
-                        curr_keyspace = json.loads(self.cache.get(self.rkey))
-                        # update rules maps
-                        curr_keyspace["rules_map"] = self.rules_map
                         # update redis
-                        self.cache.set(self.rkey, json.dumps(curr_keyspace))
+                        self.changed["rules_map"].add(rule_name)
+                        self.save_concept_maps()
 
                         return self.rules_map[rule_name]
 
                     else:
-                        return query_grakn(session, query_object)
+                        answers = query_grakn(session, query_object)
+
+                        if cached and answers is not None:
+                            self.results.set(query_object, answers, version)
+
+                        return answers
 
         except Exception as error:
             logging.error(error)
             return None
 
+    def read_options(self, query_object: CodexQuery, options=None) -> CodexQuery:
+        """
+        Purpose:
+            Set the QueryOptions of a read. Finds that touch no rule
+            relation run without inference unless it is asked for
+        Args:
+            query_object: the query object
+            options: QueryOptions of the call
+        Returns:
+            query_object: the query object with its options
+        """
+        query_object.options = self.query_options.override(options)
+
+        if query_object.action == "Find" and query_object.options.infer is None:
+            touched = set()
+            for concept in query_object.concepts:
+                touched.add(concept["concept"])
+                for attr in concept["attrs"]:
+                    touched.update([attr.get("rel_name"), attr.get("rel_ent")])
+
+            query_object.options.infer = any(
+                rule_name in touched for rule_name in self.rules_map
+            )
+
+        return query_object
+
     def search_rule(self, rule_name: str) -> dict:
         """
         Purpose:
@@ -621,6 +1949,11 @@ class CodexKg:
         with_rel_attrs: list = [],
         with_rel_conds: list = [],
         with_rel_values: list = [],
+        return_attrs=None,
+        limit=None,
+        offset=None,
+        lazy=False,
+        options=None,
     ):
         """
         Purpose:
@@ -638,6 +1971,12 @@ class CodexKg:
             with_rel_attrs=attributes of the relationship ,
             with_rel_conds=conditions of the relationship ,
             with_rel_values=values of the relationship ,
+            return_attrs=attributes to return, a list for concept or
+                {concept: attributes}. All when None
+            limit=most answers of each graql query to return, all when None
+            offset=number of answers of each graql query to skip
+            lazy=return a CodexFindResult that runs the query when asked
+            options=QueryOptions of the call, over the ones of the CodexKg
         Returns:
             answers: answers to the query
         """
@@ -658,12 +1997,99 @@ class CodexKg:
             with_rel_attrs,
             with_rel_conds,
             with_rel_values,
+            return_attrs,
+            limit,
+            offset,
         )
+        self.read_options(query_obj, options)
+
+        if lazy:
+            return CodexFindResult(self, query_obj)
 
         # do query..
         return self.query(query_obj)
 
-    def compute(self, actions: list, concepts: list, concept_attrs: list):
+    def find_iter(
+        self,
+        concept: str,
+        concept_attrs: list = [],
+        concept_conds: list = [],
+        concept_values: list = [],
+        rel_actions: list = [],
+        concept_rels: list = [],
+        concept_rel_attrs: list = [],
+        concept_rel_conds: list = [],
+        concept_rel_values: list = [],
+        with_rel_attrs: list = [],
+        with_rel_conds: list = [],
+        with_rel_values: list = [],
+        return_attrs=None,
+        limit=None,
+        offset=None,
+        page_size=1000,
+        options=None,
+    ):
+        """
+        Purpose:
+            Find data in Knowledge Graph a page at a time, the next page is
+            read in the background while the caller works on the current one.
+            Answers of an entity with a key are sorted on that key only.
+            Pages of other concepts, and of answers that share a key with
+            different related concepts, are best effort and can skip or
+            repeat answers
+        Args:
+            concept: Concept to find
+            concept_attrs: Concept attributes
+            concept_conds: condition for attribute
+            concept_values: value for condition
+            rel_actions: Find releation attrubite
+            concept_rels= Relation to search for
+            concept_rel_attrs=attributes for relation attribute
+            concept_rel_conds=conditions for relation attribute
+            concept_rel_values=values for relation attribute,
+            with_rel_attrs=attributes of the relationship ,
+            with_rel_conds=conditions of the relationship ,
+            with_rel_values=values of the relationship ,
+            return_attrs=attributes to return, a list for concept or
+                {concept: attributes}. All when None
+            limit=most answers of each graql query to return, all when None
+            offset=number of answers of each graql query to skip
+            page_size=most answers of each graql query per page
+            options=QueryOptions of the call, over the ones of the CodexKg
+        Returns:
+            pages: generator of answers to the query, one per page
+        """
+
+        logging.info(f"Finding {concept} data in pages of {page_size}")
+
+        query_obj = find_action(
+            self,
+            concept,
+            concept_attrs,
+            concept_conds,
+            concept_values,
+            rel_actions,
+            concept_rels,
+            concept_rel_attrs,
+            concept_rel_conds,
+            concept_rel_values,
+            with_rel_attrs,
+            with_rel_conds,
+            with_rel_values,
+            return_attrs,
+            limit,
+            offset,
+        )
+        self.read_options(query_obj, options)
+
+        def make_pages():
+            with self.grakn_client() as client:
+                with client.session(keyspace=self.keyspace) as session:
+                    yield from find_pages(session, query_obj, page_size)
+
+        return prefetch_pages(make_pages)
+
+    def compute(self, actions: list, concepts: list, concept_attrs: list, options=None):
         """
         Purpose:
             Do a compute query
@@ -671,12 +2097,14 @@ class CodexKg:
             actions - compute actions
             concepts - list of concepts to compute on
             concept_attrs: concepts attributes to compute
+            options: QueryOptions of the call, over the ones of the CodexKg
         Returns:
             compute_obj: answer to query
         """
         logging.info(f"Computing data")
 
         query_obj = compute_action(self, actions, concepts, concept_attrs)
+        self.read_options(query_obj, options)
 
         # do query.
         return self.query(query_obj)
@@ -689,6 +2117,7 @@ class CodexKg:
         cluster_concepts: list = None,
         given_type: str = None,
         k_min: int = None,
+        options=None,
     ):
         """
         Purpose:
@@ -700,6 +2129,7 @@ class CodexKg:
             cluster_concepts: List of concepts to cluster
             given_type: concept to filter on
             k_min- how many K groups
+            options: QueryOptions of the call, over the ones of the CodexKg
         Returns:
             rule_resp: rule object
         """
@@ -715,6 +2145,7 @@ class CodexKg:
             given_type,
             k_min,
         )
+        self.read_options(query_obj, options)
 
         # do query.
-        return self.query(query_obj)
\ No newline at end of file
+        return self.query(query_obj)
@@ -0,0 +1,255 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from grakn.client import GraknClient
+
+from .grakn_functions import check_session
+
+
+logging.basicConfig(
+    format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO
+)
+
+# seconds a pooled session can sit idle before it is checked on checkout
+HEALTH_CHECK_INTERVAL = 30.0
+
+# pools shared by CodexKg instances, by uri and credentials
+shared_pools = {}
+shared_pools_lock = threading.Lock()
+
+
+class CodexPool:
+    def __init__(
+        self, uri: str, credentials=None, size=4, check_interval=HEALTH_CHECK_INTERVAL
+    ):
+        """
+        Purpose:
+            Create a long lived Grakn client with a pool of sessions per
+            keyspace. The client and the sessions are opened on first use.
+            It can stand in for a GraknClient, session(keyspace) hands out a
+            pooled session for the length of a with block
+        Args:
+            uri: grakn url
+            credentials: grakn credentials
+            size: number of idle sessions kept per keyspace
+            check_interval: seconds idle before a session is checked on checkout
+        Returns:
+            N/A
+        """
+        if size < 1:
+            raise ValueError(f"size must be at least 1 not {size}")
+
+        self.uri = uri
+        self.creds = credentials
+        self.size = size
+        self.check_interval = check_interval
+        self.users = 0
+        self.grakn_client = None
+        # bumped by close, sessions of an older client are not pooled again
+        self.generation = 0
+        # {keyspace: [(session, time returned)]}
+        self.idle = {}
+        self.lock = threading.Lock()
+
+    def client(self) -> GraknClient:
+        """
+        Purpose:
+            Get the Grakn client, opening it on first use
+        Args:
+            N/A
+        Returns:
+            client: The Grakn client
+        """
+        with self.lock:
+            if self.grakn_client is None:
+                logging.info("Opening grakn client for " + self.uri)
+                self.grakn_client = GraknClient(uri=self.uri, credentials=self.creds)
+
+            return self.grakn_client
+
+    def keyspaces(self):
+        """
+        Purpose:
+            Get the keyspace service of the client
+        Args:
+            N/A
+        Returns:
+            keyspaces: the Grakn keyspace service
+        """
+        return self.client().keyspaces()
+
+    def checkout(self, keyspace: str):
+        """
+        Purpose:
+            Take an idle session of a keyspace, or open a new one. Sessions
+            idle for longer than check_interval are checked first and
+            dropped when they fail
+        Args:
+            keyspace: the keyspace of the session
+        Returns:
+            session: The Grakn session
+        """
+        while True:
+            with self.lock:
+                if not self.idle.get(keyspace):
+                    break
+                session, returned = self.idle[keyspace].pop()
+
+            if time.monotonic() - returned < self.check_interval:
+                return session
+
+            try:
+                check_session(session)
+                return session
+            except Exception as error:
+                logging.info(f"Dropping stale session of {keyspace}: {error}")
+                close_quietly(session)
+
+        return self.client().session(keyspace=keyspace)
+
+    def checkin(self, keyspace: str, session, generation: int) -> None:
+        """
+        Purpose:
+            Give a session back to the pool, it is closed when the pool of
+            the keyspace is full or the pool was closed since checkout
+        Args:
+            keyspace: the keyspace of the session
+            session: The Grakn session
+            generation: the generation of the pool at checkout
+        Returns:
+            N/A
+        """
+        with self.lock:
+            idle = self.idle.setdefault(keyspace, [])
+            if generation == self.generation and len(idle) < self.size:
+                idle.append((session, time.monotonic()))
+                return
+
+        close_quietly(session)
+
+    @contextmanager
+    def session(self, keyspace: str):
+        """
+        Purpose:
+            Borrow a session of a keyspace for a with block. A session that
+            raised is closed rather than given back, it may have lost its
+            connection
+        Args:
+            keyspace: the keyspace of the session
+        Returns:
+            session: The Grakn session
+        """
+        generation = self.generation
+        session = self.checkout(keyspace)
+
+        try:
+            yield session
+        except BaseException:
+            close_quietly(session)
+            raise
+
+        self.checkin(keyspace, session, generation)
+
+    def close_keyspace(self, keyspace: str) -> None:
+        """
+        Purpose:
+            Close the idle sessions of a keyspace, before it is deleted
+        Args:
+            keyspace: the keyspace of the sessions
+        Returns:
+            N/A
+        """
+        with self.lock:
+            idle = self.idle.pop(keyspace, [])
+
+        for session, _ in idle:
+            close_quietly(session)
+
+    def close(self) -> None:
+        """
+        Purpose:
+            Close every idle session and the client. Borrowed sessions are
+            closed when they are given back, the next use opens a new client
+        Args:
+            N/A
+        Returns:
+            N/A
+        """
+        with self.lock:
+            keyspaces = list(self.idle.keys())
+            client, self.grakn_client = self.grakn_client, None
+            self.generation += 1
+
+        for keyspace in keyspaces:
+            self.close_keyspace(keyspace)
+
+        if client is not None:
+            client.close()
+
+
+def close_quietly(session) -> None:
+    """
+    Purpose:
+       Close a session, a session that cannot be closed is logged and dropped
+    Args:
+        session: The Grakn session
+    Returns:
+        N/A
+    """
+    try:
+        session.close()
+    except Exception as error:
+        logging.info(f"Could not close session: {error}")
+
+
+def acquire_pool(uri: str, credentials=None, size=4, shared=True) -> CodexPool:
+    """
+    Purpose:
+       Get a session pool for a Grakn uri, shared pools are reused by every
+       caller with the same uri and credentials
+    Args:
+        uri: grakn url
+        credentials: grakn credentials
+        size: number of idle sessions kept per keyspace, when the pool is made
+        shared: reuse the pool of other callers
+    Returns:
+        pool: the session pool, give it back with release_pool
+    """
+    if not shared:
+        pool = CodexPool(uri, credentials, size)
+        pool.users = 1
+        return pool
+
+    key = (uri, repr(credentials))
+
+    with shared_pools_lock:
+        if key not in shared_pools:
+            shared_pools[key] = CodexPool(uri, credentials, size)
+
+        pool = shared_pools[key]
+        pool.users += 1
+
+        return pool
+
+
+def release_pool(pool: CodexPool) -> None:
+    """
+    Purpose:
+       Give back a pool from acquire_pool, it is closed with its last user
+    Args:
+        pool: the session pool
+    Returns:
+        N/A
+    """
+    with shared_pools_lock:
+        pool.users -= 1
+        if pool.users > 0:
+            return
+
+        key = (pool.uri, repr(pool.creds))
+        if shared_pools.get(key) is pool:
+            del shared_pools[key]
+
+    pool.close()
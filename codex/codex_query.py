@@ -1,5 +1,7 @@
+import copy
 import logging
 import json
+import time
 from typing import Any, Dict, List
 
 import pandas as pd
@@ -8,15 +10,66 @@ import redis
 
 from abc import ABC, abstractmethod
 
+from .grakn_functions import (
+    count_find_query,
+    exists_find_query,
+    find_query,
+    make_answers_df_map,
+    make_find_queries,
+)
+
 
 logging.basicConfig(
     format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO
 )
 
 
+class QueryOptions:
+    def __init__(self, infer: bool = None, explain: bool = None, batch_size=None):
+        """
+        Purpose:
+            Options of the graql queries of a read, None keeps the default
+        Args:
+            infer: run the rules of the keyspace
+            explain: keep the explanations of inferred answers
+            batch_size: answers streamed per request, an int or "all"
+        Returns:
+            N/A
+        """
+        self.infer = infer
+        self.explain = explain
+        self.batch_size = batch_size
+
+    def override(self, options=None):
+        """
+        Purpose:
+            Make new options where the options set on a call win
+        Args:
+            options: QueryOptions of the call
+        Returns:
+            query_options: the merged QueryOptions
+        """
+        query_options = copy.copy(self)
+
+        if options is not None:
+            for option in ["infer", "explain", "batch_size"]:
+                if getattr(options, option) is not None:
+                    setattr(query_options, option, getattr(options, option))
+
+        return query_options
+
+    def __repr__(self):
+        return (
+            f"QueryOptions(infer={self.infer}, explain={self.explain}, "
+            f"batch_size={self.batch_size})"
+        )
+
+
 class CodexQuery(ABC):
 
     action = "CodexQuery"
+    # QueryOptions of the graql queries, set by CodexKg
+    options = None
 
     def __init__(self):
         """
@@ -38,15 +91,139 @@ class CodexQueryFind(CodexQuery):
         self,
         concepts: dict,
         query_string: str,
+        return_attrs: dict = None,
+        limit: int = None,
+        offset: int = None,
     ) -> None:
 
         self.concepts = concepts
         self.query_string = query_string
+        # {concept: attributes to return}, concepts left out return all
+        self.return_attrs = return_attrs if return_attrs is not None else {}
+        # answers of each graql query to return and to skip
+        self.limit = limit
+        self.offset = offset
 
     def __repr__(self):
         return f"{self.query_string}"
 
 
+class CodexFindResult:
+    def __init__(self, codexkg, query_object: CodexQueryFind) -> None:
+        """
+        Purpose:
+            Lazy result of a find, nothing runs until a method asks for it
+        Args:
+            codexkg: the CodexKg to query
+            query_object: the compiled find
+        Returns:
+            N/A
+        """
+        self.codexkg = codexkg
+        self.query_object = query_object
+        self.graql_queries, _ = make_find_queries(query_object)
+        # {"operation", "graql_queries", "seconds"} of each call
+        self.timings = []
+
+    def __repr__(self):
+        return f"{self.graql_queries}"
+
+    def run(self, operation: str, run_query):
+        """
+        Purpose:
+            Run a query with a pooled session and keep its graql and timing
+        Args:
+            operation: name of the call
+            run_query: function of a session returning (answer, graql queries)
+        Returns:
+            answer: answer of the query, None if it failed
+        """
+        start = time.perf_counter()
+
+        try:
+            with self.codexkg.grakn_client() as client:
+                with client.session(keyspace=self.codexkg.keyspace) as session:
+                    answer, graql_queries = run_query(session)
+        except Exception as error:
+            logging.error(error)
+            return None
+
+        self.timings.append(
+            {
+                "operation": operation,
+                "graql_queries": graql_queries,
+                "seconds": time.perf_counter() - start,
+            }
+        )
+        return answer
+
+    def count(self) -> int:
+        """
+        Purpose:
+            Count the matches on the server
+        Args:
+            N/A
+        Returns:
+            count: number of answers
+        """
+        return self.run(
+            "count", lambda session: count_find_query(session, self.query_object)
+        )
+
+    def exists(self) -> bool:
+        """
+        Purpose:
+            Check for any match, only one answer is read
+        Args:
+            N/A
+        Returns:
+            exists: True if anything matches
+        """
+        return self.run(
+            "exists", lambda session: exists_find_query(session, self.query_object)
+        )
+
+    def head(self, n: int = 5) -> dict:
+        """
+        Purpose:
+            Get the first answers
+        Args:
+            n: most answers to get
+        Returns:
+            answers: answers to the query, as find returns them
+        """
+        head_query = copy.copy(self.query_object)
+        if head_query.limit is None or head_query.limit > n:
+            head_query.limit = n
+
+        return self.run("head", lambda session: self.fetch(session, head_query))
+
+    def to_df(self) -> dict:
+        """
+        Purpose:
+            Get every answer
+        Args:
+            N/A
+        Returns:
+            answers: answers to the query, as find returns them
+        """
+        return self.run("to_df", lambda session: self.fetch(session, self.query_object))
+
+    def fetch(self, session, query_object: CodexQueryFind):
+        """
+        Purpose:
+            Run the full find
+        Args:
+            session: The Grakn session
+            query_object: the compiled find
+        Returns:
+            answers: answers to the query, as find returns them
+            graql_queries: the graql queries run
+        """
+        answers, graql_queries, round_trips = find_query(session, query_object)
+        return make_answers_df_map(answers, graql_queries, round_trips), graql_queries
+
+
 class CodexQueryCompute(CodexQuery):
 
     action = "Compute"
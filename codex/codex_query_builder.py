@@ -736,6 +736,9 @@ def find_action(
     with_rel_attrs,
     with_rel_conds,
     with_rel_values,
+    return_attrs=None,
+    limit=None,
+    offset=None,
 ):
     """
     Purpose:
@@ -753,12 +756,35 @@ def find_action(
         with_rel_attrs: attributes of the relationship ,
         with_rel_conds: conditions of the relationship ,
         with_rel_values: values of the relationship ,
+        return_attrs: attributes to return, a list for concept or
+            {concept: attributes} for any concept of the query. All when None
+        limit: most answers of each graql query to return, all when None
+        offset: number of answers of each graql query to skip
     Returns:
         answers: find query object
     """
     ents = list(codexkg.entity_map.keys())
     # rels = list(codexkg.rel_map.keys())
 
+    if return_attrs is None:
+        return_attrs = {}
+    elif not isinstance(return_attrs, dict):
+        return_attrs = {concept: list(return_attrs)}
+
+    for return_concept, attrs in return_attrs.items():
+        if return_concept in ents:
+            attr_list = list(codexkg.entity_map[return_concept]["cols"])
+        elif return_concept in codexkg.rel_map:
+            attr_list = list(codexkg.rel_map[return_concept]["cols"])
+        else:
+            raise ValueError(f"Invalid concept: {return_concept}")
+
+        for attr in attrs:
+            if attr not in attr_list:
+                raise ValueError(
+                    f"{attr} is not a valid attrubite for {return_concept}, select from {attr_list}"
+                )
+
     if concept in ents:
         is_ent = True
         concept_type = "Entity"
@@ -788,6 +814,8 @@ def find_action(
     concept_json = {}
     concept_json["concept"] = concept
     concept_json["concept_type"] = concept_type
+    # pages are sorted on the key
+    concept_json["key"] = codexkg.entity_map[concept]["key"] if is_ent else None
     concept_json["attrs"] = attr_obj_list
     concept_json["query_string"] = query_string_find_maker(concept, attr_obj_list)
     codex_query_list.append(concept_json)
@@ -801,7 +829,13 @@ def find_action(
         query_text = "Enter Query:"
 
     # make a codex_query object here
-    curr_query = CodexQueryFind(concepts=codex_query_list, query_string=query_text)
+    curr_query = CodexQueryFind(
+        concepts=codex_query_list,
+        query_string=query_text,
+        return_attrs=return_attrs,
+        limit=limit,
+        offset=offset,
+    )
 
     return curr_query
 
@@ -1,18 +1,61 @@
 import json
 import logging
+import math
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Tuple
 from dateutil.parser import parse
 
+import numpy as np
 import pandas as pd
 from grakn.client import GraknClient, ValueType
 
-from pandas.api.types import is_string_dtype
+from pandas.api.types import (
+    is_bool_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+    is_numeric_dtype,
+    is_object_dtype,
+    is_string_dtype,
+)
 
 
 logging.basicConfig(
     format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO
 )
 
+# rows to build insert statements for at once
+STATEMENT_BLOCK_SIZE = 10000
+
+# worker threads share a dead letter file, worker processes also lock the file
+dead_letter_lock = threading.Lock()
+
+# upper bounds in seconds of the batch latency histogram buckets
+LATENCY_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# formatted strings kept between loads, cleared when full
+VALUE_MEMO_SIZE = 100000
+# keyed on the raw value, each value is parsed on its own
+date_memo = {}
+text_memo = {}
+# loader threads share the memos
+memo_lock = threading.Lock()
+
+# rows sampled to infer a column type, inferred types kept per column sample
+TYPE_SAMPLE_SIZE = 100
+type_memo = {}
+
+# concept ids matched per query when reading attributes by id
+ID_BLOCK_SIZE = 500
+
+ISO_DATE = re.compile(
+    r"^\d{4}-\d{2}-\d{2}([T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$"
+)
+
 
 def turn_value_type(val: ValueType):
     """
@@ -70,13 +113,144 @@ def rev_value_type(val: str) -> ValueType:
         raise TypeError(f"Invalid value {val}")
 
 
-def check_types(df: pd.DataFrame, col: str) -> ValueType:
+def sample_column(values: pd.Series, sample_size: int) -> pd.Series:
+    """
+    Purpose:
+       Sample the head and some random rows of a column, skipping missing values
+    Args:
+        values: the column to sample
+        sample_size: number of rows to sample
+    Returns:
+        sample: the sampled values
+    """
+    values = values.dropna()
+
+    if len(values) <= sample_size:
+        return values
+
+    head_size = sample_size // 2
+    # fixed seed so the same column always gets the same sample
+    rest = values.iloc[head_size:].sample(sample_size - head_size, random_state=0)
+
+    return pd.concat([values.iloc[:head_size], rest])
+
+
+def column_fingerprint(values: pd.Series, sample: pd.Series) -> tuple:
+    """
+    Purpose:
+       Fingerprint a column by name, dtype and sampled values
+    Args:
+        values: the column
+        sample: the sampled values of the column
+    Returns:
+        fingerprint: key for the type memo
+    """
+    sample_hash = pd.util.hash_pandas_object(sample.map(repr), index=False)
+
+    return (values.name, str(values.dtype), sample_hash.to_numpy().tobytes())
+
+
+def is_date_sample(sample: pd.Series) -> bool:
+    """
+    Purpose:
+       Check if every sampled string is a date
+    Args:
+        sample: sampled strings of a column
+    Returns:
+        is_date: True if all values parse as dates
+    """
+    texts = sample.astype(str).str.strip()
+
+    if texts.str.match(ISO_DATE).all():
+        try:
+            # each value is read on its own, dates and datetimes can mix
+            if pd.to_datetime(texts, format="ISO8601", errors="coerce").notna().all():
+                return True
+        except Exception as error:
+            # mixed timezones and the like
+            logging.debug(f"Falling back to dateutil: {error}")
+
+    # words like May or Monday parse on their own, so a date needs a digit
+    if not texts.str.contains(r"\d").all():
+        return False
+
+    try:
+        for text in texts:
+            parse(text)
+        return True
+    except Exception:
+        return False
+
+
+def is_numeric_sample(sample: pd.Series) -> bool:
+    """
+    Purpose:
+       Check if every sampled value reads as a number
+    Args:
+        sample: sampled values of a column
+    Returns:
+        is_numeric: True if all values are numbers
+    """
+    texts = sample.astype(str).str.strip()
+    return pd.to_numeric(texts, errors="coerce").notna().all()
+
+
+def infer_sample_type(values: pd.Series, sample: pd.Series) -> ValueType:
+    """
+    Purpose:
+       Infer the Grakn type of a column from its sampled values
+    Args:
+        values: the column
+        sample: the sampled values of the column
+    Returns:
+        Grakn Value Type
+    """
+    if is_bool_dtype(values):
+        return ValueType.BOOLEAN
+
+    if is_integer_dtype(values):
+        return ValueType.LONG
+
+    if is_float_dtype(values):
+        return ValueType.DOUBLE
+
+    if not (is_string_dtype(values) or is_object_dtype(values)):
+        raise TypeError(f"Could not figure out type for {values.name}")
+
+    if len(sample) == 0:
+        return ValueType.STRING
+
+    if sample.map(type).isin([bool, np.bool_]).all():
+        return ValueType.BOOLEAN
+
+    if is_numeric_sample(sample):
+        # an object column has some value pandas could not make a number,
+        # check every value before picking a number type
+        texts = values.dropna().astype(str).str.strip()
+        if not pd.to_numeric(texts, errors="coerce").notna().all():
+            return ValueType.STRING
+
+        if texts.str.match(r"^[+-]?\d+$").all():
+            return ValueType.LONG
+        return ValueType.DOUBLE
+
+    if is_date_sample(sample):
+        logging.info(f"This is a date good {sample.iloc[0]}")
+        return ValueType.DATETIME
+
+    return ValueType.STRING
+
+
+def check_types(
+    df: pd.DataFrame, col: str, sample_size: int = TYPE_SAMPLE_SIZE
+) -> ValueType:
     """
     Purpose:
-       Infer dataframe column Grakn type
+       Infer dataframe column Grakn type from a sample of its rows
     Args:
         df: Dataframe
         col: column of dataframe
+        sample_size: number of rows to sample, head and random rows
     Returns:
         Grakn Value Type
     """
@@ -87,27 +261,22 @@ def check_types(df: pd.DataFrame, col: str) -> ValueType:
     if col == "entity":
         raise ValueError("entity is a reserved word sorry, rename your column")
 
-    if is_string_dtype(df[col]):
-
-        # check if string is a date
-        try:
-            parse(df[col][0])
-            logging.info(f"This is a date good {df[col][0]}")
-            return ValueType.DATETIME
-        except:
-            return ValueType.STRING
+    values = df[col]
+    sample = sample_column(values, sample_size)
+    fingerprint = column_fingerprint(values, sample)
 
-    elif str(df[col].dtype) == "float64":
-        return ValueType.DOUBLE
+    if fingerprint in type_memo:
+        return type_memo[fingerprint]
 
-    elif str(df[col].dtype) == "int64":
-        return ValueType.LONG
+    value_type = infer_sample_type(values, sample)
 
-    elif str(df[col].dtype) == "bool":
-        return ValueType.BOOLEAN
+    # numbers in an object column depend on every value, not just the sample
+    if is_numeric_dtype(values) or not is_numeric_sample(sample):
+        if len(type_memo) >= VALUE_MEMO_SIZE:
+            type_memo.clear()
+        type_memo[fingerprint] = value_type
 
-    else:
-        raise TypeError(f"Could not figure out type for {col}")
+    return value_type
 
 
 def create_relationship_query(entity_map: dict, rel_name: str, rel_map: dict) -> str:
@@ -529,7 +698,9 @@ def cluster_query(session, query_object: dict) -> dict:
         concepts = query_object.query["concepts"]
         query = query_object.query["query_string"]
 
-        cluster_obj["answers"] = run_cluster_query(session, query, concepts)
+        cluster_obj["answers"] = run_cluster_query(
+            session, query, concepts, query_object.options
+        )
 
         # if "given_type" in query_object.query:
         #     given_type = query_object.query["given_type"]
@@ -587,7 +758,7 @@ def compute_query(session, query_object: dict) -> dict:
                 logging.info(graql_query)
                 compute_results["graql_queries"].append(graql_query)
 
-                answer = run_compute_query(session, graql_query)
+                answer = run_compute_query(session, graql_query, query_object.options)
                 results_obj["answer"] = answer
                 compute_results[action].append(results_obj)
 
@@ -607,7 +778,7 @@ def compute_query(session, query_object: dict) -> dict:
                 logging.info(graql_query)
                 compute_results["graql_queries"].append(graql_query)
 
-                answer = run_compute_query(session, graql_query)
+                answer = run_compute_query(session, graql_query, query_object.options)
                 results_obj["answer"] = answer
                 compute_results[action].append(results_obj)
 
@@ -803,15 +974,15 @@ def rule_query(session, query_object: dict) -> dict:
     return rules_map
 
 
-def find_query(session, query_object: dict) -> Tuple[dict, list]:
+def make_find_queries(query_object: dict) -> Tuple[list, list]:
     """
     Purpose:
        Construct the find graql query
     Args:
-        session: The Grakn session
         query_object: The details of the query
     Returns:
-        answers: Answers to the queries
+        concept_queries: the graql queries to run
+        concepts: The concepts we are looking for
     """
     # for each concept make a query
     concepts = []
@@ -938,8 +1109,264 @@ def find_query(session, query_object: dict) -> Tuple[dict, list]:
         grakn_query = f"match ${concepts[0]} isa {concepts[0]}; get;"
         concept_queries.append(grakn_query)
 
-    answers = run_find_query(session, concept_queries, concepts)
-    return answers, concept_queries
+    return concept_queries, concepts
+
+
+def query_args(options) -> dict:
+    """
+    Purpose:
+       Turn query options into arguments of transaction.query, options
+       left as None keep the server default
+    Args:
+        options: QueryOptions with infer, explain and batch_size, or None
+    Returns:
+        args: keyword arguments of transaction.query
+    """
+    args = {}
+
+    if options is not None:
+        for option in ["infer", "explain", "batch_size"]:
+            if getattr(options, option) is not None:
+                args[option] = getattr(options, option)
+
+    return args
+
+
+def page_query(graql_query: str, offset=None, limit=None) -> str:
+    """
+    Purpose:
+       Add offset and limit modifiers to a match get query
+    Args:
+        graql_query: the match query, ending with get;
+        offset: number of answers to skip
+        limit: most answers to return
+    Returns:
+        graql_query: the query of the page
+    """
+    if offset:
+        graql_query += f" offset {offset};"
+    if limit is not None:
+        graql_query += f" limit {limit};"
+
+    return graql_query
+
+
+def sort_query(graql_query: str, query_object) -> str:
+    """
+    Purpose:
+       Sort the answers of a match get query on the key of its concept, so
+       pages read with offset and limit do not skip or repeat entities.
+       Graql sorts on one variable only. A find that also returns related
+       concepts has several answers per key, their order and so the pages
+       that split them are best effort. Concepts without a key are not
+       sorted, their pages are best effort too
+    Args:
+        graql_query: the match query, ending with get;
+        query_object: The details of the query
+    Returns:
+        graql_query: the sorted query
+    """
+    concept_keys = {
+        concept["concept"]: concept.get("key") for concept in query_object.concepts
+    }
+    matched = re.match(r"match \$(\S+) isa ", graql_query)
+    key = concept_keys.get(matched.group(1)) if matched else None
+
+    if key is None or not graql_query.endswith("get;"):
+        return graql_query
+
+    variable = matched.group(1)
+    match = graql_query[: -len("get;")].rstrip()
+
+    return f"{match} ${variable} has {key} $codex_sort; get; sort $codex_sort asc;"
+
+
+def find_query(session, query_object: dict) -> Tuple[dict, list, int]:
+    """
+    Purpose:
+       Construct and run the find graql query
+    Args:
+        session: The Grakn session
+        query_object: The details of the query
+    Returns:
+        answers: Answers to the queries
+        concept_queries: the graql queries run
+        round_trips: number of requests sent to Grakn
+    """
+    concept_queries, concepts = make_find_queries(query_object)
+
+    if query_object.offset is not None or query_object.limit is not None:
+        concept_queries = [sort_query(query, query_object) for query in concept_queries]
+
+    answers, round_trips = run_find_query(
+        session,
+        concept_queries,
+        concepts,
+        query_object.return_attrs,
+        query_object.offset,
+        query_object.limit,
+        query_object.options,
+    )
+    paged_queries = [
+        page_query(query, query_object.offset, query_object.limit)
+        for query in concept_queries
+    ]
+    return answers, paged_queries, round_trips
+
+
+def count_find_query(session, query_object) -> Tuple[int, list]:
+    """
+    Purpose:
+       Count the answers of a find on the server, no concept is sent back
+    Args:
+        session: The Grakn session
+        query_object: The details of the query
+    Returns:
+        count: number of answers
+        count_queries: the graql queries run
+    """
+    concept_queries, _ = make_find_queries(query_object)
+    count_queries = [
+        page_query(query, query_object.offset, query_object.limit) + " count;"
+        for query in concept_queries
+    ]
+    count = 0
+
+    with session.transaction().read() as read_transaction:
+        for query in count_queries:
+            for answer in read_transaction.query(
+                query, **query_args(query_object.options)
+            ):
+                count += answer.number()
+
+    return count, count_queries
+
+
+def exists_find_query(session, query_object) -> Tuple[bool, list]:
+    """
+    Purpose:
+       Check if a find has any answer, reading at most one
+    Args:
+        session: The Grakn session
+        query_object: The details of the query
+    Returns:
+        exists: True if there is an answer
+        exists_queries: the graql queries run
+    """
+    concept_queries, _ = make_find_queries(query_object)
+    exists_queries = []
+
+    with session.transaction().read() as read_transaction:
+        for query in concept_queries:
+            exists_queries.append(page_query(query, query_object.offset, 1))
+
+            for _ in read_transaction.query(
+                exists_queries[-1], **query_args(query_object.options)
+            ):
+                return True, exists_queries
+
+    return False, exists_queries
+
+
+def find_pages(session, query_object, page_size: int):
+    """
+    Purpose:
+       Run a find a page at a time in one read transaction, the offset and
+       limit of the query object bound the pages. Answers are sorted on the
+       key of the concept only, see sort_query for when pages are best effort
+    Args:
+        session: The Grakn session
+        query_object: The details of the query
+        page_size: most answers per query in a page
+    Returns:
+        pages: generator of answers_df_map, one per page
+    """
+    if page_size < 1:
+        raise ValueError(f"page_size must be at least 1 not {page_size}")
+
+    concept_queries, concepts = make_find_queries(query_object)
+    concept_queries = [sort_query(query, query_object) for query in concept_queries]
+    offset = query_object.offset or 0
+    remaining = query_object.limit
+
+    with session.transaction().read() as read_transaction:
+        while remaining is None or remaining > 0:
+            limit = page_size if remaining is None else min(page_size, remaining)
+
+            answers, round_trips, most_answers = read_find_answers(
+                read_transaction,
+                concept_queries,
+                concepts,
+                query_object.return_attrs,
+                offset,
+                limit,
+                query_object.options,
+            )
+            paged_queries = [
+                page_query(query, offset, limit) for query in concept_queries
+            ]
+            yield make_answers_df_map(answers, paged_queries, round_trips)
+
+            # a short page is the last one
+            if most_answers < limit:
+                break
+
+            offset += limit
+            if remaining is not None:
+                remaining -= limit
+
+
+def prefetch_pages(make_pages, depth: int = 1):
+    """
+    Purpose:
+       Read pages on a background thread, up to depth pages ahead of the
+       caller. Grakn is only used from that thread
+    Args:
+        make_pages: function that returns the page generator
+        depth: number of pages read ahead
+    Returns:
+        pages: generator of the pages
+    """
+    page_queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put_page(page) -> bool:
+        # give up when the caller stopped reading
+        while not stop.is_set():
+            try:
+                page_queue.put(page, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_pages() -> None:
+        pages = make_pages()
+        try:
+            for page in pages:
+                if not put_page(page):
+                    return
+            put_page(done)
+        except Exception as error:
+            put_page(error)
+        finally:
+            pages.close()
+
+    reader = threading.Thread(target=read_pages, daemon=True)
+    reader.start()
+
+    try:
+        while True:
+            page = page_queue.get()
+            if page is done:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        stop.set()
+        reader.join()
 
 
 # TODO do we need this function?
@@ -966,7 +1393,160 @@ def get_ent_obj(concept: str) -> dict:
     return ent_obj
 
 
-def centrallity_query(session, graql_query: str, concept: str):
+def match_ids(concept_ids: list) -> list:
+    """
+    Purpose:
+       Make match clauses binding $codex_owner to concept ids, a block of
+       ids per clause
+    Args:
+        concept_ids: ids of the concepts
+    Returns:
+        match_clauses: the match clauses
+    """
+    concept_ids = list(dict.fromkeys(concept_ids))
+    match_clauses = []
+
+    for block_start in range(0, len(concept_ids), ID_BLOCK_SIZE):
+        block = concept_ids[block_start : block_start + ID_BLOCK_SIZE]
+
+        if len(block) == 1:
+            match_clauses.append(f"match $codex_owner id {block[0]};")
+        else:
+            ids = " or ".join(
+                f"{{$codex_owner id {concept_id};}}" for concept_id in block
+            )
+            match_clauses.append(f"match {ids};")
+
+    return match_clauses
+
+
+def query_attributes(
+    read_transaction, graql_query: str, owner: str, attributes: dict, options=None
+) -> None:
+    """
+    Purpose:
+       Run a query matching $owner has attribute $codex_attr, the attributes
+       arrive with the answers so no request is made per concept
+    Args:
+        read_transaction: the open read transaction
+        graql_query: the query to run
+        owner: variable of the concepts owning the attributes
+        attributes: {concept id: {attribute: value}} to add to
+        options: QueryOptions of the query
+    Returns:
+        N/A
+    """
+    for answer in read_transaction.query(graql_query, **query_args(options)):
+        answer_map = answer.map()
+        attr = answer_map.get("codex_attr")
+        owner_attrs = attributes.setdefault(answer_map.get(owner).id, {})
+        owner_attrs[attr.type().label()] = attr.value()
+
+
+def attribute_query(graql_query: str, owner: str, attrs=None) -> str:
+    """
+    Purpose:
+       Turn a match get query into one that gets the attributes of a variable
+    Args:
+        graql_query: the match query, ending with get;
+        owner: variable of the concepts owning the attributes
+        attrs: attribute types to get, all when None
+    Returns:
+        graql_query: query of the owner and its attributes
+    """
+    match_body = graql_query.strip()[: -len("get;")]
+    match_body += f" ${owner} has attribute $codex_attr;"
+
+    if attrs is not None and len(attrs) == 1:
+        match_body += f" $codex_attr isa {attrs[0]};"
+    elif attrs is not None:
+        attr_types = " or ".join(f"{{$codex_attr isa {attr};}}" for attr in attrs)
+        match_body += f" {attr_types};"
+
+    return f"{match_body} get ${owner}, $codex_attr;"
+
+
+def concepts_by_id(
+    read_transaction, concept_ids: list, options=None
+) -> Tuple[dict, int]:
+    """
+    Purpose:
+       Get many concepts with their types, a block of ids per query
+       instead of a get_concept request per id
+    Args:
+        read_transaction: the open read transaction
+        concept_ids: ids of the concepts
+        options: QueryOptions of the queries
+    Returns:
+        concepts: {concept id: concept}
+        round_trips: number of queries run
+    """
+    concepts = {}
+    match_clauses = match_ids(concept_ids)
+
+    for match_clause in match_clauses:
+        for answer in read_transaction.query(
+            f"{match_clause} get;", **query_args(options)
+        ):
+            concept = answer.map().get("codex_owner")
+            concepts[concept.id] = concept
+
+    return concepts, len(match_clauses)
+
+
+def attributes_by_id(
+    read_transaction, concept_ids: list, attrs=None, options=None
+) -> Tuple[dict, int]:
+    """
+    Purpose:
+       Get the attributes of many concepts, a block of ids per query
+       instead of an attributes() request per concept
+    Args:
+        read_transaction: the open read transaction
+        concept_ids: ids of the concepts
+        attrs: attribute types to get, all when None
+        options: QueryOptions of the queries
+    Returns:
+        attributes: {concept id: {attribute: value}}
+        round_trips: number of queries run
+    """
+    attributes = {}
+    match_clauses = match_ids(concept_ids)
+
+    for match_clause in match_clauses:
+        query_attributes(
+            read_transaction,
+            attribute_query(f"{match_clause} get;", "codex_owner", attrs),
+            "codex_owner",
+            attributes,
+            options,
+        )
+
+    return attributes, len(match_clauses)
+
+
+def fill_attributes(read_transaction, pending: list, options=None) -> int:
+    """
+    Purpose:
+       Add the attributes of concepts to the objects made for them
+    Args:
+        read_transaction: the open read transaction
+        pending: list of (object, concept id) to fill
+        options: QueryOptions of the queries
+    Returns:
+        round_trips: number of queries run
+    """
+    attributes, round_trips = attributes_by_id(
+        read_transaction, [concept_id for _, concept_id in pending], options=options
+    )
+
+    for obj, concept_id in pending:
+        obj.update(attributes.get(concept_id, {}))
+
+    return round_trips
+
+
+def centrallity_query(session, graql_query: str, concept: str, options=None):
     """
     Purpose:
        Excute the graql centrallity query
@@ -974,72 +1554,28 @@ def centrallity_query(session, graql_query: str, concept: str):
         session: The Grakn session
         graql_query: the query to run
         concept: concept to check
+        options: QueryOptions of the queries
     Returns:
         ent_data: Answers to the query
     """
     ent_data = []
-    ent_map = {}
+    pending = []
 
     with session.transaction().read() as read_transaction:
-        answer_iterator = read_transaction.query(graql_query)
+        answer_iterator = read_transaction.query(graql_query, **query_args(options))
         for answer in answer_iterator:
-            attr_iterator = answer.map().get(concept).attributes()
             ent_obj = {}
             ent_obj["id"] = answer.map().get(concept).id
-            rel_iterator = answer.map().get(concept).relations()
-
-            for rel in rel_iterator:
-                rel_label = rel.type().label()
-                # logging.info("checking rel_label")
-                # print(rel_label)
-
-                # check if label is in ent_map
-                if rel_label in ent_map:
-                    # print("got inside rel label")
-                    rel_attr_iterator = rel.attributes()
-                    rel_obj = {}
-                    for attr in rel_attr_iterator:
-                        # only care about codex_details? so do we need for loop?
-                        rel_obj[attr.type().label()] = attr.value()
-                    try:
-                        codex_details = json.loads(rel_obj["codex_details"])
-                        # print(codex_details)
-                        rel_obj[codex_details["rel1_name"]] = codex_details[
-                            "rel1_value"
-                        ]
-                        rel_obj[codex_details["rel2_name"]] = codex_details[
-                            "rel2_value"
-                        ]
-                        # print(rel_obj)
-
-                        # find out which one ent is part of
-                        if concept == ent_map[rel_label]["rel1"]:
-                            # print("hello")
-                            ent_rel_key = (
-                                codex_details["rel1_name"]
-                                + "_"
-                                + codex_details["rel2_value"]
-                            )
-                            ent_obj[ent_rel_key] = 1
-                        if concept == ent_map[rel_label]["rel2"]:
-                            # print("hello")
-                            ent_rel_key = (
-                                codex_details["rel2_name"]
-                                + "_"
-                                + codex_details["rel1_value"]
-                            )
-                            ent_obj[ent_rel_key] = 1
-                    except:
-                        continue
-
-            for attr in attr_iterator:
-                ent_obj[attr.type().label()] = attr.value()
+            pending.append((ent_obj, ent_obj["id"]))
             ent_data.append(ent_obj)
 
+        # attributes of every answer in a query per block of ids
+        fill_attributes(read_transaction, pending, options)
+
     return ent_data
 
 
-def run_cluster_query(session, graql_query: str, concepts: dict) -> dict:
+def run_cluster_query(session, graql_query: str, concepts: dict, options=None) -> dict:
     """
     Purpose:
        Excute the graql centrallity query
@@ -1047,6 +1583,7 @@ def run_cluster_query(session, graql_query: str, concepts: dict) -> dict:
         session: The Grakn session
         graql_query: the query to run
         concepts: concepts to check
+        options: QueryOptions of the queries
     Returns:
         cluster_obj: Answers to the query
     """
@@ -1062,8 +1599,9 @@ def run_cluster_query(session, graql_query: str, concepts: dict) -> dict:
         ent_map[concept]["data"] = {}
 
     with session.transaction().read() as read_transaction:
-        answer_iterator = read_transaction.query(graql_query)
+        answer_iterator = read_transaction.query(graql_query, **query_args(options))
         curr_measurement = 0
+        cluster_nodes = []
         for answer in answer_iterator:
             try:
                 curr_measurement = answer.measurement()
@@ -1078,28 +1616,29 @@ def run_cluster_query(session, graql_query: str, concepts: dict) -> dict:
             connected_map[curr_measurement]["Ents"] = []
             connected_map[curr_measurement]["Rels"] = []
             clusters.append(curr_measurement)
+            cluster_nodes.append((curr_measurement, list(answer.set())))
+
+        # types, values and attributes of every node in a query per block of ids
+        node_ids = [node_id for _, ids in cluster_nodes for node_id in ids]
+        nodes, _ = concepts_by_id(read_transaction, node_ids, options)
+        attributes, _ = attributes_by_id(read_transaction, node_ids, options=options)
 
-            for node_id in answer.set():
-                node = read_transaction.get_concept(node_id)
+        for curr_measurement, ids in cluster_nodes:
+            for node_id in ids:
+                node = nodes[node_id]
                 # check what type it is and do action
                 node_type = node.type()
 
                 if node_type.is_entity_type():
                     # print("ent")
-                    attr_iterator = node.attributes()
                     concept = node_type.label()
-                    ent_obj = {}
-                    for attr in attr_iterator:
-                        ent_obj[attr.type().label()] = attr.value()
+                    ent_obj = dict(attributes.get(node_id, {}))
                     connected_map[curr_measurement]["Ents"].append(ent_obj)
                     ent_map[concept]["data"][curr_measurement].append(ent_obj)
                 if node_type.is_relation_type():
                     # logging.info("AT a rel type")
-                    attr_iterator = node.attributes()
                     concept = node_type.label()
-                    rel_obj = {}
-                    for attr in attr_iterator:
-                        rel_obj[attr.type().label()] = attr.value()
+                    rel_obj = dict(attributes.get(node_id, {}))
                     codex_details = json.loads(rel_obj["codex_details"])
 
                     # logging.info("Codex Details:")
@@ -1149,22 +1688,28 @@ def raw_query_write_grakn(session, graql_query: str) -> None:
         transaction.commit()
 
 
-def raw_query_read_grakn(session, graql_query: str) -> None:
+def raw_query_read_grakn(session, graql_query: str, options=None) -> None:
     """
     Purpose:
        Excute the graql query
     Args:
         session: The Grakn session
         graql_query: the query to run
+        options: QueryOptions of the queries, explain is on unless set
     Returns:
         ent_map: Answers to the queries by entity
     """
+    # rules are searched through their explanations
+    args = {"explain": True}
+    args.update(query_args(options))
 
     with session.transaction().read() as read_transaction:
-        answer_iterator = read_transaction.query(graql_query, explain=True)
+        answer_iterator = read_transaction.query(graql_query, **args)
         ent_map = {}
         answer_list = []
         answer_counter = 0
+        # (object, concept id) filled with attributes after the answers
+        pending = []
 
         for answer in answer_iterator:
             try:
@@ -1184,18 +1729,12 @@ def raw_query_read_grakn(session, graql_query: str) -> None:
                     curr_ent = answer.map().get(key_con)
                     # logging.info(key)
 
-                    cur_val = read_transaction.get_concept(curr_ent.id)
-
                     # then its a rule
-                    if cur_val.is_inferred():
-                        rels = cur_val.role_players()
+                    if curr_ent.is_inferred():
+                        rels = curr_ent.as_remote(read_transaction).role_players()
                         for rel in rels:
                             ent_obj = {}
-                            attr_iterator = rel.attributes()
-
-                            for attr in attr_iterator:
-                                # logging.info(attr.value())
-                                ent_obj[attr.type().label()] = attr.value()
+                            pending.append((ent_obj, rel.id))
 
                             ent_map[key]["concepts"].append(ent_obj)
 
@@ -1213,25 +1752,22 @@ def raw_query_read_grakn(session, graql_query: str) -> None:
                                     # logging.info(concept_key)
 
                                     curr_concept = exp_concept.map().get(concept_key)
-                                    cur_val = read_transaction.get_concept(
-                                        curr_concept.id
-                                    )
 
                                     # check if attr
                                     explanation_map[concept_key] = {}
 
-                                    if cur_val.is_attribute():
+                                    if curr_concept.is_attribute():
                                         explanation_map[concept_key][
-                                            cur_val.type().label()
-                                        ] = cur_val.value()
+                                            curr_concept.type().label()
+                                        ] = curr_concept.value()
 
                                     else:
-                                        attr_iterator = cur_val.attributes()
-                                        for attr in attr_iterator:
-                                            # logging.info(attr.value())
-                                            explanation_map[concept_key][
-                                                attr.type().label()
-                                            ] = attr.value()
+                                        pending.append(
+                                            (
+                                                explanation_map[concept_key],
+                                                curr_concept.id,
+                                            )
+                                        )
 
                             ent_map[key]["explanation"] = explanation_map
                             # logging.info("Here is explnation")
@@ -1253,12 +1789,10 @@ def raw_query_read_grakn(session, graql_query: str) -> None:
 
                     else:
 
-                        attr_iterator = cur_val.attributes()
                         concept_keys = list(answer.map().keys())
                         # logging.info(concept_keys)
 
-                        for attr in attr_iterator:
-                            ent_obj[attr.type().label()] = attr.value()
+                        pending.append((ent_obj, curr_ent.id))
 
                         ent_map[key]["concepts"].append(ent_obj)
 
@@ -1272,93 +1806,175 @@ def raw_query_read_grakn(session, graql_query: str) -> None:
                 # logging.error("TAz dingo")
                 logging.error(error)
 
+        # attributes of every concept in a query per block of ids
+        fill_attributes(read_transaction, pending, options)
+
     # logging.info("Here is everything")
     # logging.info(answer_list)
     return answer_list
 
 
-def run_compute_query(session, graql_query: str) -> dict:
+def run_compute_query(session, graql_query: str, options=None) -> dict:
     """
     Purpose:
        Excute the graql query
     Args:
         session: The Grakn session
         graql_query: the query to run
+        options: QueryOptions of the query
     Returns:
         ent_map: Answers to the queries by entity
     """
 
     with session.transaction().read() as read_transaction:
-        answer_iterator = read_transaction.query(graql_query)
+        answer_iterator = read_transaction.query(graql_query, **query_args(options))
         for answer in answer_iterator:
             print(str(answer.number()))
             num = answer.number()
             return num
 
 
-def run_find_query(session, queries: list, concepts: list) -> dict:
+def read_find_answers(
+    read_transaction,
+    queries: list,
+    concepts: list,
+    return_attrs=None,
+    offset=None,
+    limit=None,
+    options=None,
+) -> Tuple[dict, int, int]:
     """
     Purpose:
-       Excute the graql query
+       Excute the graql queries of a find in an open read transaction. The
+       attributes of each concept variable come from one more query, or
+       from the ids of the answers for a page
     Args:
-        session: The Grakn session
+        read_transaction: the open read transaction
         queries: the queriesto run
         concepts: The concepts we are looking for
+        return_attrs: {concept: attributes to return}, all for concepts left out
+        offset: number of answers of each query to skip
+        limit: most answers of each query to return
+        options: QueryOptions of the queries
     Returns:
         ent_map: Answers to the queries by entity
+        round_trips: number of requests sent to Grakn
+        most_answers: most answers returned by one query
     """
     ent_map = {}
+    round_trips = 0
+    most_answers = 0
+    paged = offset is not None or limit is not None
+
+    if return_attrs is None:
+        return_attrs = {}
 
     for concept in concepts:
         ent_map[concept] = []
 
-    concept_counter = 0
     for query in queries:
+        answer_iterator = read_transaction.query(
+            page_query(query, offset, limit), **query_args(options)
+        )
+        round_trips += 1
+        answer_count = 0
+        # {variable: [(object, concept id)]} filled with attributes after the answers
+        pending = {}
 
-        with session.transaction().read() as read_transaction:
-            answer_iterator = read_transaction.query(query)
-            for answer in answer_iterator:
-                try:
-
-                    answer_concepts = list(answer.map().keys())
-
-                    for key in answer_concepts:
+        for answer in answer_iterator:
+            answer_count += 1
+            try:
 
-                        if key in concepts:
+                for key, curr_ent in answer.map().items():
 
-                            ent_obj = {}
-                            curr_ent = answer.map().get(key)
-                            # logging.info(curr_ent.id)
+                    if key in concepts:
 
-                            cur_val = read_transaction.get_concept(curr_ent.id)
-                            # logging.info(cur_val)
+                        ent_obj = {}
 
-                            attr_iterator = cur_val.attributes()
-                            # come back here
+                        if curr_ent.is_attribute():
+                            # answers carry the type and value of attributes
+                            ent_obj["key"] = curr_ent.type().label()
+                            ent_obj["value"] = curr_ent.value()
 
-                            if cur_val.is_attribute():
-                                logging.info("Inside")
-                                ent_obj = {}
-                                node_val = cur_val.value()
-                                node_label = cur_val.type().label()
-                                ent_obj["key"] = node_label
-                                ent_obj["value"] = node_val
-                                logging.info(ent_obj)
+                        else:
+                            # only the returned attributes, in their order
+                            if key in return_attrs:
+                                ent_obj.update(dict.fromkeys(return_attrs[key]))
 
-                            else:
+                            if return_attrs.get(key) != []:
+                                pending.setdefault(key, []).append(
+                                    (ent_obj, curr_ent.id)
+                                )
 
-                                for attr in attr_iterator:
-                                    ent_obj[attr.type().label()] = attr.value()
+                        ent_map[key].append(ent_obj)
 
-                            ent_map[key].append(ent_obj)
+            except Exception as error:
+                logging.error(error)
 
-                except Exception as error:
-                    logging.error(error)
+        most_answers = max(most_answers, answer_count)
 
-        concept_counter += 1
+        for owner, owner_pending in pending.items():
+            if paged:
+                # the match of a page can not be reused, get them by id
+                attributes, id_queries = attributes_by_id(
+                    read_transaction,
+                    [concept_id for _, concept_id in owner_pending],
+                    return_attrs.get(owner),
+                    options,
+                )
+                round_trips += id_queries
+            else:
+                # match the attributes along with the concepts
+                attributes = {}
+                query_attributes(
+                    read_transaction,
+                    attribute_query(query, owner, return_attrs.get(owner)),
+                    owner,
+                    attributes,
+                    options,
+                )
+                round_trips += 1
+
+            for ent_obj, concept_id in owner_pending:
+                ent_obj.update(attributes.get(concept_id, {}))
+
+    return ent_map, round_trips, most_answers
+
+
+def run_find_query(
+    session,
+    queries: list,
+    concepts: list,
+    return_attrs=None,
+    offset=None,
+    limit=None,
+    options=None,
+) -> Tuple[dict, int]:
+    """
+    Purpose:
+       Excute the graql queries of a find in one read transaction
+    Args:
+        session: The Grakn session
+        queries: the queriesto run
+        concepts: The concepts we are looking for
+        return_attrs: {concept: attributes to return}, all for concepts left out
+        offset: number of answers of each query to skip
+        limit: most answers of each query to return
+        options: QueryOptions of the queries
+    Returns:
+        ent_map: Answers to the queries by entity
+        round_trips: number of requests sent to Grakn
+    """
+    with session.transaction().read() as read_transaction:
+        ent_map, round_trips, _ = read_find_answers(
+            read_transaction, queries, concepts, return_attrs, offset, limit, options
+        )
 
-    # logging.info(ent_map)
-    return ent_map
+    # opening the transaction is a request too
+    round_trips += 1
+
+    logging.info(f"Ran {len(queries)} find queries in {round_trips} round trips")
+    return ent_map, round_trips
 
 
 def turn_to_df(answers: list) -> pd.DataFrame:
@@ -1387,6 +2003,27 @@ def turn_to_df(answers: list) -> pd.DataFrame:
     return df
 
 
+def make_answers_df_map(answers: dict, concept_queries: list, round_trips: int) -> dict:
+    """
+    Purpose:
+       Turn the answers of a find into dataframes
+    Args:
+        answers: Answers to the queries by entity
+        concept_queries: the graql queries run
+        round_trips: number of requests sent to Grakn
+    Returns:
+        answers_df_map: Answers to the queries by entity as dataframes
+    """
+    answers_df_map = {}
+
+    for answer in answers:
+        answers_df_map[answer] = turn_to_df(answers[answer])
+    answers_df_map["graql_queries"] = concept_queries
+    answers_df_map["round_trips"] = round_trips
+
+    return answers_df_map
+
+
 def query_grakn(session, query_object) -> dict:
     """
     Purpose:
@@ -1400,12 +2037,8 @@ def query_grakn(session, query_object) -> dict:
     answers = {}
 
     if query_object.action == "Find":
-        answers, concept_queries = find_query(session, query_object)
-        answers_df_map = {}
-
-        for answer in answers:
-            answers_df_map[answer] = turn_to_df(answers[answer])
-        answers_df_map["graql_queries"] = concept_queries
+        answers, concept_queries, round_trips = find_query(session, query_object)
+        answers_df_map = make_answers_df_map(answers, concept_queries, round_trips)
         return answers_df_map
 
     elif query_object.action == "Compute":
@@ -1424,6 +2057,97 @@ def query_grakn(session, query_object) -> dict:
         return answers
 
 
+def parse_grakn_date(val: str) -> str:
+    """
+    Purpose:
+       Turn a date value into a grakn datetime literal with dateutil
+    Args:
+        val: value to turn into a date
+    Returns:
+        dt_string - date time string
+    """
+    dt = parse(val)
+    return f'{dt.strftime("%Y-%m-%dT%H:%M:%S")}.{str(dt.microsecond)[:3]}'
+
+
+def memo_values(memo: dict, values: list, convert_values) -> list:
+    """
+    Purpose:
+       Convert values, reusing earlier conversions kept in a memo
+    Args:
+        memo: the memo to check and fill
+        values: values to convert
+        convert_values: function that converts a list of values
+    Returns:
+        converted: converted values in the same order
+    """
+    # type is part of the key so True and 1 are kept apart
+    keys = [(type(val), val) for val in values]
+
+    # hits are copied out, clearing the memo can not lose them
+    with memo_lock:
+        found = {key: memo[key] for key in keys if key in memo}
+
+    missing = list({key: None for key in keys if key not in found})
+
+    if len(missing) > 0:
+        converted = convert_values([val for _, val in missing])
+        found.update(zip(missing, converted))
+
+        with memo_lock:
+            if len(memo) + len(missing) > VALUE_MEMO_SIZE:
+                memo.clear()
+            memo.update(zip(missing, converted))
+
+    return [found[key] for key in keys]
+
+
+def make_grakn_date(val: str) -> str:
+    """
+    Purpose:
+       Turn a date value into a grakn datetime literal, repeated values are
+       parsed once
+    Args:
+        val: value to turn into a date
+    Returns:
+        dt_string - date time string
+    """
+    return memo_values(date_memo, [val], make_grakn_dates)[0]
+
+
+def make_grakn_dates(values: list) -> list:
+    """
+    Purpose:
+       Turn many date values into grakn datetime literals. ISO dates are
+       parsed by pandas at once, other values by dateutil one at a time so
+       the day and month order never depends on the other values
+    Args:
+        values: values to turn into dates
+    Returns:
+        dt_strings - date time strings
+    """
+    texts = pd.Series(values, dtype=object).astype(str).str.strip()
+    iso = texts.str.match(ISO_DATE)
+
+    try:
+        dts = pd.to_datetime(texts.where(iso), format="ISO8601", errors="coerce")
+
+        # unparsed values are NaT, they stay missing after the join
+        microseconds = dts.dt.microsecond.fillna(0).astype("int64").astype(str)
+        dt_strings = (
+            dts.dt.strftime("%Y-%m-%dT%H:%M:%S") + "." + microseconds.str[:3]
+        ).tolist()
+    except Exception as error:
+        # mixed timezones and the like
+        logging.debug(f"Falling back to dateutil: {error}")
+        dt_strings = [None] * len(values)
+
+    return [
+        parse_grakn_date(val) if pd.isna(dt_string) else dt_string
+        for val, dt_string in zip(values, dt_strings)
+    ]
+
+
 def make_dt_string(val: str) -> str:
     """
     Purpose:
@@ -1434,9 +2158,8 @@ def make_dt_string(val: str) -> str:
         dt_string - date time string
     """
     try:
-        dt = parse(val)
         # convert string to grakn format
-        dt_string = f'{dt.strftime("%Y-%m-%dT%H:%M:%S")}.{str(dt.microsecond)[:3]}'
+        dt_string = make_grakn_date(val)
     except Exception as error:
         logging.error(error)
         raise ValueError(f"could not turn {val} to a date string")
@@ -1444,17 +2167,16 @@ def make_dt_string(val: str) -> str:
     return dt_string
 
 
-def commit_relationship(row: pd.Series, session, rel_name: str, rel_map: dict) -> None:
+def make_relationship_query(row: pd.Series, rel_name: str, rel_map: dict) -> str:
     """
     Purpose:
-       Insert statement for relationships
+       Build the match insert statement for a relationship row
     Args:
         row: The current row of the dataframe
-        session: The Grakn session
         rel_name: the relationship name
         rel_map: the relationship map
     Returns:
-        N/A
+        graql_insert_query: The query to run
     """
     rel1_role = rel_map["rel1"]["role"]
     rel2_role = rel_map["rel2"]["role"]
@@ -1554,12 +2276,8 @@ def commit_relationship(row: pd.Series, session, rel_name: str, rel_map: dict) -
 
             # This is a date
             else:
-                dt = parse(row[attr])
                 # convert string to grakn format
-                dt_string = (
-                    f'{dt.strftime("%Y-%m-%dT%H:%M:%S")}.{str(dt.microsecond)[:3]}'
-                )
-                # dt_string = dt.strftime("%Y-%m-%dT%H:%M:%S")
+                dt_string = make_grakn_date(row[attr])
                 graql_insert_query += "has " + str(attr) + " " + dt_string
 
             # check if last
@@ -1571,6 +2289,23 @@ def commit_relationship(row: pd.Series, session, rel_name: str, rel_map: dict) -
     else:
         graql_insert_query += ";"
 
+    return graql_insert_query
+
+
+def commit_relationship(row: pd.Series, session, rel_name: str, rel_map: dict) -> None:
+    """
+    Purpose:
+       Insert statement for relationships
+    Args:
+        row: The current row of the dataframe
+        session: The Grakn session
+        rel_name: the relationship name
+        rel_map: the relationship map
+    Returns:
+        N/A
+    """
+    graql_insert_query = make_relationship_query(row, rel_name, rel_map)
+
     # do insert here
     with session.transaction().write() as transaction:
         logging.info("Executing Graql Query: " + graql_insert_query)
@@ -1578,24 +2313,226 @@ def commit_relationship(row: pd.Series, session, rel_name: str, rel_map: dict) -
         transaction.commit()
 
 
+def key_texts(values: pd.Series, key_type=None) -> pd.Series:
+    """
+    Purpose:
+       Turn key values into text in the form of the key type, so a key
+       read from Grakn and the same key in a dataframe compare equal
+    Args:
+        values: key values
+        key_type: string, long, double, date or boolean, str() when None
+    Returns:
+        texts: the key values as text, missing values stay missing
+    """
+    values = pd.Series(values, dtype=object)
+    texts = values.map(str)
+
+    if key_type == "long" or key_type == "double":
+        # 5, 5.0 and "5" are the same key
+        numbers = pd.to_numeric(values, errors="coerce")
+        if key_type == "long":
+            formatted = numbers.map(
+                lambda num: str(int(num)) if float(num).is_integer() else str(num)
+            )
+        else:
+            formatted = numbers.map(lambda num: repr(float(num)))
+        texts = formatted.where(numbers.notna(), texts)
+
+    elif key_type == "date":
+        # strings, Timestamps and datetimes all become the grakn literal
+        try:
+            texts = pd.Series(make_grakn_dates(texts.tolist()), index=values.index)
+        except Exception as error:
+            logging.debug(f"Comparing date keys as text: {error}")
+
+    return texts.where(values.notna())
+
+
+def get_entity_key_ids(session, entity: str, key: str, key_type=None) -> dict:
+    """
+    Purpose:
+       Stream the key and concept id of every concept of an entity type
+       in one read transaction
+    Args:
+        session: The Grakn session
+        entity: the entity name
+        key: the entity key
+        key_type: value type of the key
+    Returns:
+        key_ids: {key value as text from key_texts: concept id}
+    """
+    graql_query = f"match $concept isa {entity}, has {key} $key; get $concept, $key;"
+    keys = []
+    concept_ids = []
+
+    with session.transaction().read() as read_transaction:
+        for answer in read_transaction.query(graql_query, infer=False):
+            answer_map = answer.map()
+            keys.append(answer_map.get("key").value())
+            concept_ids.append(answer_map.get("concept").id)
+
+    key_ids = dict(zip(key_texts(pd.Series(keys, dtype=object), key_type), concept_ids))
+
+    logging.info(f"Resolved {len(key_ids)} {entity} keys")
+
+    return key_ids
+
+
+def resolve_relationship_keys(
+    session, df: pd.DataFrame, rel_map: dict, key_ids=None
+) -> Tuple[pd.DataFrame, pd.DataFrame, list]:
+    """
+    Purpose:
+       Look up the concept ids of both role players of every row
+    Args:
+        session: The Grakn session
+        df: The relationship data
+        rel_map: the relationship map
+        key_ids: {entity: {key value: concept id}} kept between chunks,
+            entities not in it are streamed from Grakn and added
+    Returns:
+        resolved: rows with both concept ids, in the concept id columns,
+            indexed by row position in df
+        unresolved: rows with a key that matched no concept
+        missing_keys: list of {"entity", "key", "value"} that matched no concept
+    """
+    if key_ids is None:
+        key_ids = {}
+
+    df = df.reset_index(drop=True)
+    resolved = df.copy()
+    found = np.ones(len(df), dtype=bool)
+    missing_keys = []
+
+    for rel in ["rel1", "rel2"]:
+        entity = rel_map[rel]["entity"]
+        role = rel_map[rel]["role"]
+
+        if entity not in key_ids:
+            key_ids[entity] = get_entity_key_ids(
+                session, entity, rel_map[rel]["key"], rel_map[rel].get("key_type")
+            )
+
+        ids = key_texts(df[role], rel_map[rel].get("key_type")).map(key_ids[entity])
+        resolved[concept_id_column(role)] = ids
+        found &= ids.notna().to_numpy()
+
+        for value in pd.unique(df[role][ids.isna()]):
+            missing_keys.append(
+                {"entity": entity, "key": rel_map[rel]["key"], "value": value}
+            )
+
+    return resolved[found], df[~found], missing_keys
+
+
+def add_unresolved_stats(
+    load_stats: dict, unresolved: pd.DataFrame, missing_keys: list
+) -> dict:
+    """
+    Purpose:
+       Count rows with unresolved keys as failed rows and list the keys
+    Args:
+        load_stats: details of the load of the resolved rows
+        unresolved: rows with a key that matched no concept
+        missing_keys: keys that matched no concept
+    Returns:
+        load_stats: details of the whole load
+    """
+    load_stats["rows"] += len(unresolved)
+    load_stats["failed_rows"] += len(unresolved)
+    load_stats["unresolved_keys"] = missing_keys
+
+    return load_stats
+
+
+def report_unresolved(rel_name: str, unresolved: pd.DataFrame, missing_keys: list):
+    """
+    Purpose:
+       Log the keys that matched no concept, before any row is inserted
+    Args:
+        rel_name: the relationship name
+        unresolved: rows with a key that matched no concept
+        missing_keys: keys that matched no concept
+    Returns:
+        N/A
+    """
+    if len(unresolved) > 0:
+        logging.error(
+            f"Skipping {len(unresolved)} {rel_name} rows, "
+            f"these keys match no concept: {missing_keys}"
+        )
+
+
 def add_relationship_data(
-    df: pd.DataFrame, rel_map: dict, rel_name: str, session
-) -> None:
+    df: pd.DataFrame,
+    rel_map: dict,
+    rel_name: str,
+    session,
+    batch_size: int = 1,
+    on_batch=None,
+    key_ids=None,
+    dead_letter=None,
+) -> dict:
     """
     Purpose:
-       add relationship data to Grakn
+       add relationship data to Grakn, role players are resolved to concept
+       ids up front and rows with unknown keys are skipped
     Args:
         df: The data to add
         rel_map: the relationship map
         rel_name: the relationship name
         session: The Grakn session
+        batch_size: number of rows to commit per write transaction
+        on_batch: function called with the number of rows done after each batch
+        key_ids: {entity: {key value: concept id}} to reuse between chunks
+        dead_letter: csv or json lines file to write failed rows to
     Returns:
-        N/A
+        load_stats: details of the load
     """
     # logging.info("Starting add relationships")
 
-    # for each row in csv, add relationship
-    df.apply(lambda row: commit_relationship(row, session, rel_name, rel_map), axis=1)
+    if rel_map["rel1"]["key"] is None or rel_map["rel2"]["key"] is None:
+        # nothing to resolve on, the statements match the role players
+        return insert_in_batches(
+            session,
+            df,
+            lambda df: make_relationship_queries(df, rel_name, rel_map),
+            batch_size,
+            rel_name,
+            dead_letter,
+            on_batch,
+        )
+
+    resolve_start = time.perf_counter()
+    resolved, unresolved, missing_keys = resolve_relationship_keys(
+        session, df, rel_map, key_ids
+    )
+    resolve_time = time.perf_counter() - resolve_start
+    report_unresolved(rel_name, unresolved, missing_keys)
+
+    if on_batch is not None and len(unresolved) > 0:
+        # batches count resolved rows, checkpoints count rows of df
+        positions = resolved.index.to_numpy()
+        report_batch = on_batch
+        on_batch = lambda rows: report_batch(int(positions[rows - 1]) + 1)
+
+    # for each batch of rows in csv, add the relationships in one transaction
+    load_stats = insert_in_batches(
+        session,
+        resolved,
+        lambda df: make_relationship_queries(df, rel_name, rel_map, by_id=True),
+        batch_size,
+        rel_name,
+        dead_letter,
+        on_batch,
+    )
+
+    # resolving keys is part of the load
+    add_phase(load_stats["phases"], "resolve", resolve_time)
+    load_stats["elapsed"] += resolve_time
+    load_stats["rows_per_sec"] = load_stats["committed_rows"] / load_stats["elapsed"]
+
+    return add_unresolved_stats(load_stats, unresolved, missing_keys)
 
 
 def add_relationship_to_entities(rel_map):
@@ -1683,17 +2620,16 @@ def sanitize_text(text: str) -> str:
     return str(text)
 
 
-def commit_entity(row: pd.Series, session, entity_name: str, entity_map: dict) -> None:
+def make_entity_query(row: pd.Series, entity_name: str, entity_map: dict) -> str:
     """
     Purpose:
-       Insert statement for entites
+       Build the insert statement for an entity row
     Args:
         row: The current row of the dataframe
-        session: The Grakn session
         entity_name: the entity name
         entity_map: the entity map
     Returns:
-        N/A
+        graql_insert_query: The query to run
     """
     current_ent = entity_map[entity_name]
 
@@ -1718,11 +2654,8 @@ def commit_entity(row: pd.Series, session, entity_name: str, entity_map: dict) -
 
         # This is a date
         else:
-            dt = parse(row[col])
             # convert string to grakn format
-            dt_string = f'{dt.strftime("%Y-%m-%dT%H:%M:%S")}.{str(dt.microsecond)[:3]}'
-            # dt_string = dt.strftime("%Y-%m-%dT%H:%M:%S")
-            # logging.info(f"adding dt{dt_string}")
+            dt_string = make_grakn_date(row[col])
             graql_insert_query += "has " + str(col) + " " + dt_string
 
         # check if last
@@ -1732,99 +2665,1030 @@ def commit_entity(row: pd.Series, session, entity_name: str, entity_map: dict) -
             graql_insert_query += ", "
         entity_counter += 1
 
-    try:
-        with session.transaction().write() as transaction:
-            logging.info("Executing Graql Query: " + graql_insert_query)
-            transaction.query(graql_insert_query)
-            transaction.commit()
-    except Exception as e:
-        logging.info("Query failed: " + graql_insert_query)
-        logging.info(str(e))
+    return graql_insert_query
 
 
-def add_entities_into_grakn(
-    session, df: pd.DataFrame, entity_name: str, entity_map: dict
-) -> None:
+def format_values(values: pd.Series, value_format: str) -> np.ndarray:
     """
     Purpose:
-       add entites data to Grakn
+       Format a whole column for a graql statement
     Args:
-        session: The Grakn session
-        df: The data to add
-        entity_name: the entity name
-        entity_map: the entity map
+        values: the column to format
+        value_format: string, bool, long, double, date, quoted, json or id
     Returns:
-        N/A
+        formatted: object array of formatted values
     """
-    # logging.info("adding entities")
-    # for each row in csv, add an entity
-    df.apply(lambda row: commit_entity(row, session, entity_name, entity_map), axis=1)
+    values = pd.Series(values.to_numpy(dtype=object), dtype=object)
 
+    if value_format == "json":
+        return np.array([json.dumps(val) for val in values], dtype=object)
 
-def get_all_rels(session, entity_map):
+    if value_format == "date":
+        # convert each distinct string to grakn format once
+        return format_unique(
+            values, lambda uniques: memo_values(date_memo, uniques, make_grakn_dates)
+        )
+
+    if value_format == "string" or value_format == "bool":
+        # sanitize each distinct string once
+        return format_unique(
+            values, lambda uniques: memo_values(text_memo, uniques, quote_texts)
+        )
+
+    text = values.map(str)
+
+    if value_format == "quoted":
+        text = '"' + text + '"'
+
+    return text.to_numpy(dtype=object)
+
+
+def quote_texts(values: list) -> list:
     """
     Purpose:
-       Get relationship map
+       Sanitize and quote many values for grakn insert
     Args:
-        session - Current grakn session
-        entity_map - the entity map
+        values: values to quote
     Returns:
-        rel_map - the rel map
+        texts: quoted values
     """
-    # Example rel map
-    # {'Productize': {'rel1': {'role': 'produced', 'entity': 'Product', 'key': 'name', 'key_type': 'string'}, 'rel2': {'role': 'producer', 'entity': 'Company', 'key': 'name', 'key_type': 'string'}, 'cols': {'codex_details': {'type': 'string'}, 'note': {'type': 'string'}}}}
+    texts = pd.Series(values, dtype=object).map(str)
+    return ('"' + texts.str.replace('"', "'", regex=False) + '"').tolist()
 
-    with session.transaction().write() as transaction:
-        entity_type = transaction.get_schema_concept("relation")
-        subs = list(entity_type.subs())
-        # logging.info(subs)
-        subs_labels = [sub.label() for sub in subs]
-        logging.info(subs_labels)
-        subs_labels.pop(0)
-        rel_map = {}
 
-        for sub_label in subs_labels:
-            # setup ent map
-            logging.info(f"##################{sub_label}##################")
-            rel_map[sub_label] = {}
-            rel_map[sub_label]["cols"] = {}
-            rel_map[sub_label]["rel1"] = {}
-            rel_map[sub_label]["rel2"] = {}
+def format_unique(values: pd.Series, format_uniques) -> np.ndarray:
+    """
+    Purpose:
+       Format the distinct values of a column and spread them back
+       over the rows
+    Args:
+        values: the column to format
+        format_uniques: function that formats a list of distinct values
+    Returns:
+        formatted: object array of formatted values
+    """
+    codes, uniques = pd.factorize(values)
+    formatted = format_uniques(list(uniques))
 
-            curr_sub = transaction.get_schema_concept(sub_label)
+    # missing values get code -1, which picks the last entry
+    if (codes == -1).any():
+        formatted = formatted + format_uniques([values[codes == -1].iloc[0]])
 
-            current_attrs = curr_sub.attributes()
+    return np.array(formatted, dtype=object)[codes]
 
-            labels = []
-            for attr in current_attrs:
 
-                label_obj = {}
-                label_obj["type"] = turn_value_type(attr.value_type())
+def render_template(df: pd.DataFrame, template: list) -> list:
+    """
+    Purpose:
+       Render a compiled statement template for every row of a dataframe
+    Args:
+        df: The data to render
+        template: list of (text, column, value_format) parts
+    Returns:
+        queries: one graql query per row
+    """
+    queries = np.full(len(df), "", dtype=object)
 
-                label_obj["label"] = attr.label()
-                labels.append(label_obj)
+    for text, col, value_format in template:
+        queries = queries + text
 
-            for label in labels:
-                rel_map[sub_label]["cols"][label["label"]] = {}
-                rel_map[sub_label]["cols"][label["label"]]["type"] = label["type"]
+        if col is not None:
+            queries = queries + format_values(df[col], value_format)
 
-            roles = curr_sub.roles()
+    return queries.tolist()
 
-            counter = 0
-            for role in roles:
 
-                players = role.players()
+def compile_entity_template(entity_name: str, entity_map: dict) -> list:
+    """
+    Purpose:
+       Compile the insert statement template for an entity, the same
+       statement make_entity_query builds for a single row
+    Args:
+        entity_name: the entity name
+        entity_map: the entity map
+    Returns:
+        template: list of (text, column, value_format) parts
+    """
+    current_ent = entity_map[entity_name]
 
-                with_ent = ""
-                for player in players:
-                    with_ent = player.label()
+    template = []
+    text = "insert $c isa " + entity_name + ", "
+    cols = list(current_ent["cols"].keys())
 
-                # {'role': 'produced', 'entity': 'Product', 'key': 'name', 'key_type': 'string'}
-                ent_key = entity_map[with_ent]["key"]
-                ent_key_type = entity_map[with_ent]["cols"][ent_key]["type"]
+    for entity_counter, col in enumerate(cols, start=1):
+        text += "has " + str(col) + " "
+        template.append((text, col, current_ent["cols"][col]["type"]))
 
-                if counter == 0:
-                    rel_map[sub_label]["rel1"]["role"] = role.label()
+        # check if last
+        if entity_counter == len(cols):
+            text = ";"
+        else:
+            text = ", "
+
+    template.append((text, None, None))
+
+    return template
+
+
+def concept_id_column(role: str) -> str:
+    """
+    Purpose:
+       Name of the column holding the resolved concept ids of a role
+    Args:
+        role: the role in the relationship
+    Returns:
+        col: column name
+    """
+    return f"__{role}_concept_id"
+
+
+def compile_relationship_template(
+    rel_name: str, rel_map: dict, by_id: bool = False
+) -> list:
+    """
+    Purpose:
+       Compile the match insert statement template for a relationship, the
+       same statement make_relationship_query builds for a single row
+    Args:
+        rel_name: the relationship name
+        rel_map: the relationship map
+        by_id: match the role players on their resolved concept ids
+            instead of their keys
+    Returns:
+        template: list of (text, column, value_format) parts
+    """
+    template = []
+    text = "match "
+
+    # match both role players on their keys
+    for rel in ["rel1", "rel2"]:
+        if by_id:
+            text += "$" + str(rel_map[rel]["role"]) + " id "
+            template.append((text, concept_id_column(rel_map[rel]["role"]), "id"))
+            text = ";"
+            continue
+
+        text += "$" + str(rel_map[rel]["role"]) + " isa " + str(rel_map[rel]["entity"])
+
+        if rel_map[rel]["key_type"] == "string" or rel_map[rel]["key_type"] == "bool":
+            text += ", has " + str(rel_map[rel]["key"]) + " "
+            template.append((text, rel_map[rel]["role"], "quoted"))
+            text = ";"
+
+        if rel_map[rel]["key_type"] == "long" or rel_map[rel]["key_type"] == "double":
+            text += ", has " + str(rel_map[rel]["key"]) + " "
+            template.append((text, rel_map[rel]["role"], "long"))
+            text = ";"
+
+    # the insert statement
+    text += (
+        " insert $"
+        + str(rel_name)
+        + "("
+        + str(rel_map["rel1"]["role"])
+        + ": $"
+        + str(rel_map["rel1"]["role"])
+        + ", "
+        + str(rel_map["rel2"]["role"])
+        + ": $"
+        + str(rel_map["rel2"]["role"])
+        + ") isa "
+        + str(rel_name)
+        + "; "
+    )
+
+    # create codex details, laid out the way json.dumps writes the dict
+    text += "$" + str(rel_name) + " has codex_details '{"
+    for counter, rel in enumerate(["rel1", "rel2"]):
+        if counter > 0:
+            text += ", "
+        text += f'"{rel}_key": {json.dumps(rel_map[rel]["key"])}, "{rel}_value": '
+        template.append((text, rel_map[rel]["role"], "json"))
+        text = f', "{rel}_role": {json.dumps(rel_map[rel]["role"])}'
+    text += "}'"
+
+    row_attrs = list(rel_map["cols"].keys())
+    row_attrs.remove("codex_details")
+
+    if len(row_attrs) > 0:
+        text += ", "
+
+        for attr_counter, attr in enumerate(row_attrs, start=1):
+            text += "has " + str(attr) + " "
+            template.append((text, attr, rel_map["cols"][attr]["type"]))
+
+            # check if last
+            if attr_counter == len(row_attrs):
+                text = ";"
+            else:
+                text = ", "
+    else:
+        text += ";"
+
+    template.append((text, None, None))
+
+    return template
+
+
+def make_entity_queries(df: pd.DataFrame, entity_name: str, entity_map: dict) -> list:
+    """
+    Purpose:
+       Build the insert statements for every row of an entity dataframe
+    Args:
+        df: The data to add
+        entity_name: the entity name
+        entity_map: the entity map
+    Returns:
+        queries: one graql query per row
+    """
+    return render_template(df, compile_entity_template(entity_name, entity_map))
+
+
+def make_relationship_queries(
+    df: pd.DataFrame, rel_name: str, rel_map: dict, by_id: bool = False
+) -> list:
+    """
+    Purpose:
+       Build the match insert statements for every row of a relationship
+       dataframe
+    Args:
+        df: The data to add
+        rel_name: the relationship name
+        rel_map: the relationship map
+        by_id: match the role players on the resolved concept id columns
+    Returns:
+        queries: one graql query per row
+    """
+    return render_template(df, compile_relationship_template(rel_name, rel_map, by_id))
+
+
+def commit_entity(row: pd.Series, session, entity_name: str, entity_map: dict) -> None:
+    """
+    Purpose:
+       Insert statement for entites
+    Args:
+        row: The current row of the dataframe
+        session: The Grakn session
+        entity_name: the entity name
+        entity_map: the entity map
+    Returns:
+        N/A
+    """
+    graql_insert_query = make_entity_query(row, entity_name, entity_map)
+
+    try:
+        with session.transaction().write() as transaction:
+            logging.info("Executing Graql Query: " + graql_insert_query)
+            transaction.query(graql_insert_query)
+            transaction.commit()
+    except Exception as e:
+        logging.info("Query failed: " + graql_insert_query)
+        logging.info(str(e))
+
+
+def add_phase(phases, phase: str, seconds: float) -> None:
+    """
+    Purpose:
+       Add time to a phase of a load
+    Args:
+        phases: {phase: seconds} to add to, nothing is kept when None
+        phase: name of the phase
+        seconds: time spent
+    Returns:
+        N/A
+    """
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + seconds
+
+
+def commit_batch(session, queries: list, phases=None) -> float:
+    """
+    Purpose:
+       Run a batch of insert statements in one write transaction
+    Args:
+        session: The Grakn session
+        queries: the queries to run
+        phases: {phase: seconds} to add the transaction, query and commit
+            times to
+    Returns:
+        latency: seconds taken to run and commit the batch
+    """
+    start = time.perf_counter()
+
+    with session.transaction().write() as transaction:
+        opened = time.perf_counter()
+        for graql_insert_query in queries:
+            transaction.query(graql_insert_query)
+        queried = time.perf_counter()
+        transaction.commit()
+
+    end = time.perf_counter()
+    add_phase(phases, "transaction", opened - start)
+    add_phase(phases, "query", queried - opened)
+    add_phase(phases, "commit", end - queried)
+
+    return end - start
+
+
+def check_session(session) -> None:
+    """
+    Purpose:
+       Open and close a transaction, so an outage raises instead of being
+       blamed on the rows of a failed batch
+    Args:
+        session: The Grakn session
+    Returns:
+        N/A
+    """
+    with session.transaction().read():
+        pass
+
+
+def commit_bisect(session, queries: list, phases=None) -> Tuple[list, list]:
+    """
+    Purpose:
+       Commit a batch, when it fails split it in half and retry each half
+       until the failing statements are isolated
+    Args:
+        session: The Grakn session
+        queries: the queries to run
+        phases: {phase: seconds} to add the time of each try to
+    Returns:
+        batch_latencies: seconds taken by each committed batch
+        failures: list of (position in queries, error) of failed statements
+    """
+    try:
+        return [commit_batch(session, queries, phases)], []
+    except Exception as error:
+        check_session(session)
+
+        if len(queries) == 1:
+            return [], [(0, str(error))]
+
+    middle = len(queries) // 2
+    left_latencies, left_failures = commit_bisect(session, queries[:middle], phases)
+    right_latencies, right_failures = commit_bisect(session, queries[middle:], phases)
+
+    return left_latencies + right_latencies, left_failures + [
+        (position + middle, error) for position, error in right_failures
+    ]
+
+
+def dead_letter_path(dead_letter: str, concept: str) -> str:
+    """
+    Purpose:
+       Get the file the failed rows of a concept are written to, csv dead
+       letters get a file per concept so every row of a file has its columns
+    Args:
+        dead_letter: path of the dead letter file
+        concept: the concept of the rows
+    Returns:
+        path: the file to append to
+    """
+    if dead_letter.endswith(".csv"):
+        return f"{dead_letter[: -len('.csv')]}_{concept}.csv"
+
+    return dead_letter
+
+
+def lock_dead_letter(dead_file, locked: bool) -> None:
+    """
+    Purpose:
+       Lock or unlock an open dead letter file for the worker processes that
+       share it, with flock on posix and msvcrt on windows
+    Args:
+        dead_file: the open dead letter file
+        locked: True to lock, False to unlock
+    Returns:
+        N/A
+    """
+    try:
+        import fcntl
+
+        fcntl.flock(dead_file, fcntl.LOCK_EX if locked else fcntl.LOCK_UN)
+        return
+    except ImportError:
+        pass
+
+    try:
+        import msvcrt
+    except ImportError:
+        # no file locks, only the threads of this process are kept apart
+        return
+
+    # msvcrt locks bytes from the current position, appends still go to the end
+    dead_file.seek(0)
+    msvcrt.locking(dead_file.fileno(), msvcrt.LK_LOCK if locked else msvcrt.LK_UNLCK, 1)
+
+
+def write_dead_letters(dead_letter: str, records: list) -> None:
+    """
+    Purpose:
+       Append failed rows to a dead letter file, csv files one per concept if
+       the path ends in .csv and json lines otherwise. Concept ids of
+       resolved role players are left out of csv files
+    Args:
+        dead_letter: path of the dead letter file
+        records: list of {"concept", "row", "error", "graql"}
+    Returns:
+        N/A
+    """
+    files = {}
+    for record in records:
+        path = dead_letter_path(dead_letter, record["concept"])
+        files.setdefault(path, []).append(record)
+
+    with dead_letter_lock:
+        for path, path_records in files.items():
+            with open(path, "a", newline="") as dead_file:
+                # worker processes append to the same files
+                lock_dead_letter(dead_file, True)
+                try:
+                    if path.endswith(".csv"):
+                        dead_df = pd.DataFrame(
+                            [
+                                {
+                                    **{
+                                        column: value
+                                        for column, value in record["row"].items()
+                                        if not str(column).startswith("__")
+                                    },
+                                    "codex_concept": record["concept"],
+                                    "codex_error": record["error"],
+                                    "codex_graql": record["graql"],
+                                }
+                                for record in path_records
+                            ]
+                        )
+                        write_header = os.fstat(dead_file.fileno()).st_size == 0
+                        dead_df.to_csv(dead_file, header=write_header, index=False)
+                    else:
+                        lines = [
+                            json.dumps(record, default=str) + "\n"
+                            for record in path_records
+                        ]
+                        dead_file.write("".join(lines))
+                    dead_file.flush()
+                finally:
+                    lock_dead_letter(dead_file, False)
+
+
+def summarize_latencies(batch_latencies: list) -> dict:
+    """
+    Purpose:
+       Summarize batch latencies as percentiles and a histogram
+    Args:
+        batch_latencies: seconds taken by each committed batch
+    Returns:
+        latency_stats: p50, p90, p99, max and histogram of the latencies
+    """
+    latencies = np.asarray(batch_latencies, dtype=float)
+    latency_stats = {}
+
+    for percentile in [50, 90, 99]:
+        if len(latencies) > 0:
+            latency_stats[f"p{percentile}"] = float(
+                np.percentile(latencies, percentile)
+            )
+        else:
+            latency_stats[f"p{percentile}"] = 0.0
+
+    latency_stats["max"] = float(latencies.max()) if len(latencies) > 0 else 0.0
+
+    # batches per bucket, the last bucket holds everything slower
+    counts = np.bincount(
+        np.searchsorted(LATENCY_BUCKETS, latencies, side="left"),
+        minlength=len(LATENCY_BUCKETS) + 1,
+    )
+    labels = [f"<={bound}s" for bound in LATENCY_BUCKETS]
+    labels.append(f">{LATENCY_BUCKETS[-1]}s")
+    latency_stats["histogram"] = dict(zip(labels, counts.tolist()))
+
+    return latency_stats
+
+
+def make_load_stats(
+    rows: int,
+    failed_rows: int,
+    batch_latencies: list,
+    elapsed: float,
+    quarantined_rows: int = 0,
+    phases=None,
+) -> dict:
+    """
+    Purpose:
+       Summarize a load into Grakn
+    Args:
+        rows: number of rows processed
+        failed_rows: number of rows that did not commit
+        batch_latencies: seconds taken by each committed batch
+        elapsed: total seconds taken by the load
+        quarantined_rows: number of failed rows isolated by retrying
+        phases: seconds spent in each phase, format, resolve, transaction,
+            query and commit. Summed over workers
+    Returns:
+        load_stats: details of the load
+    """
+    load_stats = {}
+    load_stats["rows"] = rows
+    load_stats["committed_rows"] = rows - failed_rows
+    load_stats["failed_rows"] = failed_rows
+    load_stats["quarantined_rows"] = quarantined_rows
+    load_stats["batches"] = len(batch_latencies)
+    load_stats["batch_latencies"] = batch_latencies
+    load_stats["batch_latency"] = summarize_latencies(batch_latencies)
+    load_stats["phases"] = dict(phases) if phases is not None else {}
+    load_stats["elapsed"] = elapsed
+
+    if elapsed > 0:
+        load_stats["rows_per_sec"] = load_stats["committed_rows"] / elapsed
+    else:
+        load_stats["rows_per_sec"] = 0.0
+
+    return load_stats
+
+
+def commit_rows(
+    session,
+    batch_df: pd.DataFrame,
+    queries: list,
+    concept: str,
+    dead_letter=None,
+    phases=None,
+) -> Tuple[list, int]:
+    """
+    Purpose:
+       Commit the statements of a batch of rows, rows that fail are isolated
+       by retrying halves of the batch and written to the dead letter file
+    Args:
+        session: The Grakn session
+        batch_df: the rows of the batch
+        queries: one graql query per row
+        concept: the concept being loaded
+        dead_letter: csv or json lines file to write failed rows to
+        phases: {phase: seconds} to add the transaction times to
+    Returns:
+        batch_latencies: seconds taken by each committed batch
+        failed_rows: number of rows that did not commit
+    """
+    latencies, failures = commit_bisect(session, queries, phases)
+    logging.debug(
+        f"Committed {len(queries) - len(failures)} {concept} rows "
+        f"in {sum(latencies):.3f}s"
+    )
+
+    if len(failures) > 0:
+        logging.error(f"Quarantined {len(failures)} {concept} rows")
+
+        if dead_letter is not None:
+            write_dead_letters(
+                dead_letter,
+                [
+                    {
+                        "concept": concept,
+                        "row": batch_df.iloc[position].to_dict(),
+                        "error": error,
+                        "graql": queries[position],
+                    }
+                    for position, error in failures
+                ],
+            )
+
+    return latencies, len(failures)
+
+
+def format_rows(
+    df: pd.DataFrame, make_queries, concept: str, dead_letter=None
+) -> Tuple[pd.DataFrame, list, np.ndarray]:
+    """
+    Purpose:
+       Make the statements of a block of rows. When the block fails the rows
+       are formatted one at a time, rows that fail are written to the dead
+       letter file instead of stopping the load
+    Args:
+        df: The rows to format
+        make_queries: function that turns a dataframe into graql queries
+        concept: the concept being loaded
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        rows_df: the rows that were formatted
+        queries: one graql query per formatted row
+        formatted: bool per row of df, False for rows that failed
+    """
+    try:
+        return df, make_queries(df), np.ones(len(df), dtype=bool)
+    except Exception as error:
+        logging.debug(f"Formatting {concept} rows one at a time: {error}")
+
+    queries = []
+    failures = []
+    formatted = np.ones(len(df), dtype=bool)
+
+    for position in range(len(df)):
+        try:
+            queries.extend(make_queries(df.iloc[position : position + 1]))
+        except Exception as error:
+            formatted[position] = False
+            failures.append((position, str(error)))
+
+    if len(failures) > 0:
+        logging.error(
+            f"Quarantined {len(failures)} {concept} rows that could not be formatted"
+        )
+
+        if dead_letter is not None:
+            write_dead_letters(
+                dead_letter,
+                [
+                    {
+                        "concept": concept,
+                        "row": df.iloc[position].to_dict(),
+                        "error": error,
+                        "graql": None,
+                    }
+                    for position, error in failures
+                ],
+            )
+
+    return df[formatted], queries, formatted
+
+
+def insert_in_batches(
+    session,
+    df: pd.DataFrame,
+    make_queries,
+    batch_size: int,
+    concept: str,
+    dead_letter=None,
+    on_batch=None,
+) -> dict:
+    """
+    Purpose:
+       Insert the rows of a dataframe in batches of write transactions,
+       rows that fail are isolated by retrying halves of the batch
+    Args:
+        session: The Grakn session
+        df: The data to add
+        make_queries: function that turns a dataframe into graql queries
+        batch_size: number of rows to commit per write transaction
+        concept: the concept being loaded
+        dead_letter: csv or json lines file to write failed rows to
+        on_batch: function called with the number of rows done after each batch
+    Returns:
+        load_stats: details of the load
+    """
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be at least 1 not {batch_size}")
+
+    start = time.perf_counter()
+    batch_latencies = []
+    failed_rows = 0
+    phases = {}
+
+    # build statements a block of whole batches at a time
+    block_size = batch_size * max(1, STATEMENT_BLOCK_SIZE // batch_size)
+
+    for block_start in range(0, len(df), block_size):
+        block_df = df.iloc[block_start : block_start + block_size]
+
+        format_start = time.perf_counter()
+        rows_df, block_queries, formatted = format_rows(
+            block_df, make_queries, concept, dead_letter
+        )
+        add_phase(phases, "format", time.perf_counter() - format_start)
+        failed_rows += len(block_df) - len(rows_df)
+
+        # rows of the block done after each formatted row
+        rows_done = np.flatnonzero(formatted) + 1
+
+        for batch_offset in range(0, len(block_queries), batch_size):
+            latencies, batch_failed = commit_rows(
+                session,
+                rows_df.iloc[batch_offset : batch_offset + batch_size],
+                block_queries[batch_offset : batch_offset + batch_size],
+                concept,
+                dead_letter,
+                phases,
+            )
+            batch_latencies.extend(latencies)
+            failed_rows += batch_failed
+
+            if on_batch is not None:
+                batch_end = batch_offset + batch_size
+                if batch_end >= len(block_queries):
+                    on_batch(block_start + len(block_df))
+                else:
+                    on_batch(block_start + int(rows_done[batch_end - 1]))
+
+    elapsed = time.perf_counter() - start
+    logging.info(f"Committed {len(df) - failed_rows} {concept} rows in {elapsed:.3f}s")
+
+    return make_load_stats(
+        len(df), failed_rows, batch_latencies, elapsed, failed_rows, phases
+    )
+
+
+def split_rows(df: pd.DataFrame, parts: int) -> list:
+    """
+    Purpose:
+       Split a dataframe into contiguous row ranges
+    Args:
+        df: The data to split
+        parts: number of row ranges to make
+    Returns:
+        frames: list of dataframes
+    """
+    if parts < 1:
+        raise ValueError(f"parts must be at least 1 not {parts}")
+
+    range_size = max(1, math.ceil(len(df) / parts))
+
+    return [
+        df.iloc[range_start : range_start + range_size]
+        for range_start in range(0, len(df), range_size)
+    ]
+
+
+def merge_load_stats(stats_list: list, elapsed: float) -> dict:
+    """
+    Purpose:
+       Merge the load stats of several workers or chunks
+    Args:
+        stats_list: load stats from each worker or chunk
+        elapsed: wall clock seconds taken by the whole load
+    Returns:
+        load_stats: details of the whole load
+    """
+    rows = 0
+    failed_rows = 0
+    quarantined_rows = 0
+    batch_latencies = []
+    missing_keys = []
+    phases = {}
+
+    for stats in stats_list:
+        rows += stats["rows"]
+        failed_rows += stats["failed_rows"]
+        quarantined_rows += stats["quarantined_rows"]
+        batch_latencies.extend(stats["batch_latencies"])
+        missing_keys.extend(stats.get("unresolved_keys", []))
+
+        for phase, seconds in stats["phases"].items():
+            add_phase(phases, phase, seconds)
+
+    load_stats = make_load_stats(
+        rows, failed_rows, batch_latencies, elapsed, quarantined_rows, phases
+    )
+    if len(missing_keys) > 0:
+        load_stats["unresolved_keys"] = missing_keys
+
+    return load_stats
+
+
+def insert_with_workers(
+    client,
+    keyspace: str,
+    df: pd.DataFrame,
+    make_queries,
+    batch_size: int,
+    concept: str,
+    workers: int,
+    dead_letter=None,
+) -> dict:
+    """
+    Purpose:
+       Insert row ranges of a dataframe from a pool of threads,
+       each worker gets its own session
+    Args:
+        client: The Grakn client
+        keyspace: the keyspace to load into
+        df: The data to add
+        make_queries: function that turns a dataframe into graql queries
+        batch_size: number of rows to commit per write transaction
+        concept: the concept being loaded
+        workers: number of threads to load with
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        load_stats: details of the load
+    """
+    start = time.perf_counter()
+
+    def load_rows(range_df: pd.DataFrame) -> dict:
+        with client.session(keyspace=keyspace) as session:
+            return insert_in_batches(
+                session, range_df, make_queries, batch_size, concept, dead_letter
+            )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        stats_list = list(executor.map(load_rows, split_rows(df, workers)))
+
+    load_stats = merge_load_stats(stats_list, time.perf_counter() - start)
+    load_stats["workers"] = workers
+    logging.info(
+        f"Loaded {load_stats['committed_rows']} {concept} rows with {workers} workers"
+    )
+
+    return load_stats
+
+
+def add_entities_into_grakn(
+    session,
+    df: pd.DataFrame,
+    entity_name: str,
+    entity_map: dict,
+    batch_size: int = 1,
+    on_batch=None,
+    dead_letter=None,
+) -> dict:
+    """
+    Purpose:
+       add entites data to Grakn
+    Args:
+        session: The Grakn session
+        df: The data to add
+        entity_name: the entity name
+        entity_map: the entity map
+        batch_size: number of rows to commit per write transaction
+        on_batch: function called with the number of rows done after each batch
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        load_stats: details of the load
+    """
+    # logging.info("adding entities")
+    # for each batch of rows in csv, add the entities in one transaction
+    return insert_in_batches(
+        session,
+        df,
+        lambda df: make_entity_queries(df, entity_name, entity_map),
+        batch_size,
+        entity_name,
+        dead_letter,
+        on_batch,
+    )
+
+
+def add_entities_with_workers(
+    client,
+    keyspace: str,
+    df: pd.DataFrame,
+    entity_name: str,
+    entity_map: dict,
+    batch_size: int = 1,
+    workers: int = 1,
+    dead_letter=None,
+) -> dict:
+    """
+    Purpose:
+       add entites data to Grakn from a pool of threads
+    Args:
+        client: The Grakn client
+        keyspace: the keyspace to load into
+        df: The data to add
+        entity_name: the entity name
+        entity_map: the entity map
+        batch_size: number of rows to commit per write transaction
+        workers: number of threads to load with
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        load_stats: details of the load
+    """
+    return insert_with_workers(
+        client,
+        keyspace,
+        df,
+        lambda df: make_entity_queries(df, entity_name, entity_map),
+        batch_size,
+        entity_name,
+        workers,
+        dead_letter,
+    )
+
+
+def add_relationship_data_with_workers(
+    client,
+    keyspace: str,
+    df: pd.DataFrame,
+    rel_map: dict,
+    rel_name: str,
+    batch_size: int = 1,
+    workers: int = 1,
+    key_ids=None,
+    dead_letter=None,
+) -> dict:
+    """
+    Purpose:
+       add relationship data to Grakn from a pool of threads, role players
+       are resolved to concept ids once before the workers start
+    Args:
+        client: The Grakn client
+        keyspace: the keyspace to load into
+        df: The data to add
+        rel_map: the relationship map
+        rel_name: the relationship name
+        batch_size: number of rows to commit per write transaction
+        workers: number of threads to load with
+        key_ids: {entity: {key value: concept id}} to reuse between chunks
+        dead_letter: csv or json lines file to write failed rows to
+    Returns:
+        load_stats: details of the load
+    """
+    if rel_map["rel1"]["key"] is None or rel_map["rel2"]["key"] is None:
+        # nothing to resolve on, the statements match the role players
+        return insert_with_workers(
+            client,
+            keyspace,
+            df,
+            lambda df: make_relationship_queries(df, rel_name, rel_map),
+            batch_size,
+            rel_name,
+            workers,
+            dead_letter,
+        )
+
+    with client.session(keyspace=keyspace) as session:
+        resolved, unresolved, missing_keys = resolve_relationship_keys(
+            session, df, rel_map, key_ids
+        )
+    report_unresolved(rel_name, unresolved, missing_keys)
+
+    load_stats = insert_with_workers(
+        client,
+        keyspace,
+        resolved,
+        lambda df: make_relationship_queries(df, rel_name, rel_map, by_id=True),
+        batch_size,
+        rel_name,
+        workers,
+        dead_letter,
+    )
+
+    return add_unresolved_stats(load_stats, unresolved, missing_keys)
+
+
+def get_all_rels(session, entity_map):
+    """
+    Purpose:
+       Get relationship map
+    Args:
+        session - Current grakn session
+        entity_map - the entity map
+    Returns:
+        rel_map - the rel map
+    """
+    # Example rel map
+    # {'Productize': {'rel1': {'role': 'produced', 'entity': 'Product', 'key': 'name', 'key_type': 'string'}, 'rel2': {'role': 'producer', 'entity': 'Company', 'key': 'name', 'key_type': 'string'}, 'cols': {'codex_details': {'type': 'string'}, 'note': {'type': 'string'}}}}
+
+    with session.transaction().write() as transaction:
+        entity_type = transaction.get_schema_concept("relation")
+        subs = list(entity_type.subs())
+        # logging.info(subs)
+        subs_labels = [sub.label() for sub in subs]
+        logging.info(subs_labels)
+        subs_labels.pop(0)
+        rel_map = {}
+
+        for sub_label in subs_labels:
+            # setup ent map
+            logging.info(f"##################{sub_label}##################")
+            rel_map[sub_label] = {}
+            rel_map[sub_label]["cols"] = {}
+            rel_map[sub_label]["rel1"] = {}
+            rel_map[sub_label]["rel2"] = {}
+
+            curr_sub = transaction.get_schema_concept(sub_label)
+
+            current_attrs = curr_sub.attributes()
+
+            labels = []
+            for attr in current_attrs:
+
+                label_obj = {}
+                label_obj["type"] = turn_value_type(attr.value_type())
+
+                label_obj["label"] = attr.label()
+                labels.append(label_obj)
+
+            for label in labels:
+                rel_map[sub_label]["cols"][label["label"]] = {}
+                rel_map[sub_label]["cols"][label["label"]]["type"] = label["type"]
+
+            roles = curr_sub.roles()
+
+            counter = 0
+            for role in roles:
+
+                players = role.players()
+
+                with_ent = ""
+                for player in players:
+                    with_ent = player.label()
+
+                # {'role': 'produced', 'entity': 'Product', 'key': 'name', 'key_type': 'string'}
+                ent_key = entity_map[with_ent]["key"]
+                ent_key_type = entity_map[with_ent]["cols"][ent_key]["type"]
+
+                if counter == 0:
+                    rel_map[sub_label]["rel1"]["role"] = role.label()
                     rel_map[sub_label]["rel1"]["entity"] = with_ent
                     rel_map[sub_label]["rel1"]["key"] = ent_key
                     rel_map[sub_label]["rel1"]["key_type"] = ent_key_type
@@ -1910,92 +3774,217 @@ def get_all_entities(session):
         return ent_map
 
 
-def load_entity_into_grakn(
-    session, df: pd.DataFrame, entity_name: str, entity_key=None
+# codex value types to graql value types
+graql_value_map = {
+    "string": "string",
+    "double": "double",
+    "long": "long",
+    "bool": "boolean",
+    "date": "datetime",
+}
+
+
+def infer_attribute_map(
+    df: pd.DataFrame, cols: list, sample_size: int = TYPE_SAMPLE_SIZE
 ) -> dict:
     """
     Purpose:
-       load entites into Grakn
+       Infer the attribute types of some dataframe columns
     Args:
-        session: The Grakn session
-        df: The data to add
-        entity_name: the entity name
-        entity_key: the entity key
+        df: The data to infer from
+        cols: the columns to infer
+        sample_size: number of rows sampled to infer each column type
     Returns:
-        entity_map: entity data
+        attr_map: {col: {"type": value type}}
     """
-    # sample entity
-    entity_map = {}
+    attr_map = {}
 
-    # make attrs
-    for col in df.columns:
-        with session.transaction().write() as transaction:
-            # logging.info(col)
-            entity_map[col] = {}
-            current_type = check_types(df, col)
-            entity_map[col]["type"] = turn_value_type(current_type)
+    for col in cols:
+        attr_map[col] = {}
+        attr_map[col]["type"] = turn_value_type(check_types(df, col, sample_size))
 
-            transaction.put_attribute_type(col, current_type)
-            transaction.commit()
+    return attr_map
+
+
+def create_attribute_query(attr_map: dict) -> str:
+    """
+    Purpose:
+       Create attribute type definition query
+    Args:
+        attr_map: {attribute: {"type": value type}}
+    Returns:
+        graql_insert_query: The query to run
+    """
+    graql_insert_query = "define "
+
+    for attr in attr_map:
+        value_type = graql_value_map[attr_map[attr]["type"]]
+        graql_insert_query += f"{attr} sub attribute, value {value_type}; "
+
+    return graql_insert_query.strip()
+
+
+def merge_define_queries(queries: list) -> str:
+    """
+    Purpose:
+       Merge define queries into one define query, attributes shared by
+       several concepts are only defined once
+    Args:
+        queries: define queries
+    Returns:
+        graql_insert_query: The query to run
+    """
+    statements = {}
+
+    for query in queries:
+        query = query.strip()
+        if query.startswith("define"):
+            query = query[len("define") :]
+
+        # schema statements hold no string literals, so ; only ends them
+        for statement in query.split(";"):
+            statement = statement.strip()
+            if len(statement) > 0:
+                statements[statement] = None
+
+    return "define " + " ".join(statement + ";" for statement in statements)
+
+
+def define_schema(session, queries: list) -> None:
+    """
+    Purpose:
+       Run many define queries as one define in one write transaction
+    Args:
+        session: The Grakn session
+        queries: define queries
+    Returns:
+        N/A
+    """
+    graql_insert_query = merge_define_queries(queries)
 
-    # make entity
     with session.transaction().write() as transaction:
-        graql_insert_query = create_entity_query(df, entity_name, entity_key)
         logging.info("Executing Graql Query: " + graql_insert_query)
         transaction.query(graql_insert_query)
         transaction.commit()
 
-    return entity_map
 
+def make_entity_schema(
+    df: pd.DataFrame,
+    entity_name: str,
+    entity_key=None,
+    sample_size: int = TYPE_SAMPLE_SIZE,
+) -> Tuple[dict, str]:
+    """
+    Purpose:
+       Make the entity map and the define query for an entity
+    Args:
+        df: The data to infer the schema from
+        entity_name: the entity name
+        entity_key: the entity key
+        sample_size: number of rows sampled to infer each column type
+    Returns:
+        entity_map: entity data
+        graql_insert_query: define query for the attributes and the entity
+    """
+    entity_map = infer_attribute_map(df, df.columns, sample_size)
+
+    graql_insert_query = merge_define_queries(
+        [
+            create_attribute_query(entity_map),
+            create_entity_query(df, entity_name, entity_key),
+        ]
+    )
 
-def load_relationship_into_grakn(
-    session, df: pd.DataFrame, cols: list, rel_name: str, rel_map: dict
-) -> dict:
+    return entity_map, graql_insert_query
+
+
+def make_relationship_schema(
+    df: pd.DataFrame,
+    cols: list,
+    rel_name: str,
+    rel_map: dict,
+    sample_size: int = TYPE_SAMPLE_SIZE,
+) -> Tuple[dict, str]:
     """
     Purpose:
-       load relationships into Grakn
+       Make the attribute map and the define query for a relationship
     Args:
-        session: The Grakn session
-        df: The data to add
+        df: The data to infer the schema from
+        cols: the attribute columns
         rel_name: the relationship name
         rel_map: the relationship map
+        sample_size: number of rows sampled to infer each column type
     Returns:
         entity_map: relationship data
+        graql_insert_query: define query for the attributes, the relationship
+            and the roles the entities play
     """
-    # sample entity
-    entity_map = {}
-
     # our hardcoded attribute
-    entity_map["codex_details"] = {}
-    entity_map["codex_details"]["type"] = "string"
+    entity_map = {"codex_details": {"type": "string"}}
+    entity_map.update(infer_attribute_map(df, cols, sample_size))
+
+    graql_insert_query = merge_define_queries(
+        [
+            create_attribute_query(entity_map),
+            create_relationship_query(entity_map, rel_name, rel_map),
+            add_relationship_to_entities(rel_map),
+        ]
+    )
 
-    with session.transaction().write() as transaction:
-        transaction.put_attribute_type("codex_details", ValueType.STRING)
-        transaction.commit()
+    return entity_map, graql_insert_query
 
-    # make attrs
-    for col in cols:
-        with session.transaction().write() as transaction:
-            # logging.info(col)
-            entity_map[col] = {}
-            current_type = check_types(df, col)
-            entity_map[col]["type"] = turn_value_type(current_type)
 
-            transaction.put_attribute_type(col, current_type)
-            transaction.commit()
+def load_entity_into_grakn(
+    session,
+    df: pd.DataFrame,
+    entity_name: str,
+    entity_key=None,
+    sample_size: int = TYPE_SAMPLE_SIZE,
+) -> dict:
+    """
+    Purpose:
+       load entites into Grakn, the whole schema is defined in one transaction
+    Args:
+        session: The Grakn session
+        df: The data to add
+        entity_name: the entity name
+        entity_key: the entity key
+        sample_size: number of rows sampled to infer each column type
+    Returns:
+        entity_map: entity data
+    """
+    entity_map, graql_insert_query = make_entity_schema(
+        df, entity_name, entity_key, sample_size
+    )
+    define_schema(session, [graql_insert_query])
 
-    # make relationships
-    with session.transaction().write() as transaction:
-        graql_insert_query = create_relationship_query(entity_map, rel_name, rel_map)
-        print("Executing Graql Query: " + graql_insert_query)
-        transaction.query(graql_insert_query)
-        transaction.commit()
+    return entity_map
 
-    # update entities with relationship
-    with session.transaction().write() as transaction:
-        graql_insert_query = add_relationship_to_entities(rel_map)
-        print("Executing Graql Query: " + graql_insert_query)
-        transaction.query(graql_insert_query)
-        transaction.commit()
+
+def load_relationship_into_grakn(
+    session,
+    df: pd.DataFrame,
+    cols: list,
+    rel_name: str,
+    rel_map: dict,
+    sample_size: int = TYPE_SAMPLE_SIZE,
+) -> dict:
+    """
+    Purpose:
+       load relationships into Grakn, the whole schema is defined in one
+       transaction
+    Args:
+        session: The Grakn session
+        df: The data to add
+        rel_name: the relationship name
+        rel_map: the relationship map
+        sample_size: number of rows sampled to infer each column type
+    Returns:
+        entity_map: relationship data
+    """
+    entity_map, graql_insert_query = make_relationship_schema(
+        df, cols, rel_name, rel_map, sample_size
+    )
+    define_schema(session, [graql_insert_query])
 
     return entity_map
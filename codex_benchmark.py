@@ -0,0 +1,189 @@
+import logging
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from codex import CodexKg, QueryOptions
+from codex.grakn_functions import (
+    make_entity_query,
+    make_entity_queries,
+    make_relationship_query,
+    make_relationship_queries,
+)
+
+logging.basicConfig(
+    format="%(asctime)s : %(levelname)s : %(message)s", level=logging.INFO
+)
+
+
+def make_company_data(num_rows: int) -> pd.DataFrame:
+
+    # Fake Company table with string, double, long and date columns
+    return pd.DataFrame(
+        {
+            "name": [f'Company "{num}"' for num in range(num_rows)],
+            "budget": np.random.rand(num_rows) * 1000,
+            "employees": np.random.randint(1, 10000, num_rows),
+            "founded": [
+                f"20{num % 20:02d}-0{num % 9 + 1}-1{num % 9}" for num in range(num_rows)
+            ],
+        }
+    )
+
+
+def make_productize_data(num_rows: int) -> pd.DataFrame:
+
+    # Fake Productize table linking Products to Companies
+    return pd.DataFrame(
+        {
+            "produced": [f"Product {num}" for num in range(num_rows)],
+            "produces": [f"Company {num % 100}" for num in range(num_rows)],
+            "note": [f"note {num}" for num in range(num_rows)],
+        }
+    )
+
+
+def time_statements(name: str, make_statements, num_rows: int) -> float:
+
+    start = time.perf_counter()
+    make_statements()
+    elapsed = time.perf_counter() - start
+
+    logging.info(f"{name}: {num_rows / elapsed:,.0f} statements/sec")
+
+    return elapsed
+
+
+def statement_benchmark(num_rows: int = 100000):
+
+    companies = make_company_data(num_rows)
+    entity_map = {
+        "Company": {
+            "key": "name",
+            "cols": {
+                "name": {"type": "string"},
+                "budget": {"type": "double"},
+                "employees": {"type": "long"},
+                "founded": {"type": "date"},
+            },
+            "rels": {},
+        }
+    }
+
+    row_time = time_statements(
+        "Company row by row",
+        lambda: [
+            make_entity_query(row, "Company", entity_map)
+            for _, row in companies.iterrows()
+        ],
+        num_rows,
+    )
+    vector_time = time_statements(
+        "Company vectorized",
+        lambda: make_entity_queries(companies, "Company", entity_map),
+        num_rows,
+    )
+    logging.info(f"Company speedup: {row_time / vector_time:.1f}x")
+
+    products = make_productize_data(num_rows)
+    rel_map = {
+        "rel1": {
+            "role": "produced",
+            "entity": "Product",
+            "key": "name",
+            "key_type": "string",
+        },
+        "rel2": {
+            "role": "produces",
+            "entity": "Company",
+            "key": "name",
+            "key_type": "string",
+        },
+        "cols": {"codex_details": {"type": "string"}, "note": {"type": "string"}},
+    }
+
+    row_time = time_statements(
+        "Productize row by row",
+        lambda: [
+            make_relationship_query(row, "Productize", rel_map)
+            for _, row in products.iterrows()
+        ],
+        num_rows,
+    )
+    vector_time = time_statements(
+        "Productize vectorized",
+        lambda: make_relationship_queries(products, "Productize", rel_map),
+        num_rows,
+    )
+    logging.info(f"Productize speedup: {row_time / vector_time:.1f}x")
+
+
+def time_finds(codexkg, options: QueryOptions, runs: int) -> float:
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        codexkg.find(
+            concept="Company",
+            rel_actions=["produces"],
+            concept_rels=["Product"],
+            concept_rel_attrs=[["product_type"]],
+            concept_rel_conds=[["not equals"]],
+            concept_rel_values=[["phone"]],
+            options=options,
+        )
+    elapsed = (time.perf_counter() - start) / runs
+
+    logging.info(f"Find with {options}: {elapsed * 1000:,.1f} ms/query")
+
+    return elapsed
+
+
+def inference_benchmark(runs: int = 10):
+
+    # Needs a running Grakn and Redis
+    codexkg = CodexKg()
+    codexkg.create_db("codex_inference_benchmark")
+
+    codexkg.create_entity_from_csv("sample_data/tech_companies.csv", "Company", "name")
+    codexkg.create_entity_from_csv("sample_data/tech_products.csv", "Product", "name")
+    codexkg.create_relationship_from_csv(
+        "sample_data/tech_products_rel.csv", "Productize", "Product", "Company"
+    )
+
+    # A rule the find does not touch, inference still has to check it
+    cond1 = codexkg.rule_condition(
+        concept="Company",
+        concept_attrs=["name"],
+        concept_conds=["equals"],
+        concept_values=["Google"],
+    )
+    cond2 = codexkg.rule_condition(
+        concept="Product",
+        concept_attrs=["name"],
+        concept_conds=["contains"],
+        concept_values=["Google"],
+    )
+    codexkg.make_rule(cond1, cond2, "Google_Product")
+
+    infer_time = time_finds(codexkg, QueryOptions(infer=True), runs)
+    no_infer_time = time_finds(codexkg, QueryOptions(infer=False), runs)
+    logging.info(f"Find without inference speedup: {infer_time / no_infer_time:.1f}x")
+
+    codexkg.delete_db("codex_inference_benchmark")
+    codexkg.close()
+
+
+def main():
+
+    # Graql statement generation, no Grakn needed
+    statement_benchmark()
+
+    # Find latency with and without inference, needs Grakn
+    if "--grakn" in sys.argv:
+        inference_benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -262,17 +262,14 @@ def load_time_data(codexkg):
 
 def loading_data(codexkg):
 
-    # load data from csv
-    tech_companies = pd.read_csv("sample_data/tech_companies.csv")
-    tech_products = pd.read_csv("sample_data/tech_products.csv")
-    company_products = pd.read_csv("sample_data/tech_products_rel.csv")
-
-    # create entities
-    codexkg.create_entity(tech_companies, "Company", "name")
-    codexkg.create_entity(tech_products, "Product", "name")
+    # create entities, streaming the csv files in chunks
+    codexkg.create_entity_from_csv("sample_data/tech_companies.csv", "Company", "name")
+    codexkg.create_entity_from_csv("sample_data/tech_products.csv", "Product", "name")
 
     # create rels
-    codexkg.create_relationship(company_products, "Productize", "Product", "Company")
+    codexkg.create_relationship_from_csv(
+        "sample_data/tech_products_rel.csv", "Productize", "Product", "Company"
+    )
 
     # add standalone entities
     tech_products2 = pd.read_csv("sample_data/tech_products2.csv")
@@ -147,10 +147,12 @@ def main():
 
     # Get Packages
     packages = find_packages(exclude=("testing",))
-    install_packages = [
-        package for package in packages if not package.endswith(".tests")
+    test_packages = [
+        package
+        for package in packages
+        if package == "tests" or package.endswith(".tests")
     ]
-    test_packages = [package for package in packages if package.endswith(".tests")]
+    install_packages = [package for package in packages if package not in test_packages]
 
     # Get Requirements and Requirments Installation Details
     install_requirements = get_requirements_from_packages(install_packages)
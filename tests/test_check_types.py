@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+from grakn.client import ValueType
+
+import codex.grakn_functions as grakn_functions
+from codex.grakn_functions import check_types, is_date_sample
+
+
+@pytest.fixture(autouse=True)
+def clear_type_memo():
+    grakn_functions.type_memo.clear()
+    yield
+    grakn_functions.type_memo.clear()
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["2020-01-02", "2020-01-03 10:00"],
+        ["2017-10-03", "2018-09-02T10:32:11.09"],
+        ["2020-01-02T10:00+05:00", "2020-01-02T10:00Z"],
+        ["03/10/2017", "October 3, 2017"],
+    ],
+)
+def test_dates(values):
+    assert is_date_sample(pd.Series(values))
+    assert check_types(pd.DataFrame({"founded": values}), "founded") == (
+        ValueType.DATETIME
+    )
+
+
+@pytest.mark.parametrize(
+    "values", [["2020-13-45", "2020-01-01"], ["May", "2020-01-01"], ["abc"]]
+)
+def test_not_dates(values):
+    assert not is_date_sample(pd.Series(values))
+    assert check_types(pd.DataFrame({"founded": values}), "founded") == (
+        ValueType.STRING
+    )
+
+
+def test_same_column_is_memoized(monkeypatch):
+    df = pd.DataFrame({"budget": [1.5, 2.5, 3.5]})
+    assert check_types(df, "budget") == ValueType.DOUBLE
+
+    def fail(values, sample):
+        raise AssertionError("the memo was not used")
+
+    monkeypatch.setattr(grakn_functions, "infer_sample_type", fail)
+    assert check_types(df.copy(), "budget") == ValueType.DOUBLE
+
+
+def test_numbers_in_object_columns_are_not_memoized():
+    sample_size = 10
+    numbers = pd.DataFrame({"code": [str(number) for number in range(100)]})
+    assert check_types(numbers, "code", sample_size) == ValueType.LONG
+
+    # same sample, a value outside it is not a number
+    mixed = numbers.copy()
+    mixed.loc[50, "code"] = "abc"
+    sample = grakn_functions.sample_column(mixed["code"], sample_size)
+    assert "abc" not in sample.tolist()
+
+    assert check_types(mixed, "code", sample_size) == ValueType.STRING
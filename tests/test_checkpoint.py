@@ -0,0 +1,121 @@
+import json
+
+import fakeredis
+import pandas as pd
+import pytest
+
+from codex import CodexKg
+from codex.codex_ingest import load_chunks
+from codex.grakn_functions import make_load_stats
+
+
+def make_codexkg():
+    codexkg = CodexKg()
+    codexkg.cache = fakeredis.FakeRedis()
+    codexkg.rkey = "grakn_keyspace_test"
+    return codexkg
+
+
+def make_chunks(df, size):
+    return [df.iloc[start : start + size] for start in range(0, len(df), size)]
+
+
+def make_loader(loaded, fail_at=None, batch_size=2):
+    def load_chunk(chunk, on_batch):
+        for start in range(0, len(chunk), batch_size):
+            batch = chunk.iloc[start : start + batch_size]
+            if fail_at is not None and fail_at in batch["name"].tolist():
+                raise RuntimeError("grakn went away")
+
+            loaded.extend(batch["name"])
+            if on_batch is not None:
+                on_batch(start + len(batch))
+
+        return make_load_stats(len(chunk), 0, [0.01], 0.01)
+
+    return load_chunk
+
+
+def test_resume_continues_after_the_last_checkpoint():
+    codexkg = make_codexkg()
+    df = pd.DataFrame({"name": [f"Company {num}" for num in range(20)]})
+    loaded = []
+
+    save_checkpoint, offset = codexkg.get_checkpoint(df, "Company", resume=True)
+    assert offset == 0
+
+    with pytest.raises(RuntimeError):
+        load_chunks(
+            make_chunks(df, 5),
+            make_loader(loaded, fail_at="Company 12"),
+            save_checkpoint,
+            offset,
+        )
+
+    # the batch before the failed one was the last committed
+    checkpoint = json.loads(codexkg.cache.get(codexkg.checkpoint_key("Company")))
+    assert checkpoint["rows"] == 12
+
+    save_checkpoint, offset = codexkg.get_checkpoint(df, "Company", resume=True)
+    assert offset == 12
+
+    resumed = []
+    load_stats = load_chunks(
+        make_chunks(df, 5), make_loader(resumed), save_checkpoint, offset
+    )
+
+    assert resumed == [f"Company {num}" for num in range(12, 20)]
+    assert load_stats["resumed_from"] == 12
+
+
+def test_changed_source_loads_from_the_start():
+    codexkg = make_codexkg()
+    df = pd.DataFrame({"name": [f"Company {num}" for num in range(10)]})
+
+    save_checkpoint, _ = codexkg.get_checkpoint(df, "Company", resume=True)
+    save_checkpoint(6)
+
+    changed = df.assign(name=df["name"] + " Inc")
+    _, offset = codexkg.get_checkpoint(changed, "Company", resume=True)
+
+    assert offset == 0
+
+
+def test_no_checkpoint_without_resume(monkeypatch):
+    codexkg = make_codexkg()
+    df = pd.DataFrame({"name": [f"Company {num}" for num in range(10)]})
+
+    def fail_fingerprint(source):
+        raise AssertionError("source fingerprinted without resume")
+
+    monkeypatch.setattr("codex.codex_kg.source_fingerprint", fail_fingerprint)
+
+    save_checkpoint, offset = codexkg.get_checkpoint(df, "Company", resume=False)
+
+    assert save_checkpoint is None
+    assert offset == 0
+    assert not codexkg.cache.exists(codexkg.checkpoint_key("Company"))
+
+
+def test_every_batch_is_checkpointed():
+    df = pd.DataFrame({"name": [f"Company {num}" for num in range(20)]})
+    saved = []
+
+    load_chunks(make_chunks(df, 10), make_loader([]), saved.append)
+
+    assert saved == [2, 4, 6, 8, 10, 12, 14, 16, 18, 20]
+
+
+def test_batch_checkpoints_can_be_throttled():
+    df = pd.DataFrame({"name": [f"Company {num}" for num in range(20)]})
+    saved = []
+
+    load_chunks(
+        make_chunks(df, 10),
+        make_loader([]),
+        saved.append,
+        checkpoint_interval=3600.0,
+    )
+
+    # only the chunk ends, not every batch
+    assert saved == [10, 20]
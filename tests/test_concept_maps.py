@@ -0,0 +1,107 @@
+import copy
+import json
+
+import fakeredis
+import pandas as pd
+import pytest
+
+from codex import CodexKg
+
+
+def make_codexkg(cache):
+    codexkg = CodexKg()
+    codexkg.cache = cache
+    codexkg.rkey = "grakn_keyspace_test"
+    codexkg.keyspace = "test"
+    return codexkg
+
+
+def saved_concept(cache, map_name, name):
+    return json.loads(cache.hget(f"grakn_keyspace_test_{map_name}", name))
+
+
+def make_entities(codexkg):
+    codexkg.entity_schema(
+        pd.DataFrame({"name": ["Apple"], "budget": [123.45]}), "Company", "name"
+    )
+    codexkg.entity_schema(
+        pd.DataFrame({"name": ["iPhone"], "product_type": ["phone"]}),
+        "Product",
+        "name",
+    )
+    codexkg.save_concept_maps()
+
+
+def test_redefined_entity_replaces_saved():
+    cache = fakeredis.FakeRedis()
+    codexkg = make_codexkg(cache)
+    make_entities(codexkg)
+
+    codexkg.entity_schema(pd.DataFrame({"name": ["Apple"]}), "Company", "name")
+    codexkg.save_concept_maps()
+
+    assert list(saved_concept(cache, "entity_map", "Company")["cols"]) == ["name"]
+
+
+def test_rels_of_other_writers_are_kept():
+    cache = fakeredis.FakeRedis()
+    first = make_codexkg(cache)
+    make_entities(first)
+
+    # both writers start from the same maps
+    second = make_codexkg(cache)
+    second.entity_map = copy.deepcopy(first.entity_map)
+
+    first.relationship_schema(
+        pd.DataFrame({"produced": ["iPhone"], "produces": ["Apple"]}),
+        "Productize",
+        "Product",
+        "Company",
+    )
+    first.save_concept_maps()
+    second.relationship_schema(
+        pd.DataFrame({"sold": ["iPhone"], "sells": ["Apple"]}),
+        "Sells",
+        "Product",
+        "Company",
+    )
+    second.save_concept_maps()
+
+    company = saved_concept(cache, "entity_map", "Company")
+    assert sorted(company["rels"]) == ["Productize", "Sells"]
+    assert list(company["cols"]) == ["name", "budget"]
+
+
+class FailingSession:
+    def transaction(self):
+        raise RuntimeError("grakn went away")
+
+
+def test_failed_define_leaves_the_maps():
+    cache = fakeredis.FakeRedis()
+    codexkg = make_codexkg(cache)
+    make_entities(codexkg)
+    entity_map = copy.deepcopy(codexkg.entity_map)
+
+    with pytest.raises(RuntimeError):
+        codexkg.define_entity(
+            FailingSession(), pd.DataFrame({"name": ["Apple"]}), "Company", "name"
+        )
+    with pytest.raises(RuntimeError):
+        codexkg.define_relationship(
+            FailingSession(),
+            pd.DataFrame({"produced": ["iPhone"], "produces": ["Apple"]}),
+            "Productize",
+            "Product",
+            "Company",
+        )
+
+    assert codexkg.entity_map == entity_map
+    assert "Productize" not in codexkg.rel_map
+    assert not any(codexkg.changed.values())
+
+    codexkg.save_concept_maps()
+    assert list(saved_concept(cache, "entity_map", "Company")["cols"]) == [
+        "name",
+        "budget",
+    ]
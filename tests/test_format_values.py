@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+import codex.grakn_functions as grakn_functions
+from codex.grakn_functions import format_values, make_grakn_date
+
+
+@pytest.fixture(autouse=True)
+def clear_date_memo():
+    grakn_functions.date_memo.clear()
+    yield
+    grakn_functions.date_memo.clear()
+
+
+def test_dates_are_parsed_per_value():
+    alone = format_values(pd.Series(["03/10/2017"]), "date")
+    mixed = format_values(pd.Series(["2017-10-31", "03/10/2017"]), "date")
+
+    assert alone[0] == mixed[1] == make_grakn_date("03/10/2017")
+    assert mixed[0] == "2017-10-31T00:00:00.0"
+
+
+def test_repeated_dates_are_parsed_once(monkeypatch):
+    parsed = []
+    make_grakn_dates = grakn_functions.make_grakn_dates
+
+    def count_parses(values):
+        parsed.extend(values)
+        return make_grakn_dates(values)
+
+    monkeypatch.setattr(grakn_functions, "make_grakn_dates", count_parses)
+
+    dates = pd.Series(["2017-10-31", "03/10/2017", "2017-10-31"])
+    first = format_values(dates, "date")
+    second = format_values(dates, "date")
+
+    assert list(first) == list(second)
+    assert make_grakn_date("03/10/2017") == first[1]
+    assert sorted(parsed) == ["03/10/2017", "2017-10-31"]
@@ -0,0 +1,161 @@
+import json
+import time
+import zlib
+from datetime import datetime
+
+import fakeredis
+import numpy as np
+import pandas as pd
+
+from codex.codex_cache import (
+    VERSION_HEADER,
+    CodexResultCache,
+    LocalCache,
+    pack_result,
+    unpack_result,
+)
+from codex.codex_query import CodexQueryCompute
+
+
+def make_query(concept="Company"):
+    return CodexQueryCompute(
+        {"Count": [{"concept": concept}]}, [f"compute count in {concept};"]
+    )
+
+
+def make_answers():
+    companies = pd.DataFrame(
+        {
+            "name": ["Google", "Apple", None],
+            "budget": [1.5, np.nan, 3.0],
+            "employees": [10, 20, 30],
+            "public": [True, False, True],
+            "founded": [datetime(1998, 9, 4), datetime(1976, 4, 1), None],
+        }
+    )
+    return {
+        "Company": companies,
+        "graql_queries": ["match $Company isa Company; get;"],
+        "round_trips": 2,
+        "clusters": {1: ("Google", "Apple")},
+    }
+
+
+def assert_answers_equal(result, answers):
+    pd.testing.assert_frame_equal(result["Company"], answers["Company"])
+    assert result["graql_queries"] == answers["graql_queries"]
+    assert result["round_trips"] == answers["round_trips"]
+    assert result["clusters"] == answers["clusters"]
+
+
+def test_answers_are_kept_as_json():
+    answers = make_answers()
+    data = pack_result(answers, 7)
+
+    # the payload is plain json, nothing is unpickled on read
+    json.loads(zlib.decompress(data[VERSION_HEADER.size :]))
+
+    result, version = unpack_result(data)
+    assert version == 7
+    assert_answers_equal(result, answers)
+
+
+def test_hit_and_miss():
+    results = CodexResultCache(fakeredis.FakeRedis(), "grakn_keyspace_test")
+    query = make_query()
+
+    assert results.get(query) == (None, 0)
+
+    results.set(query, make_answers(), 0)
+    result, version = results.get(query)
+
+    assert version == 0
+    assert_answers_equal(result, make_answers())
+    assert results.get(make_query("Product")) == (None, 0)
+    assert results.stats()["hits"] == 1
+    assert results.stats()["misses"] == 2
+
+
+def test_answers_expire():
+    cache = fakeredis.FakeRedis()
+    results = CodexResultCache(cache, "grakn_keyspace_test", ttl=60)
+    query = make_query()
+
+    results.set(query, make_answers(), 0)
+    key = results.result_key(query)
+    assert 0 < cache.ttl(key) <= 60
+
+    cache.pexpire(key, 1)
+    time.sleep(0.01)
+    assert results.get(query) == (None, 0)
+
+
+def test_bump_invalidates():
+    results = CodexResultCache(
+        fakeredis.FakeRedis(), "grakn_keyspace_test", local=LocalCache()
+    )
+    query = make_query()
+
+    results.set(query, make_answers(), 0)
+    assert results.get(query)[0] is not None
+
+    assert results.bump() == 1
+    assert results.get(query) == (None, 1)
+
+
+def count_round_trips(cache):
+    counts = {"round_trips": 0}
+    get = cache.get
+    pipeline = cache.pipeline
+
+    def counted_get(*args, **kwargs):
+        counts["round_trips"] += 1
+        return get(*args, **kwargs)
+
+    def counted_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        def counted_execute(*execute_args, **execute_kwargs):
+            counts["round_trips"] += 1
+            return execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = counted_execute
+        return pipe
+
+    cache.get = counted_get
+    cache.pipeline = counted_pipeline
+    return counts
+
+
+def test_local_hits_are_copies():
+    results = CodexResultCache(
+        fakeredis.FakeRedis(), "grakn_keyspace_test", local=LocalCache()
+    )
+    query = make_query()
+    results.set(query, make_answers(), 0)
+
+    first, _ = results.get(query)
+    first["Company"].loc[0, "name"] = "Changed"
+    first["graql_queries"].append("changed")
+
+    second, _ = results.get(query)
+    assert_answers_equal(second, make_answers())
+    assert results.local.stats()["hits"] == 2
+
+
+def test_one_round_trip_per_get():
+    cache = fakeredis.FakeRedis()
+    writer = CodexResultCache(cache, "grakn_keyspace_test")
+    reader = CodexResultCache(cache, "grakn_keyspace_test", local=LocalCache())
+    query = make_query()
+    writer.set(query, make_answers(), 0)
+    counts = count_round_trips(cache)
+
+    # a local miss reads the version and the answers together
+    assert reader.get(query)[0] is not None
+    assert counts["round_trips"] == 1
+
+    # a local hit only reads the version
+    assert reader.get(query)[0] is not None
+    assert counts["round_trips"] == 2